@@ -0,0 +1,261 @@
+"""
+Benchmark router intent: menjalankan Chatbot.on_message dengan pesan palsu dan bot stub.
+
+Korpus = prompt di tests.txt + pesan panjang dan adversarial (Indonesia/Inggris) yang dibuat
+secara deterministik. Laporan: pesan/detik, latensi p50/p99 per intent, dan puncak alokasi
+memori per pesan. Hasil bisa disimpan sebagai baseline JSON; jika baseline diberikan,
+run gagal (exit code 1) saat suatu intent lebih lambat dari ambang batas.
+
+Gate tidak membandingkan mikrodetik absolut (berbeda antar mesin): setiap pesan diukur
+`rounds` kali dan diambil waktu minimumnya, lalu median per intent dibagi waktu minimum
+sebuah pola regex referensi yang diukur di proses yang sama. Rasio inilah yang dibandingkan.
+
+    python -m benchmarks.bench_intents                       # laporan saja
+    python -m benchmarks.bench_intents --save                # simpan baseline baru
+    python -m benchmarks.bench_intents --check               # bandingkan dengan baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+# utils.youtube_api butuh API key saat import; benchmark tidak pernah memanggil API.
+os.environ.setdefault("YOUTUBE_API_KEY", "benchmark")
+
+from cogs.chatbot import Chatbot  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "intents.json"
+DEFAULT_ROUNDS = 30
+DEFAULT_THRESHOLD = 1.5  # gagal jika rasio > baseline * threshold
+MIN_REGRESSION_US = 20.0  # abaikan selisih di bawah ini (noise timer), dikonversi ke satuan referensi
+
+# Beban referensi: satu pola lookahead ala intent atas teks tetap, diukur min-of-N
+REFERENCE_PATTERN = re.compile(r"(?im)^(?=.*(info|det[ai]l|keterangan))(?=.*(youtu|video|klip))")
+REFERENCE_TEXT = ("tolong kasih aku detail lengkap tentang sesuatu yang menarik " * 8) + "di youtube"
+REFERENCE_REPEATS = 200
+
+
+class StubChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+        return SimpleNamespace(id=self.sent, edit=self._noop)
+
+    async def _noop(self, *args, **kwargs):
+        return None
+
+
+class StubUser:
+    def __init__(self, user_id: int, bot: bool = False):
+        self.id = user_id
+        self.bot = bot
+        self.mention = f"<@{user_id}>"
+
+    def mentioned_in(self, message) -> bool:
+        return f"<@{self.id}>" in message.content
+
+
+class StubBot:
+    """Bot palsu yang hanya mencatat panggilan dispatch."""
+
+    def __init__(self):
+        self.user = StubUser(0, bot=True)
+        self.dispatched = []
+
+    def dispatch(self, event, *args, **kwargs):
+        self.dispatched.append(event)
+
+    def get_cog(self, name):
+        return None
+
+
+def load_prompts() -> list:
+    prompts = []
+    for line in (ROOT / "tests.txt").read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and not line.startswith("("):
+            prompts.append(line)
+    return prompts
+
+
+def generate_corpus(seed: int = 1234) -> list:
+    rng = random.Random(seed)
+    words_id = "aku mau kamu bisa tolong dong ya ini itu yang dari untuk dengan sama kok sih banget lagi".split()
+    words_en = "the a please can you show me what is this about for with and from really just again".split()
+    triggers = "info detail cari video komentar channel statistik poll timestamp lagu putar temukan".split()
+
+    corpus = [("prompt", p) for p in load_prompts()]
+    for n in (200, 800, 2000):
+        # Pesan panjang biasa
+        filler = " ".join(rng.choice(words_id + words_en) for _ in range(n // 5))
+        corpus.append((f"long_{n}", filler[:n]))
+        # Pesan panjang dengan kata pemicu tersebar
+        mixed = " ".join(rng.choice(words_id + words_en + triggers) for _ in range(n // 5))
+        corpus.append((f"mixed_{n}", mixed[:n]))
+        # Adversarial: hanya grup lookahead pertama yang muncul, grup kedua tidak pernah
+        corpus.append((f"adv_first_group_{n}", ("info cari statistik " * n)[:n]))
+        # Adversarial: banyak angka dan titik dua untuk pola timestamp
+        corpus.append((f"adv_digits_{n}", ("12:3 99:9 1:2: " * n)[:n]))
+        # Adversarial: link youtube palsu berulang tanpa ID yang valid
+        corpus.append((f"adv_links_{n}", ("youtube.com/watch?v=short " * n)[:n]))
+    return corpus
+
+
+def measure_reference(repeats: int = REFERENCE_REPEATS) -> float:
+    """Waktu minimum (us) satu pencarian REFERENCE_PATTERN; satuan untuk rasio."""
+    best = float("inf")
+    search = REFERENCE_PATTERN.search
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        search(REFERENCE_TEXT)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e6
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def run(rounds: int = DEFAULT_ROUNDS, seed: int = 1234) -> dict:
+    bot = StubBot()
+    cog = Chatbot(bot)
+    corpus = generate_corpus(seed)
+    # Label tiap pesan dengan intent yang terdeteksi (di luar pengukuran)
+    labelled = []
+    for kind, text in corpus:
+        match = cog.intent_engine.match(text.lower())
+        labelled.append((match.intent if match else "fallback", kind, text))
+
+    latencies = {}
+    best = [float("inf")] * len(labelled)  # waktu minimum per pesan
+    user_ids = iter(range(1, 10_000_000))
+    channel = StubChannel(1)
+
+    def make_message(text):
+        # User unik per pesan agar state percakapan dari pesan sebelumnya tidak ikut terukur
+        return SimpleNamespace(
+            id=0, content=text, author=StubUser(next(user_ids)), channel=channel, guild=None
+        )
+
+    total = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for i, (intent, _, text) in enumerate(labelled):
+            message = make_message(text)
+            t0 = time.perf_counter()
+            await cog.on_message(message)
+            us = (time.perf_counter() - t0) * 1e6
+            latencies.setdefault(intent, []).append(us)
+            best[i] = min(best[i], us)
+            total += 1
+        # Beri kesempatan task latar (outbox, timer dialog) berjalan di luar pengukuran
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    reference_us = measure_reference()
+
+    best_by_intent = {}
+    for (intent, _, _), us in zip(labelled, best):
+        best_by_intent.setdefault(intent, []).append(us)
+
+    # Pass terpisah untuk alokasi agar tracemalloc tidak mengganggu pengukuran waktu
+    allocations = {}
+    tracemalloc.start()
+    for intent, _, text in labelled:
+        message = make_message(text)
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        await cog.on_message(message)
+        allocations.setdefault(intent, []).append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    per_intent = {}
+    for intent, values in sorted(latencies.items()):
+        min_us = statistics.median(best_by_intent[intent])
+        per_intent[intent] = {
+            "count": len(values),
+            "min_us": round(min_us, 2),
+            "ratio": round(min_us / reference_us, 2),
+            "p50_us": round(statistics.median(values), 2),
+            "p99_us": round(_percentile(values, 99), 2),
+            "alloc_peak_bytes": round(statistics.mean(allocations.get(intent, [0]))),
+        }
+    return {
+        "messages": total,
+        "messages_per_sec": round(total / elapsed, 1),
+        "reference_us": round(reference_us, 3),
+        "intents": per_intent,
+        "dispatched": len(bot.dispatched),
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list:
+    """Daftar regresi: intent yang rasio min-of-N-nya melewati baseline * threshold."""
+    failures = []
+    min_regression = MIN_REGRESSION_US / result["reference_us"]
+    for intent, stats in result["intents"].items():
+        base = baseline.get("intents", {}).get(intent)
+        if not base or "ratio" not in base:
+            continue
+        limit = max(base["ratio"] * threshold, base["ratio"] + min_regression)
+        if stats["ratio"] > limit:
+            failures.append(f"{intent}: rasio {stats['ratio']} > {limit:.2f} (baseline {base['ratio']}, "
+                            f"min {stats['min_us']}us)")
+    return failures
+
+
+def print_report(result: dict):
+    print(f"{result['messages']} pesan, {result['messages_per_sec']} pesan/detik, "
+          f"referensi {result['reference_us']}us")
+    print(f"{'intent':<14}{'n':>6}{'min (us)':>12}{'rasio':>8}{'p50 (us)':>12}{'p99 (us)':>12}{'alloc (B)':>12}")
+    for intent, s in result["intents"].items():
+        print(f"{intent:<14}{s['count']:>6}{s['min_us']:>12}{s['ratio']:>8}{s['p50_us']:>12}{s['p99_us']:>12}"
+              f"{s['alloc_peak_bytes']:>12}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark router intent Chatbot.on_message")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--save", action="store_true", help="simpan hasil sebagai baseline baru")
+    parser.add_argument("--check", action="store_true", help="gagal jika lebih lambat dari baseline")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args.rounds, args.seed))
+    print_report(result)
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline disimpan ke {args.baseline}")
+    if args.check:
+        if not args.baseline.exists():
+            print(f"Baseline {args.baseline} belum ada; jalankan dengan --save dulu.")
+            return 1
+        failures = compare(result, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        if failures:
+            print("REGRESI:")
+            for line in failures:
+                print(f"  {line}")
+            return 1
+        print("OK: tidak ada intent yang melewati ambang batas.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Analisis biaya regex: fuzz setiap pola intent, pola mood Greetings, dan regex di
+utils/youtube_api.py dengan input adversarial, lalu laporkan waktu match terburuk per
+panjang input beserta perkiraan orde pertumbuhannya (slope log-log: ~1 linear, ~2 kuadratik).
+
+    python -m benchmarks.regex_cost                  # laporan
+    python -m benchmarks.regex_cost --max-ms 5       # gagal jika ada pola > 5 ms di 2000 karakter
+"""
+import argparse
+import math
+import os
+import random
+import re
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("YOUTUBE_API_KEY", "benchmark")
+
+from cogs.chatbot import Chatbot  # noqa: E402
+from cogs.greetings import Greetings  # noqa: E402
+from utils import youtube_api  # noqa: E402
+
+LENGTHS = (250, 500, 1000, 2000, 4000)
+GATE_LENGTH = 2000
+
+
+def collect_patterns() -> dict:
+    """{nama: compiled regex} untuk semua pola yang dijalankan pada teks user."""
+    stub = SimpleNamespace(user=None)
+    chatbot = Chatbot(stub)
+    greetings = Greetings(stub)
+    patterns = {f"chatbot.{name}": re.compile(p) for name, p in chatbot.patterns.items()}
+    patterns["chatbot.smalltalk"] = chatbot.smalltalk_pattern
+    # Jalur yang benar-benar dipakai on_message: prefilter + regex + batas panjang
+    patterns["chatbot.intent_engine"] = SimpleNamespace(search=chatbot.intent_engine.match)
+    patterns["greetings.positive_mood"] = greetings.positive_mood_pattern
+    patterns["greetings.negative_mood"] = greetings.negative_mood_pattern
+    for name in dir(youtube_api):
+        value = getattr(youtube_api, name)
+        if name.endswith("_REGEX") and isinstance(value, re.Pattern):
+            patterns[f"youtube_api.{name}"] = value
+    return patterns
+
+
+def adversarial_inputs(length: int, seed: int = 7) -> dict:
+    """Keluarga input yang cenderung memicu backtracking, dipotong ke `length` karakter."""
+    rng = random.Random(seed + length)
+    families = {
+        "first_group_only": "info cari statistik temukan ",
+        "second_group_only": "video channel komentar lagu ",
+        "digits_colons": "12:3 99:9 1:2: ",
+        "watch_no_v": "youtube.com/watch?a=1 ",
+        "channel_urls": "youtube.com/c/ youtube.com/@ ",
+        "letters": "a",
+        "h_run": "haaiiaa",
+        "mood_near_miss": "ga tidak kurang gak ",
+    }
+    inputs = {name: (unit * (length // len(unit) + 1))[:length] for name, unit in families.items()}
+    alphabet = "aiuehkcdv:/.?&=@ 0123456789"
+    inputs["random"] = "".join(rng.choice(alphabet) for _ in range(length))
+    return inputs
+
+
+def time_search(pattern: re.Pattern, text: str, repeat: int = 3) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        pattern.search(text)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def analyze(patterns: dict, lengths=LENGTHS) -> dict:
+    report = {}
+    for name, pattern in patterns.items():
+        worst = {}
+        for length in lengths:
+            cases = adversarial_inputs(length)
+            family, ms = max(((f, time_search(pattern, text)) for f, text in cases.items()), key=lambda x: x[1])
+            worst[length] = (ms, family)
+        lo, hi = lengths[0], lengths[-1]
+        slope = None
+        if worst[lo][0] > 0 and worst[hi][0] > 0:
+            slope = math.log(worst[hi][0] / worst[lo][0]) / math.log(hi / lo)
+        report[name] = {"worst": worst, "slope": slope}
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fuzz biaya regex terhadap input adversarial")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help=f"gagal jika waktu terburuk di {GATE_LENGTH} karakter melebihi nilai ini")
+    args = parser.parse_args(argv)
+
+    report = analyze(collect_patterns())
+    header = "".join(f"{n:>10}" for n in LENGTHS)
+    print(f"{'pola':<36}{header}{'slope':>8}  input terburuk")
+    failures = []
+    for name, entry in report.items():
+        cells = "".join(f"{entry['worst'][n][0]:>10.3f}" for n in LENGTHS)
+        slope = f"{entry['slope']:.2f}" if entry["slope"] is not None else "-"
+        print(f"{name:<36}{cells}{slope:>8}  {entry['worst'][LENGTHS[-1]][1]}")
+        gate_ms = entry["worst"][GATE_LENGTH][0]
+        if args.max_ms is not None and gate_ms > args.max_ms:
+            failures.append(f"{name}: {gate_ms:.3f} ms > {args.max_ms} ms")
+    print("(waktu dalam ms)")
+    if failures:
+        print("TERLALU LAMBAT:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,55 @@
 from asyncio.log import logger
-import asyncio
 import re
 import discord
 from discord.ext import commands
 
-from utils.youtube_api import YOUTUBE_VIDEO_REGEX
+from utils.dialog import DialogStep, get_dialog_manager
+from utils.intents import IntentEngine
+from utils.outbox import get_outbox
+from utils.slots import extract_slots, parse_channel, parse_video
+from utils.state import ConversationStore, get_conversation_store
 
 
 class Chatbot(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.pending_ytinfo = {}  # {user_id: True}
-        self.pending_channelstats = {} # {user_id: True} -> State untuk channel stats
+        # State percakapan (menunggu link ytinfo / nama channel) disimpan di store terpusat
+        self.conversations = get_conversation_store(bot)
+        self.conversations.register("ytinfo", self._on_ytinfo_reply)
+        self.conversations.register("channelstats", self._on_channelstats_reply)
+        # Pertanyaan lanjutan (pengganti bot.wait_for) ditangani DialogManager
+        self.dialogs = get_dialog_manager(bot)
+        # Balasan dikirim lewat outbox per channel agar kiriman berdekatan digabung
+        self.outbox = get_outbox(bot)
+        self.ytsearch_count_step = DialogStep(
+            "ytsearch_count",
+            self._on_ytsearch_count,
+            parse=parse_result_count,
+            on_timeout=self._on_ytsearch_count_timeout,
+            timeout=30,
+            fallthrough=True,  # pesan selain angka 1-10 tetap diproses seperti biasa
+        )
         # Regex patterns (expand later for ytinfo, ytsearch, etc.)
+        # Pola lookahead di-anchor ke awal baris ((?m)^): hasilnya sama dengan versi tanpa anchor,
+        # tapi re.search tidak lagi mencoba lookahead di setiap posisi (O(n^2) pada pesan panjang).
         self.patterns = {
             # Pola lama: r"\b(hi|hello|hey|halo)\b"
             "hello": r"(?i)\b(h[ai]+|he(y|llo)|halo|pagi|siang|sore|malam|yo|sup)\b",
 
             # Pola lama: r"(info|detail).*(youtu|video)"
-            "ytinfo": r"(?i)(?=.*(info|det[ai]l|keterangan|jelaskan|apa itu))(?=.*(youtu|video|klip|rekaman))",
+            "ytinfo": r"(?im)^(?=.*(info|det[ai]l|keterangan|jelaskan|apa itu))(?=.*(youtu|video|klip|rekaman))",
 
             # Pola lama: r"(search|find|cari).*video"
-            "ytsearch": r"(?i)(?=.*(search|find|car[i|ikan]|temukan|putar|play|mainkan))(?=.*(video|youtube|lagu|musik|film|klip))",
+            "ytsearch": r"(?im)^(?=.*(search|find|car[i|ikan]|temukan|putar|play|mainkan))(?=.*(video|youtube|lagu|musik|film|klip))",
 
             # Pola lama: r"(statistik|channel|subscriber)"
-            "channelstats": r"(?i)(?=.*(info|statistik|stats|data|jumlah|berapa))(?=.*(channel|kanal|subscriber))",
+            "channelstats": r"(?im)^(?=.*(info|statistik|stats|data|jumlah|berapa))(?=.*(channel|kanal|subscriber))",
 
             # Pola lama: r"(timestamp|penanda waktu)"
             "timestamps": r"(?i)\b(timestamps?|penanda waktu|lompat ke|menit ke|detik ke|bagian|chapter)\b|\d{1,2}:\d{2}",
 
             # Pola lama: r"(cari|temukan).*komentar"
-            "findcomment": r"(?i)(?=.*(car[i|ikan]|temukan|search|find|lihat|tampilkan))(?=.*(komentar|comment|komen))",
+            "findcomment": r"(?im)^(?=.*(car[i|ikan]|temukan|search|find|lihat|tampilkan))(?=.*(komentar|comment|komen))",
 
             # Pola lama: r"(poll|vote|voting)"
             "poll": r"(?i)\b(poll|vote|voting|polling|jajak pendapat|bikin vote|buat polling)\b",
@@ -41,153 +60,159 @@ class Chatbot(commands.Cog):
         self.negative_mood_pattern = re.compile(
             r"(?i)\b(buruk|sedih|lelah|capek|sakit|pusing|kecewa|stres|down|ga (enak|semangat|mood))\b|(kurang|tidak|gak|ga) (baik|sehat|oke|semangat|fit|enak)"
         )
+        # Kata kunci per intent untuk prefilter (grup = AND, isi grup = OR).
+        # Setiap kata kunci harus merupakan syarat perlu dari pola di atas.
+        self.intent_keywords = {
+            "hello": [["ha", "hi", "he", "pagi", "siang", "sore", "malam", "yo", "sup"]],
+            "ytinfo": [["info", "det", "keterangan", "jelaskan", "apa itu"], ["youtu", "video", "klip", "rekaman"]],
+            "ytsearch": [["search", "find", "car", "temukan", "putar", "play", "mainkan"], ["video", "youtube", "lagu", "musik", "film", "klip"]],
+            "channelstats": [["info", "statistik", "stats", "data", "jumlah", "berapa"], ["channel", "kanal", "subscriber"]],
+            "timestamps": [["timestamp", "penanda waktu", "lompat ke", "menit ke", "detik ke", "bagian", "chapter", ":"]],
+            "findcomment": [["car", "temukan", "search", "find", "lihat", "tampilkan"], ["komentar", "comment", "komen"]],
+            "poll": [["poll", "vote", "voting", "jajak pendapat"]],
+        }
+        self.intent_engine = IntentEngine(self.patterns, self.intent_keywords)
+        self.dialogs.intent_engine = self.intent_engine
+        # Pesan basa-basi (mood, jawaban ya/tidak, angka) tidak perlu dibalas fallback
+        self.smalltalk_pattern = re.compile(
+            "|".join([
+                self.positive_mood_pattern.pattern,
+                self.negative_mood_pattern.pattern.replace("(?i)", ""),
+                r"\b(ya|iya|yes|y|tentu|boleh|mau|lanjut|ok)\b",
+                r"\d+",
+            ])
+        )
+
+    def cog_unload(self):
+        self.conversations.unregister("ytinfo")
+        self.conversations.unregister("channelstats")
+
+    async def _on_channelstats_reply(self, message: discord.Message, state):
+        """User menjawab pertanyaan nama channel."""
+        self.conversations.pop(ConversationStore.key_for(message)) # Hapus state
+        self.bot.dispatch("channelstats_request", message, parse_channel(message.content))
+
+    async def _on_ytinfo_reply(self, message: discord.Message, state):
+        """User menjawab pertanyaan link video (ytinfo)."""
+        parsed = parse_video(message.content)
+        if parsed.video_id:
+            self.conversations.pop(ConversationStore.key_for(message))  # reset state
+            self.bot.dispatch("ytinfo_request", message, parsed)
+        elif parsed.has_link:
+            self.outbox.post(
+                message.channel,
+                "⚠️ Itu bukan link YouTube yang valid.\n"
+                "Contoh: https://youtu.be/dQw4w9WgXcQ"
+            )
+        else:
+            self.outbox.post(
+                message.channel,
+                "⚠️ Aku butuh link YouTube yang valid.\n"
+                "Contoh: https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+            )
+
+    async def _on_ytsearch_count(self, response: discord.Message, count: int, data):
+        """User menjawab jumlah hasil ytsearch."""
+        message, parsed = data
+        parsed.count = count
+        self.bot.dispatch("ytsearch_request", message, parsed)
+
+    async def _on_ytsearch_count_timeout(self, data):
+        message, _ = data
+        self.outbox.post(message.channel, "⏰ Timeout! Silakan coba lagi.")
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         if message.author.bot:
             return
-        
-        # Jika user sedang dalam percakapan dengan FindCommentCog, jangan ganggu.
-        findcomment_cog = self.bot.get_cog("Find Comment")
-        if findcomment_cog and message.author.id in findcomment_cog.user_states:
-             return # Biarkan FindCommentCog yang menangani pesan ini
-        
-        # ytsearch_cog = self.bot.get_cog("YtSearch")
-        # if ytsearch_cog and message.author.id in ytsearch_cog.user_states:
-        #     return # Biarkan YtSearchCog yang menangani pesan ini
-
-        timestamps_cog = self.bot.get_cog("Timestamps")
-        if timestamps_cog and message.author.id in timestamps_cog.user_states:
-            return # Biarkan TimestampsCog yang menangani pesan ini
 
-
-        content = message.content.lower()
-        original_content = message.content
-        
         # --- PENANGANAN STATE (JAWABAN ATAS PERTANYAAN BOT) ---
-        
-        # Cek jika user sedang dalam proses memberikan info channel stats
-        if message.author.id in self.pending_channelstats:
-            clean_content = original_content.strip()
-            self.bot.dispatch("channelstats_request", message, clean_content)
-            del self.pending_channelstats[message.author.id] # Hapus state
+        # Satu lookup: jika user sedang dalam percakapan, pesan hanya dikirim ke handler pemiliknya
+        if await self.conversations.route(message):
             return
 
-        # Cek jika user sedang dalam proses memberikan info video (ytinfo)
-        if message.author.id in self.pending_ytinfo:
-            if re.search(r"(https?://)?(www\.)?(youtube\.com|youtu\.be)/", original_content):
-                m = YOUTUBE_VIDEO_REGEX.search(original_content)
-                if m:
-                    vid = m.group(1)
-                    await message.channel.send("🎬 Oke, tunggu sebentar ya... lagi ambil detail videonya!")
-                    self.bot.dispatch("ytinfo_request", message, vid)
-                    del self.pending_ytinfo[message.author.id]  # reset state
-                    return
-                else:
-                    await message.channel.send(
-                        "⚠️ Itu bukan link YouTube yang valid.\n"
-                        "Contoh: https://youtu.be/dQw4w9WgXcQ"
-                    )
-                    return
-            else:
-                await message.channel.send(
-                    "⚠️ Aku butuh link YouTube yang valid.\n"
-                    "Contoh: https://www.youtube.com/watch?v=dQw4w9WgXcQ"
-                )
-                return
+        content = message.content.lower()
+        original_content = message.content
 
         # --- DETEKSI INTENT DARI PESAN BARU ---
 
+        match = self.intent_engine.match(content)
+        intent = match.intent if match else None
+        # Slot (video ID, channel, keyword, jumlah, opsi polling) diekstrak sekali di sini
+        parsed = extract_slots(match, original_content) if match else None
+
         # Greeting
-        if re.search(self.patterns["hello"], content):
+        if intent == "hello":
             self.bot.dispatch("hello_request", message)
         
         # Video info
-        elif re.search(self.patterns["ytinfo"], content):
+        elif intent == "ytinfo":
             logger.info("🔍 YtInfo request detected: %s", content)
-            if not re.search(r"(https?://)?(www\.)?(youtube\.com|youtu\.be)/", original_content):
-                await message.channel.send("Mau info video apa? Kasih aku link YouTube-nya ya!")
-                self.pending_ytinfo[message.author.id] = True
-                return
+            if not parsed.has_link:
+                self.outbox.post(message.channel, "Mau info video apa? Kasih aku link YouTube-nya ya!")
+                self.conversations.set(ConversationStore.key_for(message), "ytinfo", "waiting_for_link")
+            elif parsed.video_id:
+                # YtInfo menampilkan indikator mengetik selama mengambil data, lalu mengirim
+                # hasil beserta pertanyaan lanjutan sebagai satu pesan
+                self.bot.dispatch("ytinfo_request", message, parsed, follow_up=True)
             else:
-                m = YOUTUBE_VIDEO_REGEX.search(original_content)
-                if m:
-                    vid = m.group(1)
-                    await message.channel.send("🎬 Oke, tunggu sebentar ya... lagi ambil detail videonya!")
-                    self.bot.dispatch("ytinfo_request", message, vid)
-                    await asyncio.sleep(0.1)
-                    await message.channel.send("Apakah ada hal lain yang bisa saya bantu?")
-                    return
-                else:
-                    await message.channel.send(
-                        "⚠️ Itu bukan link YouTube yang valid.\n"
-                        "Contoh: https://youtu.be/dQw4w9WgXcQ"
-                    )
-                    return
+                self.outbox.post(
+                    message.channel,
+                    "⚠️ Itu bukan link YouTube yang valid.\n"
+                    "Contoh: https://youtu.be/dQw4w9WgXcQ"
+                )
                 
         # Video search
-        elif re.search(self.patterns["ytsearch"], content):
-            query = re.sub(self.patterns["ytsearch"], "", content).strip()
-            logger.info("🔍 YtSearch query: %s", query)
-            if query:
-                # await message.channel.send(f"🔎 Lagi cari video tentang **{query}** ... (dummy result)")
-                await message.channel.send("Mau berapa hasil yang ditampilkan? (1-10)")
-                def check(m):
-                    return m.author == message.author and m.channel == message.channel and m.content.isdigit() and 1 <= int(m.content) <= 10
-
-                try:
-                    response = await self.bot.wait_for("message", check=check, timeout=30)
-                    count = int(response.content)
-                    self.bot.dispatch("ytsearch_request", message, query, count)
-                except asyncio.TimeoutError:
-                    await message.channel.send("⏰ Timeout! Silakan coba lagi.")
+        elif intent == "ytsearch":
+            logger.info("🔍 YtSearch query: %s", parsed.query)
+            if not parsed.query:
+                self.outbox.post(message.channel, "Mau cari video tentang apa?")
+            elif parsed.count:
+                # Jumlah hasil sudah disebut di pesan, tidak perlu bertanya lagi
+                self.bot.dispatch("ytsearch_request", message, parsed)
             else:
-                await message.channel.send("Mau cari video tentang apa?")
+                # await message.channel.send(f"🔎 Lagi cari video tentang **{query}** ... (dummy result)")
+                self.outbox.post(message.channel, "Mau berapa hasil yang ditampilkan? (1-10)")
+                self.dialogs.ask(message, self.ytsearch_count_step, (message, parsed))
         
         # Channel stats
-        elif re.search(self.patterns["channelstats"], content):
-            # Regex untuk menghapus kata kunci dan hanya menyisakan nama channel
-            cleaning_pattern = re.compile(r"(?i)\b(statistik|stats|info|jumlah subscriber|cek|channel|kanal|untuk|dari|dong|ya)\b")
-            clean_content = cleaning_pattern.sub("", original_content).strip()
-
+        elif intent == "channelstats":
             # Jika nama channel tidak ada di pesan awal, tanyakan pada user
-            if not clean_content or len(clean_content) < 2:
-                await message.channel.send("📊 Channel apa yang mau dicek? Kasih aku nama, URL, atau handle-nya ya (@).")
-                self.pending_channelstats[message.author.id] = True
+            if len(parsed.query) < 2:
+                self.outbox.post(message.channel, "📊 Channel apa yang mau dicek? Kasih aku nama, URL, atau handle-nya ya (@).")
+                self.conversations.set(ConversationStore.key_for(message), "channelstats", "waiting_for_channel")
                 return
             
             # Jika ada, langsung kirim ke cog
-            self.bot.dispatch("channelstats_request", message, clean_content)
+            self.bot.dispatch("channelstats_request", message, parsed)
         
         # Timestamp
-        elif re.search(self.patterns["timestamps"], content):
-            # Membersihkan kata pemicu dari content untuk mendapatkan argumen awal
-            # Pattern ini lebih simpel dari pattern deteksi agar tidak salah menghapus link
-            cleaning_pattern = re.compile(r"(?i)\b(timestamps?|penanda waktu|cari|kumpulin|dari|di|video|dong|ya)\b")
-            clean_content = cleaning_pattern.sub("", original_content).strip()
-            # Kirim ke listener di TimestampsCog
-            self.bot.dispatch("timestamps_request", message, clean_content)
+        elif intent == "timestamps":
+            self.bot.dispatch("timestamps_request", message, parsed)
         
         # Comment finder
-        elif re.search(self.patterns["findcomment"], content):
-            # Hapus kata pemicu untuk mendapatkan argumen awal (bisa kosong)
-            clean_content = re.sub(self.patterns["findcomment"], "", original_content, flags=re.IGNORECASE).strip()
-            # Kirim ke listener di FindCommentCog
-            self.bot.dispatch("findcomment_request", message, clean_content)
+        elif intent == "findcomment":
+            self.bot.dispatch("findcomment_request", message, parsed)
         
         # Poll creation
-        elif re.search(self.patterns["poll"], content):
-            # Membersihkan kata pemicu dari content
-            clean_content = re.sub(self.patterns["poll"], "", original_content, flags=re.IGNORECASE).strip()
-            self.bot.dispatch("poll_request", message, clean_content)
+        elif intent == "poll":
+            self.bot.dispatch("poll_request", message, parsed)
             
         # If bot is mentioned
         elif self.bot.user.mentioned_in(message):
-            await message.channel.send("👀 Kamu manggil aku? Aku bisa bantu cek info video, cari video, cari komentar, atau statistik channel!")
+            self.outbox.post(message.channel, "👀 Kamu manggil aku? Aku bisa bantu cek info video, cari video, cari komentar, atau statistik channel!")
         
         # Fallback jika tidak ada pattern yang cocok
-        elif not any(re.search(pattern, content) for pattern in self.patterns.values()) and not self.positive_mood_pattern.search(content) and not self.negative_mood_pattern.search(content) and not re.search(r"(?i)\b(ya|iya|yes|y|tentu|boleh|mau|lanjut|ok)\b", content) and not re.search(r"\d+", content):
-            await message.channel.send("🤖 Maaf, aku belum paham. Coba tanya soal info video, cari video, cari komentar, atau statistik channel.")
+        elif not self.smalltalk_pattern.search(content):
+            self.outbox.post(message.channel, "🤖 Maaf, aku belum paham. Coba tanya soal info video, cari video, cari komentar, atau statistik channel.")
+
+def parse_result_count(message: discord.Message):
+    """Jawaban jumlah hasil yang valid: angka 1-10."""
+    text = message.content.strip()
+    if text.isdigit() and 1 <= int(text) <= 10:
+        return int(text)
+    return None
+
 
 async def setup(bot):
     await bot.add_cog(Chatbot(bot))
@@ -1,13 +1,17 @@
 import re
-import aiohttp
 import discord
 from discord.ext import commands
 import asyncio
 from asyncio.log import logger
 
-from utils.youtube_api import YOUTUBE_VIDEO_REGEX, fetch_comment_threads
+from utils.youtube_api import YOUTUBE_VIDEO_REGEX, resolve_channel
+from utils.channel_search import search_channel_comments
+from utils.comment_index import get_comment_index
+from utils.progress import ProgressMessage
+from utils.dialog import DialogStep, get_dialog_manager
+from utils.slots import ParsedIntent
+from utils.state import ConversationStore, get_conversation_store
 
-MAX_COMMENT_PAGES = 5
 MAX_MATCHES_RETURN = 10
 
 class FindCommentCog(commands.Cog, name="Find Comment"):
@@ -15,118 +19,179 @@ class FindCommentCog(commands.Cog, name="Find Comment"):
 
     def __init__(self, bot):
         self.bot = bot
-        # State management: {user_id: {"state": "waiting_for_video" | "waiting_for_keyword", "video_id": str}}
-        self.user_states = {}
+        # State percakapan ada di store terpusat: step "waiting_for_video" (data = deep) |
+        # "waiting_for_keyword" (data = (video_id, deep))
+        self.conversations = get_conversation_store(bot)
+        self.conversations.register("findcomment", self._on_reply)
+        self.dialogs = get_dialog_manager(bot)
+        self.channel_keyword_step = DialogStep(
+            "findcomment_channel_keyword", self._on_channel_keyword,
+            parse=lambda message: (self.dialogs.answer_text(message) or "").strip() or None,
+            timeout=60.0, fallthrough=True
+        )
+
+    def cog_unload(self):
+        self.conversations.unregister("findcomment")
 
     @commands.Cog.listener()
-    async def on_findcomment_request(self, message: discord.Message, content: str):
+    async def on_findcomment_request(self, message: discord.Message, parsed: ParsedIntent):
         """Listener untuk memulai alur pencarian komentar."""
-        logger.info(f"💬 FindComment request from {message.author}: {content}")
-        user_id = message.author.id
+        logger.info(f"💬 FindComment request from {message.author}: {parsed}")
+        key = ConversationStore.key_for(message)
 
-        # Coba ekstrak link video dan keyword dari pesan awal
-        video_id = None
-        keyword = None
+        # Link video dan keyword sudah diekstrak oleh chatbot
+        video_id = parsed.video_id
+        keyword = parsed.keyword
 
-        # Cek apakah ada link di content
-        yt_match = YOUTUBE_VIDEO_REGEX.search(content)
-        if yt_match:
-            video_id = yt_match.group(1)
-            # Sisa content dianggap keyword
-            keyword = content.replace(yt_match.group(0), "").strip().strip('"')
-
-        if video_id and keyword:
+        if not video_id and (parsed.channel_id or parsed.channel_username or parsed.query):
+            # Tanpa link video tapi ada channel: cari di video-video upload channel tersebut
+            if keyword:
+                await self._perform_channel_search(message, parsed, keyword)
+            else:
+                await message.channel.send("Oke, channelnya sudah kucatat. Kata kunci apa yang mau kamu cari di komentarnya?")
+                self.dialogs.ask(message, self.channel_keyword_step, parsed)
+        elif video_id and keyword:
             # Jika video dan keyword sudah ada, langsung cari
-            await self._perform_search(message, video_id, keyword)
+            await self._perform_search(message, video_id, keyword, parsed.deep)
         elif video_id:
             # Jika hanya video yang ada, tanyakan keyword
             await message.channel.send(f"✅ Oke, aku sudah simpan link videonya. Sekarang, kata kunci apa yang mau kamu cari di kolom komentar?")
-            self.user_states[user_id] = {"state": "waiting_for_keyword", "video_id": video_id}
+            self.conversations.set(key, "findcomment", "waiting_for_keyword", (video_id, parsed.deep))
         else:
             # Jika tidak ada info sama sekali, mulai dari awal
             await message.channel.send("Tentu! Kasih aku link video YouTube yang mau dicari komentarnya.")
-            self.user_states[user_id] = {"state": "waiting_for_video"}
+            self.conversations.set(key, "findcomment", "waiting_for_video", parsed.deep)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """Listener untuk menangani respons user dalam alur pencarian."""
-        if message.author.bot:
-            return
-
-        user_id = message.author.id
-        state_info = self.user_states.get(user_id)
-
-        if not state_info:
-            return
+    async def _on_reply(self, message: discord.Message, state):
+        """Handler (dipanggil router chatbot) untuk respons user dalam alur pencarian."""
+        key = ConversationStore.key_for(message)
 
-        state = state_info.get("state")
-        
-        if state == "waiting_for_video":
+        if state.step == "waiting_for_video":
             yt_match = YOUTUBE_VIDEO_REGEX.search(message.content)
             if yt_match:
                 video_id = yt_match.group(1)
                 await message.channel.send("✅ Oke, link video diterima. Sekarang, kata kunci apa yang mau kamu cari?")
-                self.user_states[user_id] = {"state": "waiting_for_keyword", "video_id": video_id}
+                self.conversations.set(key, "findcomment", "waiting_for_keyword", (video_id, state.data))
             else:
                 await message.channel.send("Hmm, sepertinya itu bukan link YouTube yang valid. Coba kirim lagi ya.")
         
-        elif state == "waiting_for_keyword":
-            video_id = state_info.get("video_id")
-            keyword = message.content.strip().strip('"')
+        elif state.step == "waiting_for_keyword":
+            video_id, deep = state.data
+            keyword = message.content.strip()
             if video_id and keyword:
-                await self._perform_search(message, video_id, keyword)
-                del self.user_states[user_id] # Hapus state setelah selesai
+                self.conversations.pop(key) # Hapus state sebelum mulai mencari
+                await self._perform_search(message, video_id, keyword, deep)
+
+    async def _on_channel_keyword(self, message: discord.Message, keyword: str, parsed: ParsedIntent):
+        """Jawaban user berupa kata kunci untuk pencarian komentar di channel."""
+        await self._perform_channel_search(message, parsed, keyword)
+
+    def _results_embed(self, keyword: str, results: list, scanned_count: int, deep: bool,
+                       fuzzy: bool = False, done: bool = True) -> discord.Embed:
+        """Embed hasil pencarian; done=False untuk hasil sementara selama halaman masih dipindai."""
+        if not done:
+            description = f"⏳ Masih memindai... {len(results)} hasil teratas sejauh ini:"
+        elif fuzzy:
+            description = f"Tidak ada yang persis sama, ini {len(results)} komentar dengan kata yang mirip:"
+        else:
+            description = f"Menampilkan hingga {len(results)} hasil teratas:"
+        embed = discord.Embed(
+            title=f"💬 Komentar Mengandung: '{keyword}'",
+            description=description,
+            color=discord.Color.gold()
+        )
+        for i, doc in enumerate(results, 1):
+            embed.add_field(
+                name=f"#{i} oleh {doc['author']} ({doc['likes']} suka)",
+                value=doc["text"] if len(doc["text"]) <= 300 else doc["text"][:297] + "...",
+                inline=False
+            )
+        embed.set_footer(text=f"Memindai {scanned_count} komentar dan balasan." if deep
+                         else f"Memindai {scanned_count} komentar teratas.")
+        return embed
 
-    async def _perform_search(self, message: discord.Message, video_id: str, keyword: str):
+    async def _perform_search(self, message: discord.Message, video_id: str, keyword: str, deep: bool = False):
         """Fungsi inti untuk melakukan pencarian dan menampilkan hasil."""
-        await message.channel.send(f"🔎 Oke, aku cari komentar dengan kata kunci **'{keyword}'** di video `{video_id}`. Tunggu sebentar ya...")
+        scope = " (deep scan, termasuk balasan)" if deep else ""
+        # Satu pesan yang diedit di tempat: hasil sementara muncul sejak halaman pertama
+        progress = ProgressMessage(message.channel)
+        await progress.start(content=f"🔎 Oke, aku cari komentar dengan kata kunci **'{keyword}'** di video `{video_id}`{scope}...")
+
+        def on_page(index):
+            progress.update(lambda: {"embed": self._results_embed(
+                keyword, index.search(keyword, MAX_MATCHES_RETURN), len(index), deep, done=False)})
 
-        matches = []
-        scanned_count = 0
         try:
-            async with aiohttp.ClientSession() as session:
-                items = await fetch_comment_threads(session, video_id, max_pages=MAX_COMMENT_PAGES)
-                if not items:
-                    await message.channel.send("Tidak ada komentar yang bisa diambil. Mungkin video ini dinonaktifkan komentarnya.")
-                    return
-
-                scanned_count = len(items)
-                lower_kw = keyword.lower()
-                for it in items:
-                    top = it.get("snippet", {}).get("topLevelComment", {}).get("snippet", {})
-                    if not top: continue
-                    
-                    text = top.get("textDisplay", "")
-                    if lower_kw in text.lower():
-                        matches.append({
-                            "author": top.get("authorDisplayName", "Unknown"),
-                            "likes": top.get("likeCount", 0),
-                            "text": text if len(text) <= 300 else text[:297] + "..."
-                        })
-                        if len(matches) >= MAX_MATCHES_RETURN:
-                            break
-            
-            if not matches:
-                await message.channel.send(f"Maaf, tidak kutemukan komentar yang mengandung **'{keyword}'** (dari {scanned_count} komentar terakhir).")
+            # Index dibangun sekali per video; query berikutnya cukup lookup index
+            index = await get_comment_index(video_id, deep=deep, on_page=on_page)
+            if not len(index):
+                await progress.finish(content="Tidak ada komentar yang bisa diambil. Mungkin video ini dinonaktifkan komentarnya.", embed=None)
                 return
 
-            embed = discord.Embed(
-                title=f"💬 Komentar Mengandung: '{keyword}'",
-                description=f"Menampilkan hingga {len(matches)} hasil teratas:",
-                color=discord.Color.gold()
-            )
-            for i, match in enumerate(matches, 1):
-                embed.add_field(
-                    name=f"#{i} oleh {match['author']} ({match['likes']} suka)",
-                    value=match['text'],
-                    inline=False
-                )
-            embed.set_footer(text=f"Memindai {scanned_count} komentar teratas.")
-            await message.channel.send(embed=embed)
+            scanned_count = len(index)
+            results = index.search(keyword, MAX_MATCHES_RETURN)
+            fuzzy = not results
+            if fuzzy:
+                # Tidak ada yang persis sama: coba kata yang mirip (typo, "kocakk", "wkwkw")
+                results = index.search(keyword, MAX_MATCHES_RETURN, fuzzy=True)
+
+            if not results:
+                await progress.finish(content=f"Maaf, tidak kutemukan komentar yang mengandung **'{keyword}'** (dari {scanned_count} komentar terakhir).", embed=None)
+                return
+
+            await progress.finish(content=None, embed=self._results_embed(keyword, results, scanned_count, index.deep, fuzzy))
 
         except Exception as e:
             logger.exception("Error in findcomment: %s", e)
-            await message.channel.send("Terjadi kesalahan saat mencari komentar. Coba periksa kembali link videonya.")
+            await progress.finish(content="Terjadi kesalahan saat mencari komentar. Coba periksa kembali link videonya.", embed=None)
+
+    async def _perform_channel_search(self, message: discord.Message, parsed: ParsedIntent, keyword: str):
+        """Cari komentar di video-video upload terbaru sebuah channel, hasil digabung jadi satu peringkat."""
+        channel = await resolve_channel(parsed.channel_id, parsed.channel_username,
+                                        parsed.channel_handle or parsed.query)
+        if not channel:
+            await message.channel.send(f"😥 Maaf, aku tidak bisa menemukan channel `{parsed.query}`.")
+            return
+        channel_title = channel.get("snippet", {}).get("title", parsed.query)
+        progress = ProgressMessage(message.channel)
+        await progress.start(content=f"🔎 Oke, aku cari komentar **'{keyword}'** di video-video terbaru channel **{channel_title}**...")
+
+        def on_progress(status):
+            progress.update(lambda: {"content": (
+                f"🔎 Mencari **'{keyword}'** di channel **{channel_title}**: "
+                f"{status['videos_scanned']} video diperiksa, {status['hits']} hasil sejauh ini...")})
+
+        try:
+            result = await search_channel_comments(channel, keyword, k=MAX_MATCHES_RETURN, progress=on_progress)
+        except Exception as e:
+            logger.exception("Error in channel findcomment: %s", e)
+            await progress.finish(content="Terjadi kesalahan saat mencari komentar di channel itu.")
+            return
+
+        if not result["results"]:
+            await progress.finish(content=
+                f"Maaf, tidak kutemukan komentar yang mengandung **'{keyword}'** di {result['videos_scanned']} video terbaru **{channel_title}**.")
+            return
+
+        embed = discord.Embed(
+            title=f"💬 Komentar Mengandung: '{keyword}' di {channel_title}",
+            description=f"Menampilkan {len(result['results'])} hasil teratas dari semua video:",
+            color=discord.Color.gold()
+        )
+        for i, (_, video_id, video_title, doc) in enumerate(result["results"], 1):
+            text = doc["text"] if len(doc["text"]) <= 250 else doc["text"][:247] + "..."
+            embed.add_field(
+                name=f"#{i} oleh {doc['author']} ({doc['likes']} suka)",
+                value=f"{text}\n[{video_title[:60] or video_id}](https://youtu.be/{video_id})",
+                inline=False
+            )
+        note = ""
+        if result["stopped_early"]:
+            note = " Berhenti lebih awal karena hasil teratas sudah cukup kuat."
+        elif result["budget_exhausted"]:
+            note = " Berhenti karena batas kuota pencarian channel tercapai."
+        embed.set_footer(text=f"Memindai {result['videos_scanned']} video.{note}")
+        await progress.finish(content=None, embed=embed)
 
 async def setup(bot):
     await bot.add_cog(FindCommentCog(bot))
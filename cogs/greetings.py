@@ -6,33 +6,35 @@ import re
 import random
 from discord.ext import commands
 from asyncio.log import logger
-import aiohttp
 from utils.youtube_api import fetch_search_videos
+from utils.quota import OPTIONAL
+from utils.dialog import DialogStep, get_dialog_manager
+from utils.outbox import get_outbox
 
 # Anda perlu membuat fungsi ini atau mengimpornya dari file utilitas Anda.
 # Fungsi ini akan berinteraksi dengan YouTube API untuk mencari video.
 # Untuk saat ini, kita akan buat versi tiruannya (mock-up).
-async def search_youtube_video(query: str) -> str:
+async def search_youtube_video(query: str):
     """
     Fungsi placeholder untuk mencari video di YouTube.
     Gantilah ini dengan implementasi YouTube API Anda.
     """
     logger.info(f"Mencari video di YouTube dengan query: '{query}'")
-    async with aiohttp.ClientSession() as session:
-            items = await fetch_search_videos(session, query, max_results=1)
-            if items is None or len(items) == 0:
-                return "Tidak ada hasil."
-
-            embed = discord.Embed(title=f"Search results for: {query}", description=f"Top {len(items)} results")
-            for it in items:
-                vid_id = it.get("id", {}).get("videoId")
-                snip = it.get("snippet", {})
-                title = snip.get("title")
-                channel = snip.get("channelTitle")
-                url = f"https://youtu.be/{vid_id}" if vid_id else None
-                tv = f"[{title}]({url})\nChannel: {channel}" if url else f"{title}\nChannel: {channel}"
-                embed.add_field(name="\u200b", value=tv, inline=False)
-            embed.set_footer(text="Note: YouTube Data API search endpoint is quota-expensive.")
+    # Rekomendasi hanya bonus: prioritas OPTIONAL, jadi yang pertama dikorbankan saat kuota menipis
+    items = await fetch_search_videos(query, max_results=1, priority=OPTIONAL)
+    if items is None or len(items) == 0:
+        return None
+
+    embed = discord.Embed(title=f"Search results for: {query}", description=f"Top {len(items)} results")
+    for it in items:
+        vid_id = it.get("id", {}).get("videoId")
+        snip = it.get("snippet", {})
+        title = snip.get("title")
+        channel = snip.get("channelTitle")
+        url = f"https://youtu.be/{vid_id}" if vid_id else None
+        tv = f"[{title}]({url})\nChannel: {channel}" if url else f"{title}\nChannel: {channel}"
+        embed.add_field(name="\u200b", value=tv, inline=False)
+    embed.set_footer(text="Note: YouTube Data API search endpoint is quota-expensive.")
     return embed
 
 
@@ -46,6 +48,10 @@ class Greetings(commands.Cog):
         self.negative_mood_pattern = re.compile(
             r"(?i)\b(buruk|sedih|lelah|capek|sakit|pusing|kecewa|stres|down|ga (enak|semangat|mood))\b|(kurang|tidak|gak|ga) (baik|sehat|oke|semangat|fit|enak)"
         )
+        self.dialogs = get_dialog_manager(bot)
+        self.outbox = get_outbox(bot)
+        self.mood_step = DialogStep("hello_mood", self._on_mood_reply, parse=self.dialogs.answer_text,
+                                    on_timeout=self._on_mood_timeout, timeout=30.0, fallthrough=True)
 
     @commands.Cog.listener()
     async def on_hello_request(self, message: discord.Message):
@@ -63,53 +69,52 @@ class Greetings(commands.Cog):
             greeting = "Selamat Malam"
 
         # Kirim sapaan awal dan langsung tanyakan kabar
-        await message.channel.send(
+        self.outbox.post(
+            message.channel,
             f"{greeting}, {message.author.mention}! Oh iya, bagaimana kabarmu hari ini?"
         )
 
-        # Cek bahwa respons berikutnya datang dari user yang sama dan di channel yang sama
-        def check(m):
-            return m.author == message.author and m.channel == message.channel
-
-        try:
-            # Tunggu respons dari user selama 30 detik
-            response = await self.bot.wait_for("message", check=check, timeout=30.0)
-            user_mood_text = response.content
-
-            # Cek mood user menggunakan regex
-            if self.positive_mood_pattern.search(user_mood_text):
-                logger.info(f"User {message.author} merasa baik.")
-                await message.channel.send("Syukurlah kalau begitu! Aku ikut senang mendengarnya. 😄")
-                
-                # Rekomendasikan video penyemangat/menarik
-                queries = ["video motivasi", "lagu semangat playlist", "stand up comedy indonesia", "daily dose of internet"]
-                chosen_query = random.choice(queries)
+        # Tunggu respons dari user yang sama di channel yang sama selama 30 detik
+        self.dialogs.ask(message, self.mood_step, message)
+
+    async def _on_mood_reply(self, response: discord.Message, user_mood_text: str, message: discord.Message):
+        """Jawaban user atas pertanyaan kabar."""
+        # Cek mood user menggunakan regex
+        if self.positive_mood_pattern.search(user_mood_text):
+            logger.info(f"User {message.author} merasa baik.")
+            self.outbox.post(message.channel, "Syukurlah kalau begitu! Aku ikut senang mendengarnya. 😄")
+            
+            # Rekomendasikan video penyemangat/menarik
+            queries = ["video motivasi", "lagu semangat playlist", "stand up comedy indonesia", "daily dose of internet"]
+            chosen_query = random.choice(queries)
+            async with self.outbox.typing(message.channel):
                 video_url = await search_youtube_video(chosen_query)
 
-                if video_url:
-                    await message.channel.send(f"Biar harimu makin seru, coba tonton video ini deh:\n", embed=video_url)
+            if video_url:
+                self.outbox.post(message.channel, f"Biar harimu makin seru, coba tonton video ini deh:\n", embed=video_url)
 
-            elif self.negative_mood_pattern.search(user_mood_text):
-                logger.info(f"User {message.author} merasa kurang baik.")
-                await message.channel.send("Yahh, semoga lekas membaik ya. Tetap semangat! 🤗")
-                
-                # Rekomendasikan video penghibur/menenangkan
-                queries = ["video kucing lucu", "musik santai instrumental", "relaxing nature sounds", "kompilasi video lucu"]
-                chosen_query = random.choice(queries)
+        elif self.negative_mood_pattern.search(user_mood_text):
+            logger.info(f"User {message.author} merasa kurang baik.")
+            self.outbox.post(message.channel, "Yahh, semoga lekas membaik ya. Tetap semangat! 🤗")
+            
+            # Rekomendasikan video penghibur/menenangkan
+            queries = ["video kucing lucu", "musik santai instrumental", "relaxing nature sounds", "kompilasi video lucu"]
+            chosen_query = random.choice(queries)
+            async with self.outbox.typing(message.channel):
                 video_url = await search_youtube_video(chosen_query)
 
-                if video_url:
-                    await message.channel.send(f"Mungkin video ini bisa sedikit menghiburmu:\n", embed=video_url)
+            if video_url:
+                self.outbox.post(message.channel, f"Mungkin video ini bisa sedikit menghiburmu:\n", embed=video_url)
+        
+        else:
+            logger.info(f"Maaf ya, Aku belum dapat mendeteksi mood yang kamu inputkan {message.author}.")
             
-            else:
-                logger.info(f"Maaf ya, Aku belum dapat mendeteksi mood yang kamu inputkan {message.author}.")
-                
-            await message.channel.send("Baiklah, kalau butuh bantuan cari video di YouTube, kasih tau aku ya!")
-
-        except TimeoutError:
-            # Jika user tidak merespons dalam 30 detik
-            logger.info(f"User {message.author} tidak merespons pertanyaan kabar.")
-            await message.channel.send("Baiklah, kalau butuh sesuatu nanti panggil aku lagi ya! 👍")
+        self.outbox.post(message.channel, "Baiklah, kalau butuh bantuan cari video di YouTube, kasih tau aku ya!")
+
+    async def _on_mood_timeout(self, message: discord.Message):
+        # Jika user tidak merespons dalam 30 detik
+        logger.info(f"User {message.author} tidak merespons pertanyaan kabar.")
+        self.outbox.post(message.channel, "Baiklah, kalau butuh sesuatu nanti panggil aku lagi ya! 👍")
 
 
 async def setup(bot):
@@ -1,31 +1,48 @@
 import discord
-from discord.ext import commands, tasks
-import re
+from discord.ext import commands
 import datetime
+import time
 import asyncio
 from asyncio.log import logger
 
-# Helper function untuk mengubah string durasi (e.g., "5m", "1h") menjadi detik
-def parse_duration(duration_str: str) -> int:
-    if not duration_str:
-        return 0
-    
-    match = re.match(r"(\d+)([smhd])", duration_str.lower())
-    if not match:
-        return 0
-    
-    value, unit = match.groups()
-    value = int(value)
-    
-    if unit == 's':
-        return value
-    elif unit == 'm':
-        return value * 60
-    elif unit == 'h':
-        return value * 3600
-    elif unit == 'd':
-        return value * 86400
-    return 0
+from utils.poll_store import get_poll_store
+from utils.poll_tally import PollTally
+from utils.progress import ProgressMessage
+from utils.scheduler import DeadlineScheduler
+from utils.slots import ParsedIntent
+
+LIVE_TALLY_INTERVAL = 5.0  # detik minimal antar edit hitungan suara di embed polling
+POLL_BUTTON_PREFIX = "poll:"  # custom_id tombol = prefix + indeks pilihan
+POLL_EMOJIS = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"]
+
+
+class PollButton(discord.ui.Button):
+    def __init__(self, cog, slot: int, label: str = None):
+        super().__init__(
+            label=(label or f"Pilihan {slot + 1}")[:80],
+            emoji=POLL_EMOJIS[slot],
+            style=discord.ButtonStyle.secondary,
+            custom_id=f"{POLL_BUTTON_PREFIX}{slot}",
+        )
+        self.cog = cog
+        self.slot = slot
+
+    async def callback(self, interaction: discord.Interaction):
+        await self.cog.on_poll_vote(interaction, self.slot)
+
+
+class PollView(discord.ui.View):
+    """
+    Tombol pilihan polling. View tanpa `options` (semua slot) didaftarkan sekali lewat
+    bot.add_view sebagai view persisten, jadi tombol di pesan lama tetap berfungsi setelah restart.
+    """
+
+    def __init__(self, cog, options: list = None):
+        super().__init__(timeout=None)
+        labels = options if options is not None else [None] * len(POLL_EMOJIS)
+        for slot, label in enumerate(labels):
+            self.add_item(PollButton(cog, slot, label))
+
 
 class PollCog(commands.Cog, name="Polling"):
     """Cog untuk membuat dan mengelola polling interaktif."""
@@ -33,48 +50,79 @@ class PollCog(commands.Cog, name="Polling"):
     def __init__(self, bot):
         self.bot = bot
         # Emoji yang akan digunakan untuk pilihan polling
-        self.poll_emojis = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"]
-        # List untuk menyimpan polling yang sedang aktif
-        self.active_polls = []
-        # Memulai background task untuk memeriksa polling yang sudah selesai
-        self.check_expired_polls.start()
+        self.poll_emojis = POLL_EMOJIS
+        # Polling aktif yang punya batas waktu: {message_id: info polling}
+        self.active_polls = {}
+        # Timer per deadline (heap + loop.call_at): bangun tepat saat polling berakhir
+        self.expiry = DeadlineScheduler(self._on_poll_expired)
+        # Polling juga disimpan di SQLite agar tidak hilang saat bot restart / deploy
+        self.store = get_poll_store()
+
+    async def cog_load(self):
+        """Muat ulang polling tersimpan: yang belum berakhir dijadwalkan lagi, sisanya diumumkan."""
+        self.bot.add_view(PollView(self))
+        now = time.time()
+        expired = []
+        for poll in self.store.load_all():
+            if poll["ends_at"] <= now:
+                expired.append(poll)
+            else:
+                self._schedule(poll)
+        logger.info(f"📊 Restored {len(self.active_polls)} active polls, {len(expired)} expired during downtime")
+        if expired:
+            asyncio.get_running_loop().create_task(self._resolve_expired(expired))
 
     def cog_unload(self):
-        """Menghentikan background task saat cog di-unload."""
-        self.check_expired_polls.cancel()
+        """Menghentikan timer polling saat cog di-unload (data polling tetap tersimpan)."""
+        self.expiry.close()
+        self.store.flush()
+
+    def cancel_poll(self, message_id: int) -> bool:
+        """Batalkan polling berbatas waktu tanpa mengumumkan hasil."""
+        poll = self.active_polls.pop(message_id, None)
+        if poll is not None and poll.get("live") is not None:
+            poll["live"].message = None  # edit hitungan yang masih tertunda dibuang
+        self.store.delete(message_id)
+        return self.expiry.cancel(message_id)
+
+    @staticmethod
+    def _restore_tally(poll: dict) -> PollTally:
+        """Hitungan suara polling; suara tersimpan (dari load_all) dipulihkan sekali."""
+        tally = poll.get("tally")
+        if tally is None:
+            tally = poll["tally"] = PollTally(len(poll["options"]))
+        for user_id, mask, slot in poll.pop("votes", ()):
+            tally.restore(user_id, mask, slot)
+        return tally
+
+    def _schedule(self, poll: dict):
+        self._restore_tally(poll)
+        # ends_at (jam dinding) dikonversi ke jam monotonic event loop
+        remaining = poll["ends_at"] - time.time()
+        self.active_polls[poll["message_id"]] = poll
+        self.expiry.schedule_in(poll["message_id"], max(0.0, remaining))
+
+    async def _resolve_expired(self, polls: list):
+        """Umumkan sekaligus semua polling yang berakhir selama bot mati."""
+        await self.bot.wait_until_ready()
+        await asyncio.gather(*(self._announce_results(poll) for poll in polls))
+        self.store.delete_many(poll["message_id"] for poll in polls)
 
     @commands.Cog.listener()
-    async def on_poll_request(self, message: discord.Message, content: str):
+    async def on_poll_request(self, message: discord.Message, parsed: ParsedIntent):
         """
         Listener untuk event 'poll_request' dari bot utama.
-        Memproses string untuk membuat polling kustom.
+        Judul, pilihan, dan durasi sudah diekstrak oleh chatbot (lihat utils.slots.parse_poll).
         Format content: 
         1. "Judul" "Pilihan 1" "Pilihan 2" ... [Durasi]
         2. Judul\nPilihan 1\nPilihan 2\n...[Durasi]
+
+        Polling berbatas waktu memakai tombol (satu request untuk membuatnya); polling tanpa
+        durasi atau dengan "pakai reaksi" memakai reaksi emoji seperti sebelumnya.
         """
-        logger.info(f"📊 Poll request received from {message.author}: {content}")
-        
-        args = []
-        duration_str = None
-
-        # Cek apakah pengguna menggunakan format tanda kutip
-        if '"' in content:
-            args = re.findall(r'"(.*?)"', content)
-            duration_str_match = re.search(r'\s+(\d+[smhd])$', content.strip())
-            duration_str = duration_str_match.group(1) if duration_str_match else None
-        # Jika tidak, cek apakah pengguna menggunakan format baris baru
-        elif '\n' in content:
-            lines = [line.strip() for line in content.strip().split('\n') if line.strip()]
-            
-            # Cek apakah baris terakhir adalah durasi
-            last_line = lines[-1]
-            duration_match = re.fullmatch(r"(\d+[smhd])", last_line.lower())
-            if duration_match:
-                duration_str = duration_match.group(1)
-                args = lines[:-1] # Semua baris kecuali terakhir adalah argumen
-            else:
-                args = lines # Semua baris adalah argumen
-        else:
+        logger.info(f"📊 Poll request received from {message.author}: {parsed}")
+
+        if parsed.options is None:
             # Jika format tidak dikenali, kirim pesan bantuan
             await message.channel.send(
                 "❌ **Format polling tidak dikenali!**\n\n"
@@ -85,111 +133,174 @@ class PollCog(commands.Cog, name="Polling"):
             )
             return
             
-        if len(args) < 3:
+        if len(parsed.options) < 2:
             await message.channel.send("❌ **Argumen kurang!** Kamu butuh setidaknya 1 judul dan 2 pilihan.")
             return
             
-        if len(args) > 11:
+        if len(parsed.options) > len(self.poll_emojis):
             await message.channel.send(f"❌ **Terlalu banyak pilihan!** Maksimal adalah {len(self.poll_emojis)} pilihan.")
             return
 
-        title = args[0]
-        options = args[1:]
-        duration_seconds = parse_duration(duration_str) if duration_str else 0
+        title = parsed.title
+        options = parsed.options
+        duration_seconds = parsed.duration
 
-        # Membuat deskripsi untuk embed
+        poll = {
+            "channel_id": message.channel.id,
+            "title": title,
+            "options": options,
+            "ends_at": time.time() + duration_seconds if duration_seconds > 0 else None,
+            # Suara lewat tombol hanya bisa dihitung di memori, jadi butuh polling berbatas waktu
+            "mode": "reactions" if parsed.reactions or duration_seconds <= 0 else "buttons",
+        }
+
+        try:
+            if poll["mode"] == "buttons":
+                poll_message = await message.channel.send(embed=self._poll_embed(poll), view=PollView(self, options))
+            else:
+                poll_message = await message.channel.send(embed=self._poll_embed(poll))
+            # Jika ada durasi, polling dicatat sebelum reaksi ditambahkan agar suara pertama ikut terhitung
+            if poll["ends_at"] is not None:
+                poll["message_id"] = poll_message.id
+                self._schedule(poll)
+                self.store.put(poll)
+            if poll["mode"] == "reactions":
+                # Menambahkan reaksi emoji ke pesan polling
+                for i in range(len(options)):
+                    await poll_message.add_reaction(self.poll_emojis[i])
+        except Exception as e:
+            logger.error(f"Gagal membuat poll: {e}")
+            await message.channel.send("⚠️ Gagal membuat polling. Pastikan aku punya izin untuk menambah reaksi.")
+
+    def _poll_embed(self, poll: dict, ended: bool = False) -> discord.Embed:
+        """Embed polling; jika suara sudah dihitung, jumlahnya ditampilkan di tiap pilihan."""
+        tally = poll.get("tally")
         description = []
-        for i, option in enumerate(options):
-            description.append(f"{self.poll_emojis[i]} **{option}**")
-        
+        for i, option in enumerate(poll["options"]):
+            line = f"{self.poll_emojis[i]} **{option}**"
+            if tally is not None and len(tally):
+                line += f" — {tally.counts[i]} suara"
+            description.append(line)
+
         embed = discord.Embed(
-            title=f"📊 {title}",
+            title=f"📊 {poll['title']}",
             description="\n\n".join(description),
-            color=discord.Color.blue()
+            color=discord.Color.light_grey() if ended else discord.Color.blue()
         )
-        
-        end_time = None
-        if duration_seconds > 0:
-            end_time = datetime.datetime.now() + datetime.timedelta(seconds=duration_seconds)
+        if ended:
+            embed.set_footer(text="Polling ini sudah berakhir.")
+        elif poll["ends_at"] is not None:
+            # Jam dinding hanya untuk tampilan; penjadwalan memakai jam monotonic
+            end_time = datetime.datetime.fromtimestamp(poll["ends_at"])
             embed.set_footer(text=f"Polling ini akan berakhir pada {end_time.strftime('%H:%M:%S, %d %B %Y')}")
         else:
             embed.set_footer(text="Polling ini tidak memiliki batas waktu.")
+        return embed
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        self._on_reaction(payload, added=True)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        self._on_reaction(payload, added=False)
+
+    def _on_reaction(self, payload: discord.RawReactionActionEvent, added: bool):
+        """Perbarui hitungan suara langsung dari event gateway (tanpa fetch pesan)."""
+        poll = self.active_polls.get(payload.message_id)
+        if poll is None or poll.get("mode") == "buttons" or payload.user_id == self.bot.user.id:
+            return
+        emoji = str(payload.emoji)
+        if emoji not in self.poll_emojis:
+            return
+        tally = poll["tally"]
+        slot = self.poll_emojis.index(emoji)
+        changed = tally.add(payload.user_id, slot) if added else tally.remove(payload.user_id, slot)
+        self.store.put_vote(payload.message_id, payload.user_id, tally.state(payload.user_id))
+        if changed:
+            self._live_update(poll)
+
+    async def on_poll_vote(self, interaction: discord.Interaction, slot: int):
+        """Tombol pilihan ditekan: hitung di memori, lalu ack interaksi dengan embed terbaru."""
+        poll = self.active_polls.get(interaction.message.id)
+        if poll is None:
+            await interaction.response.send_message("⏰ Polling ini sudah berakhir.", ephemeral=True)
+            return
+        tally = poll["tally"]
+        tally.choose(interaction.user.id, slot)
+        self.store.put_vote(poll["message_id"], interaction.user.id, tally.state(interaction.user.id))
+        # Edit pesan sebagai jawaban interaksi: tidak ada request REST tambahan
+        await interaction.response.edit_message(embed=self._poll_embed(poll))
+
+    def _live_update(self, poll: dict):
+        """Tampilkan hitungan terbaru di embed polling (edit dibatasi LIVE_TALLY_INTERVAL)."""
+        live = poll.get("live")
+        if live is None:
+            channel = self.bot.get_channel(poll["channel_id"])
+            if channel is None:
+                return
+            live = poll["live"] = ProgressMessage(channel, interval=LIVE_TALLY_INTERVAL)
+            live.message = channel.get_partial_message(poll["message_id"])
+        live.update(lambda: {"embed": self._poll_embed(poll)})
+
+    def _on_poll_expired(self, message_id: int):
+        """Dipanggil DeadlineScheduler tepat saat polling berakhir."""
+        poll = self.active_polls.pop(message_id, None)
+        if poll is not None:
+            self.store.delete(message_id)
+            asyncio.get_running_loop().create_task(self._announce_results(poll))
 
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        """Pesan polling dihapus: batalkan timernya."""
+        if payload.message_id in self.active_polls:
+            self.cancel_poll(payload.message_id)
+
+    async def _announce_results(self, poll: dict):
+        """Umumkan hasil polling yang sudah berakhir dari hitungan di memori (tanpa fetch pesan)."""
         try:
-            poll_message = await message.channel.send(embed=embed)
-            # Menambahkan reaksi emoji ke pesan polling
-            for i in range(len(options)):
-                await poll_message.add_reaction(self.poll_emojis[i])
+            # Menghitung hasil
+            tally = self._restore_tally(poll)
+            results = {option: tally.counts[i] for i, option in enumerate(poll["options"])}
+            highest_votes = max(results.values(), default=0)
+
+            winners = [option for option, votes in results.items() if votes == highest_votes and highest_votes > 0]
+            
+            # Membuat embed hasil
+            result_description = "\n".join([f"**{option}**: {votes} suara" for option, votes in sorted(results.items(), key=lambda item: item[1], reverse=True)])
+            
+            result_embed = discord.Embed(
+                title=f"🏁 Hasil Polling: {poll['title']}",
+                description=result_description,
+                color=discord.Color.green()
+            )
+
+            if winners:
+                result_embed.add_field(name="🏆 Pemenang", value=", ".join(winners))
+            else:
+                result_embed.add_field(name="Hasil", value="Tidak ada suara yang masuk.")
+
+            if poll.get("mode") == "buttons":
+                # Polling tombol: hasil menggantikan pesan polling dan tombolnya dilepas
+                channel = self.bot.get_partial_messageable(poll["channel_id"])
+                await channel.get_partial_message(poll["message_id"]).edit(embed=result_embed, view=None)
+                return
+
+            channel = self.bot.get_channel(poll["channel_id"])
+            if not channel:
+                channel = await self.bot.fetch_channel(poll["channel_id"])
+            await channel.send(embed=result_embed)
+
+            # Hitungan live terakhir diganti tanda polling sudah berakhir
+            live = poll.get("live")
+            if live is not None:
+                await live.finish(embed=self._poll_embed(poll, ended=True))
             
-            # Jika ada durasi, simpan info polling untuk dicek nanti
-            if duration_seconds > 0 and end_time is not None:
-                self.active_polls.append({
-                    "message_id": poll_message.id,
-                    "channel_id": message.channel.id,
-                    "end_time": end_time,
-                    "title": title,
-                    "options": options
-                })
+        except discord.NotFound:
+            logger.warning(f"Pesan polling {poll['message_id']} tidak ditemukan. Mungkin sudah dihapus.")
         except Exception as e:
-            logger.error(f"Gagal membuat poll: {e}")
-            await message.channel.send("⚠️ Gagal membuat polling. Pastikan aku punya izin untuk menambah reaksi.")
+            logger.error(f"Error saat memproses polling kedaluwarsa: {e}")
 
-    @tasks.loop(seconds=5)
-    async def check_expired_polls(self):
-        """Background task yang berjalan setiap 5 detik untuk memeriksa polling yang kedaluwarsa."""
-        # Iterasi melalui copy dari list untuk menghindari masalah saat menghapus item
-        for poll in self.active_polls[:]:
-            if datetime.datetime.now() > poll["end_time"]:
-                try:
-                    channel = self.bot.get_channel(poll["channel_id"])
-                    if not channel:
-                        self.active_polls.remove(poll)
-                        continue
-
-                    message = await channel.fetch_message(poll["message_id"])
-                    
-                    # Menghitung hasil
-                    results = {}
-                    highest_votes = 0
-                    for reaction in message.reactions:
-                        if str(reaction.emoji) in self.poll_emojis:
-                            # Mengurangi 1 untuk menghilangkan suara dari bot itu sendiri
-                            vote_count = reaction.count - 1
-                            option_index = self.poll_emojis.index(str(reaction.emoji))
-                            results[poll["options"][option_index]] = vote_count
-                            if vote_count > highest_votes:
-                                highest_votes = vote_count
-
-                    winners = [option for option, votes in results.items() if votes == highest_votes and highest_votes > 0]
-                    
-                    # Membuat embed hasil
-                    result_description = "\n".join([f"**{option}**: {votes} suara" for option, votes in sorted(results.items(), key=lambda item: item[1], reverse=True)])
-                    
-                    result_embed = discord.Embed(
-                        title=f"🏁 Hasil Polling: {poll['title']}",
-                        description=result_description,
-                        color=discord.Color.green()
-                    )
-
-                    if winners:
-                        result_embed.add_field(name="🏆 Pemenang", value=", ".join(winners))
-                    else:
-                        result_embed.add_field(name="Hasil", value="Tidak ada suara yang masuk.")
-
-                    await channel.send(embed=result_embed)
-                    
-                except discord.NotFound:
-                    logger.warning(f"Pesan polling {poll['message_id']} tidak ditemukan. Mungkin sudah dihapus.")
-                except Exception as e:
-                    logger.error(f"Error saat memproses polling kedaluwarsa: {e}")
-                finally:
-                    # Hapus polling dari list aktif
-                    self.active_polls.remove(poll)
-
-    @check_expired_polls.before_loop
-    async def before_check_expired_polls(self):
-        """Menunggu bot siap sebelum memulai loop."""
-        await self.bot.wait_until_ready()
 
 async def setup(bot):
     await bot.add_cog(PollCog(bot))
@@ -1,12 +1,16 @@
 import re
-import aiohttp
 import discord
 from discord.ext import commands
 import asyncio
 from asyncio.log import logger
 
-from utils.youtube_api import YOUTUBE_VIDEO_REGEX, fetch_comment_threads, TIMESTAMP_REGEX
-from utils.helpers import parse_timestamp_to_seconds, seconds_to_hms
+from utils.youtube_api import YOUTUBE_VIDEO_REGEX, comment_snippet, fetch_youtube_video_info, iter_deep_comments
+from utils.comment_store import iter_corpus_pages
+from utils.helpers import iso8601_duration_to_seconds, seconds_to_hms
+from utils.timestamp_agg import TimestampAggregator
+from utils.progress import ProgressMessage
+from utils.slots import ParsedIntent
+from utils.state import ConversationStore, get_conversation_store
 
 MAX_COMMENT_PAGES = 5
 MAX_COMMENTS_TO_SCAN = 500
@@ -17,111 +21,123 @@ class TimestampsCog(commands.Cog, name="Timestamps"):
 
     def __init__(self, bot):
         self.bot = bot
-        # State management: {user_id: {"state": "waiting_for_video"}}
-        self.user_states = {}
+        # State percakapan ada di store terpusat (step "waiting_for_video", data = deep)
+        self.conversations = get_conversation_store(bot)
+        self.conversations.register("timestamps", self._on_reply)
+
+    def cog_unload(self):
+        self.conversations.unregister("timestamps")
 
     @commands.Cog.listener()
-    async def on_timestamps_request(self, message: discord.Message, content: str):
+    async def on_timestamps_request(self, message: discord.Message, parsed: ParsedIntent):
         """Listener untuk memulai alur pencarian timestamp."""
-        logger.info(f"⏱️ Timestamps request from {message.author}: {content}")
-        user_id = message.author.id
-
-        # Coba ekstrak link video dari content awal
-        yt_match = YOUTUBE_VIDEO_REGEX.search(content)
-        if yt_match:
-            video_id = yt_match.group(1)
-            await self._perform_search(message, video_id)
+        logger.info(f"⏱️ Timestamps request from {message.author}: {parsed}")
+
+        # Link video sudah diekstrak oleh chatbot
+        if parsed.video_id:
+            await self._perform_search(message, parsed.video_id, parsed.deep)
         else:
             await message.channel.send("Tentu! Kasih aku link video YouTube yang mau dicari timestamp-nya.")
-            self.user_states[user_id] = {"state": "waiting_for_video"}
+            self.conversations.set(ConversationStore.key_for(message), "timestamps", "waiting_for_video", parsed.deep)
+
+    async def _on_reply(self, message: discord.Message, state):
+        """Handler (dipanggil router chatbot) untuk respons user yang sedang dalam state menunggu."""
+        if state.step == "waiting_for_video":
+            yt_match = YOUTUBE_VIDEO_REGEX.search(message.content)
+            if yt_match:
+                video_id = yt_match.group(1)
+                # Hapus state sebelum memulai pencarian
+                self.conversations.pop(ConversationStore.key_for(message))
+                await self._perform_search(message, video_id, state.data)
+            else:
+                await message.channel.send("Hmm, sepertinya itu bukan link YouTube yang valid. Coba kirim lagi ya.")
+
+    def _moments_embed(self, video_id: str, aggregator: TimestampAggregator, deep: bool,
+                       done: bool = True) -> discord.Embed:
+        """Embed rangkuman momen; done=False untuk hasil sementara selama halaman masih dipindai."""
+        description = f"Menampilkan hingga {MAX_TIMESTAMP_ENTRIES} momen yang paling sering disebut:"
+        if not done:
+            description = "⏳ Masih memindai... " + description
+        embed = discord.Embed(
+            title="⏱️ Rangkuman Timestamp dari Komentar",
+            description=description,
+            color=discord.Color.purple()
+        )
+
+        for moment in aggregator.top(MAX_TIMESTAMP_ENTRIES):
+            readable_time = seconds_to_hms(moment.second)
+            # Satu contoh komentar untuk preview
+            preview_text = moment.snippet
+            if len(preview_text) > 150:
+                preview_text = preview_text[:147] + "..."
+            span = ""
+            if moment.start != moment.end:
+                span = f" ({seconds_to_hms(moment.start)}–{seconds_to_hms(moment.end)})"
+
+            # Link YouTube dengan timestamp ada di value: markdown link tidak dirender di nama field
+            yt_url = f"https://www.youtube.com/watch?v={video_id}&t={moment.second}s"
+            field_value = (f"Disebut dalam **{moment.mentions}** komentar{span}. [Tonton]({yt_url})\n"
+                           f"*Contoh: \"{preview_text}\"*")
+            embed.add_field(
+                name=f"⏱️ {readable_time}",
+                value=field_value,
+                inline=False
+            )
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """Listener untuk menangani respons user yang sedang dalam state menunggu."""
-        if message.author.bot:
-            return
-
-        user_id = message.author.id
-        if user_id in self.user_states:
-            state_info = self.user_states[user_id]
-            if state_info.get("state") == "waiting_for_video":
-                yt_match = YOUTUBE_VIDEO_REGEX.search(message.content)
-                if yt_match:
-                    video_id = yt_match.group(1)
-                    # Hapus state sebelum memulai pencarian
-                    del self.user_states[user_id]
-                    await self._perform_search(message, video_id)
-                else:
-                    await message.channel.send("Hmm, sepertinya itu bukan link YouTube yang valid. Coba kirim lagi ya.")
-
-    async def _perform_search(self, message: discord.Message, video_id: str):
-        """Fungsi inti untuk melakukan pencarian timestamp dan menampilkan hasil."""
-        await message.channel.send(f"⏱️ Oke, aku cari timestamp di komentar video `{video_id}`. Ini mungkin butuh beberapa saat...")
+        scanned_count = aggregator.comments
+        footer = (f"Memindai {scanned_count} komentar dan balasan." if deep
+                  else f"Memindai {scanned_count} komentar teratas.")
+        if aggregator.rejected:
+            footer += f" {aggregator.rejected} timestamp melewati durasi video diabaikan."
+        embed.set_footer(text=footer)
+        return embed
 
+    async def _perform_search(self, message: discord.Message, video_id: str, deep: bool = False):
+        """Fungsi inti untuk melakukan pencarian timestamp dan menampilkan hasil."""
+        scope = " (deep scan, termasuk balasan)" if deep else ""
+        # Satu pesan yang diedit di tempat: momen sementara muncul sejak halaman pertama
+        progress = ProgressMessage(message.channel)
+        await progress.start(content=f"⏱️ Oke, aku cari timestamp di komentar video `{video_id}`{scope}...")
+
+        # Durasi video (untuk menolak timestamp yang mustahil) diambil paralel dengan halaman pertama
+        info_task = asyncio.ensure_future(fetch_youtube_video_info(video_id))
+        # Agregasi per halaman: yang disimpan hanya histogram per detik dan satu contoh
+        # komentar per detik, bukan seluruh komentar
+        if deep:
+            pages = iter_deep_comments(video_id)
+        else:
+            pages = iter_corpus_pages(video_id, max_pages=MAX_COMMENT_PAGES, max_comments=MAX_COMMENTS_TO_SCAN)
         try:
-            async with aiohttp.ClientSession() as session:
-                items = await fetch_comment_threads(session, video_id, max_pages=MAX_COMMENT_PAGES)
-                if not items:
-                    await message.channel.send("Tidak ada komentar yang bisa diambil. Mungkin video ini dinonaktifkan komentarnya.")
-                    return
-
-                ts_map = {}
-                for it in items:
-                    top = it.get("snippet", {}).get("topLevelComment", {}).get("snippet", {})
-                    if not top: continue
-
-                    text = top.get("textDisplay", "")
-                    # Cari semua timestamp dalam satu komentar
-                    for m_ts in TIMESTAMP_REGEX.finditer(text):
-                        ts_str = m_ts.group(0)
-                        try:
-                            seconds = parse_timestamp_to_seconds(ts_str)
-                            # Simpan info timestamp
-                            ts_map.setdefault(seconds, []).append(text.strip())
-                        except Exception:
-                            continue
-            
-            if not ts_map:
-                await message.channel.send(f"Maaf, tidak kutemukan format timestamp (seperti 01:23) di {len(items)} komentar terakhir.")
+            aggregator = None
+            async for page in pages:
+                if aggregator is None:
+                    try:
+                        info = await info_task
+                    except Exception:
+                        logger.warning("Could not fetch duration of %s", video_id)
+                        info = None
+                    duration = iso8601_duration_to_seconds(info.get("contentDetails", {}).get("duration")) if info else None
+                    aggregator = TimestampAggregator(duration)
+                aggregator.add_page([comment_snippet(it) for it in page])
+                if len(aggregator):
+                    progress.update(lambda: {"embed": self._moments_embed(video_id, aggregator, deep, done=False)})
+
+            if aggregator is None or not aggregator.comments:
+                await progress.finish(content="Tidak ada komentar yang bisa diambil. Mungkin video ini dinonaktifkan komentarnya.", embed=None)
                 return
 
-            # Urutkan berdasarkan detik
-            sorted_seconds = sorted(ts_map.keys())
-            
-            embed = discord.Embed(
-                title=" Rangkuman Timestamp dari Komentar",
-                description=f"Menampilkan hingga {MAX_TIMESTAMP_ENTRIES} momen yang paling sering disebut:",
-                color=discord.Color.purple()
-            )
-            
-            count = 0
-            for sec in sorted_seconds:
-                if count >= MAX_TIMESTAMP_ENTRIES: break
-                
-                readable_time = seconds_to_hms(sec)
-                mentions = ts_map[sec]
-                # Ambil satu contoh komentar untuk preview
-                preview_text = mentions[0]
-                if len(preview_text) > 150:
-                    preview_text = preview_text[:147] + "..."
-                
-                field_value = f"Disebut dalam **{len(mentions)}** komentar.\n*Contoh: \"{preview_text}\"*"
-                
-                # Buat link YouTube dengan timestamp
-                yt_url = f"https://www.youtube.com/watch?v={video_id}&t={sec}s"
-                embed.add_field(
-                    name=f"[{readable_time}]({yt_url})",
-                    value=field_value,
-                    inline=False
-                )
-                count += 1
-
-            embed.set_footer(text=f"Memindai {len(items)} komentar teratas.")
-            await message.channel.send(embed=embed)
+            if not len(aggregator):
+                await progress.finish(content=f"Maaf, tidak kutemukan format timestamp (seperti 01:23) di {aggregator.comments} komentar terakhir.", embed=None)
+                return
+
+            await progress.finish(content=None, embed=self._moments_embed(video_id, aggregator, deep))
 
         except Exception as e:
             logger.exception("Error in timestamps cog: %s", e)
-            await message.channel.send("Terjadi kesalahan saat mencari timestamp. Coba periksa kembali link videonya.")
+            await progress.finish(content="Terjadi kesalahan saat mencari timestamp. Coba periksa kembali link videonya.", embed=None)
+        finally:
+            info_task.cancel()
+            await pages.aclose()
 
 async def setup(bot):
     await bot.add_cog(TimestampsCog(bot))
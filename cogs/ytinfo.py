@@ -63,74 +63,81 @@
 #     await bot.add_cog(YtInfo(bot))
 from asyncio.log import logger
 import re
-import aiohttp
 import discord
 from discord.ext import commands
 
-from utils.youtube_api import YOUTUBE_VIDEO_REGEX, fetch_youtube_video_info
+from utils.youtube_api import fetch_youtube_video_info
 from utils.helpers import iso8601_duration_to_readable, fmt_number
+from utils.slots import ParsedIntent
+from utils.outbox import get_outbox
+
+VIDEO_ID_REGEX = re.compile(r"[A-Za-z0-9_-]{11}")
 
 
 class YtInfo(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.outbox = get_outbox(bot)
 
     @commands.Cog.listener()
-    async def on_ytinfo_request(self, message: discord.Message, content: str):
-        """Listener untuk event 'ytinfo_request' dari chatbot.py"""
-        vid = None
-        m = YOUTUBE_VIDEO_REGEX.search(content)
-        logger.info("🔍 YtInfo received request: %s", content)
-        if m:
-            vid = m.group(1)
-        else:
-            candidate = content.strip()
-            if re.fullmatch(r"[A-Za-z0-9_-]{11}", candidate):
-                vid = candidate
+    async def on_ytinfo_request(self, message: discord.Message, parsed: ParsedIntent, follow_up: bool = False):
+        """
+        Listener untuk event 'ytinfo_request' dari chatbot.py. follow_up=True (link langsung
+        di pesan pertama) menambahkan pertanyaan "ada hal lain" setelah hasilnya.
+        """
+        logger.info("🔍 YtInfo received request: %s", parsed)
+        vid = parsed.video_id
+        if not vid and VIDEO_ID_REGEX.fullmatch(parsed.text):
+            vid = parsed.text
         logger.info("🎬 Extracted video ID: %s", vid)
         if not vid:
-            await message.channel.send(
+            self.outbox.post(
+                message.channel,
                 "❌ Aku tidak bisa mengekstrak video ID. Coba kasih URL atau ID video yang valid."
             )
             return
 
-        async with aiohttp.ClientSession() as session:
-            info = await fetch_youtube_video_info(session, vid)
-            logger.info("📺 Fetched video info: %s", info is not None)
-            if not info:
-                await message.channel.send("⚠️ Gagal mengambil data video.")
-                return
-
-            snippet = info.get("snippet", {})
-            stats = info.get("statistics", {})
-            details = info.get("contentDetails", {})
-
-            title = snippet.get("title", "Unknown")
-            channel_title = snippet.get("channelTitle", "Unknown")
-            duration = iso8601_duration_to_readable(details.get("duration", ""))
-            views = fmt_number(stats.get("viewCount"))
-            likes = stats.get("likeCount")
-
-            embed = discord.Embed(
-                title=title,
-                url=f"https://youtu.be/{vid}",
-                description=f"📺 Channel: {channel_title}",
-                color=discord.Color.red(),
-            )
-            embed.add_field(name="Duration", value=duration, inline=True)
-            embed.add_field(name="Views", value=views, inline=True)
-            if likes is not None:
-                embed.add_field(name="Likes", value=fmt_number(likes), inline=True)
-
-            # Thumbnail
-            thumbs = snippet.get("thumbnails", {})
-            if isinstance(thumbs, dict):
-                thumb = thumbs.get("high", {}).get("url") or thumbs.get("default", {}).get("url")
-                if thumb:
-                    embed.set_thumbnail(url=thumb)
-
-            embed.set_footer(text="ℹ️ Info provided by YouTube Data API")
-            await message.channel.send(f"Berikut merupakan informasi video yang kamu cari:", embed=embed)
+        # Indikator mengetik selama mengambil data, pengganti pesan "tunggu sebentar"
+        async with self.outbox.typing(message.channel):
+            info = await fetch_youtube_video_info(vid)
+        logger.info("📺 Fetched video info: %s", info is not None)
+        if not info:
+            self.outbox.post(message.channel, "⚠️ Gagal mengambil data video.")
+            return
+
+        snippet = info.get("snippet", {})
+        stats = info.get("statistics", {})
+        details = info.get("contentDetails", {})
+
+        title = snippet.get("title", "Unknown")
+        channel_title = snippet.get("channelTitle", "Unknown")
+        duration = iso8601_duration_to_readable(details.get("duration", ""))
+        views = fmt_number(stats.get("viewCount"))
+        likes = stats.get("likeCount")
+
+        embed = discord.Embed(
+            title=title,
+            url=f"https://youtu.be/{vid}",
+            description=f"📺 Channel: {channel_title}",
+            color=discord.Color.red(),
+        )
+        embed.add_field(name="Duration", value=duration, inline=True)
+        embed.add_field(name="Views", value=views, inline=True)
+        if likes is not None:
+            embed.add_field(name="Likes", value=fmt_number(likes), inline=True)
+
+        # Thumbnail
+        thumbs = snippet.get("thumbnails", {})
+        if isinstance(thumbs, dict):
+            thumb = thumbs.get("high", {}).get("url") or thumbs.get("default", {}).get("url")
+            if thumb:
+                embed.set_thumbnail(url=thumb)
+
+        embed.set_footer(text="ℹ️ Info provided by YouTube Data API")
+        self.outbox.post(message.channel, "Berikut merupakan informasi video yang kamu cari:", embed=embed)
+        if follow_up:
+            # Dikirim dalam jendela yang sama sehingga digabung dengan hasil di atas
+            self.outbox.post(message.channel, "Apakah ada hal lain yang bisa saya bantu?")
 
 
 async def setup(bot):
@@ -1,83 +1,137 @@
-from email import message
-import aiohttp
 import discord
 from discord.ext import commands
 import re
-from utils.youtube_api import fetch_search_videos
+from utils import quota
+from utils.quota import UNIT_COSTS
+from utils.youtube_api import SearchResults, search_videos
 from utils.helpers import fmt_number
+from utils.slots import ParsedIntent
+from utils.dialog import DialogStep, get_dialog_manager
+from utils.outbox import get_outbox
 
-SEARCH_LIMIT_PER_DAY = 5
-_search_usage = {}
+FEEDBACK_YES_REGEX = re.compile(r"^(ya|iya|yes|y|tentu|tentu saja|boleh|silakan|silahkan)$")
+SEARCH_VIEW_TIMEOUT = 300  # detik tombol halaman aktif
 
-def increment_search_usage(user_id: int) -> int:
-    from datetime import date
-    today = date.today()
-    entry = _search_usage.get(user_id)
-    if entry is None or entry['date'] != today:
-        _search_usage[user_id] = {'date': today, 'count': 1}
-        return 1
+
+def search_page_embed(results: SearchResults, page: int, per_page: int, remaining: int) -> discord.Embed:
+    """Embed satu halaman hasil (dibuat hanya saat halaman itu ditampilkan)."""
+    items = results.items[page * per_page:(page + 1) * per_page]
+    start = page * per_page + 1
+    embed = discord.Embed(title=f"Search results for: {results.query}",
+                          description=f"Hasil {start}-{start + len(items) - 1}")
+    for it in items:
+        vid_id = it.get("id", {}).get("videoId")
+        snip = it.get("snippet", {})
+        title = snip.get("title")
+        channel = snip.get("channelTitle")
+        url = f"https://youtu.be/{vid_id}" if vid_id else None
+        tv = f"[{title}]({url})\nChannel: {channel}" if url else f"{title}\nChannel: {channel}"
+        embed.add_field(name="\u200b", value=tv, inline=False)
+    if results.exhausted:
+        total = f"Halaman {page + 1}/{-(-len(results.items) // per_page)}"
     else:
-        entry['count'] += 1
-        return entry['count']
+        total = f"Halaman {page + 1}"
+    embed.set_footer(text=f"{total} • Sisa kuota pencarian hari ini: ±{remaining}. "
+                          f"Note: YouTube Data API search endpoint is quota-expensive.")
+    return embed
+
+
+class SearchPager(discord.ui.View):
+    """
+    Tombol Sebelumnya / Berikutnya untuk hasil search. Halaman dilayani dari SearchResults
+    (sudah berisi 50 item dari satu request); request baru (nextPageToken) hanya dikirim
+    saat halaman berikutnya melewati item yang sudah ada.
+    """
+
+    def __init__(self, results: SearchResults, per_page: int):
+        super().__init__(timeout=SEARCH_VIEW_TIMEOUT)
+        self.results = results
+        self.per_page = per_page
+        self.page = 0
+        self.message = None
+        self._sync_buttons()
+
+    def render(self) -> discord.Embed:
+        remaining = quota.scheduler.remaining() // UNIT_COSTS["search"]
+        return search_page_embed(self.results, self.page, self.per_page, remaining)
+
+    def _sync_buttons(self):
+        self.previous.disabled = self.page == 0
+        has_more = len(self.results.items) > (self.page + 1) * self.per_page
+        self.next.disabled = not has_more and self.results.exhausted
 
-def get_search_usage(user_id: int) -> int:
-    from datetime import date
-    entry = _search_usage.get(user_id)
-    if not entry or entry['date'] != date.today():
-        return 0
-    return entry['count']
+    @discord.ui.button(label="Sebelumnya", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="Berikutnya", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        needed = (self.page + 2) * self.per_page
+        if len(self.results.items) < needed and not self.results.exhausted:
+            # Item di cache habis: ambil halaman API berikutnya (100 unit) dulu
+            await interaction.response.defer()
+            await self.results.ensure(needed)
+            if len(self.results.items) > (self.page + 1) * self.per_page:
+                self.page += 1
+            self._sync_buttons()
+            await interaction.edit_original_response(embed=self.render(), view=self)
+            return
+        self.page += 1
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    async def on_timeout(self):
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
 
 class YtSearch(commands.Cog, name ="YtSearch"):
     def __init__(self, bot):
         self.bot = bot
+        self.dialogs = get_dialog_manager(bot)
+        self.outbox = get_outbox(bot)
+        self.feedback_step = DialogStep("ytsearch_feedback", self._on_feedback, parse=self.dialogs.answer_text,
+                                        on_timeout=self._on_feedback_timeout, timeout=30, fallthrough=True)
 
     # @commands.command(name="ytsearch")
     @commands.Cog.listener()
     # async def ytsearch(self, message, *, query: str):
-    async def on_ytsearch_request(self, message: discord.message, query: str, count: int):
+    async def on_ytsearch_request(self, message: discord.message, parsed: ParsedIntent):
+        query = parsed.query
+        count = parsed.count
 
-        user_id = message.author.id
-        used = get_search_usage(user_id)
-        if used >= SEARCH_LIMIT_PER_DAY:
-            await message.channel.send(f"{message.author.mention} Anda telah mencapai batas pencarian harian ({SEARCH_LIMIT_PER_DAY}).")
+        # Kuota dijaga terpusat oleh utils.quota (search.list = 100 unit), bukan per user.
+        # Hasil (50 item) di-cache per query, jadi jumlah lain / halaman berikutnya tidak request lagi.
+        # Indikator mengetik selama pencarian; sisa kuota ditampilkan di footer hasil
+        async with self.outbox.typing(message.channel):
+            results = await search_videos(query)
+        if results is None and not quota.scheduler.can_spend("search"):
+            self.outbox.post(message.channel, "⚠️ Kuota YouTube API hari ini sudah habis, coba lagi nanti ya.")
+            return
+        if results is None or len(results.items) == 0:
+            self.outbox.post(message.channel, "Tidak ada hasil.")
             return
 
-        current_count = increment_search_usage(user_id)
-        remaining = SEARCH_LIMIT_PER_DAY - current_count
-
-        await message.channel.send(f"Mencari: `{query}` (sisa jatah hari ini: {remaining})...")
-
-        async with aiohttp.ClientSession() as session:
-            items = await fetch_search_videos(session, query, max_results=count)
-            if items is None or len(items) == 0:
-                await message.channel.send("Tidak ada hasil.")
-                return
-
-            embed = discord.Embed(title=f"Search results for: {query}", description=f"Top {len(items)} results")
-            for it in items:
-                vid_id = it.get("id", {}).get("videoId")
-                snip = it.get("snippet", {})
-                title = snip.get("title")
-                channel = snip.get("channelTitle")
-                url = f"https://youtu.be/{vid_id}" if vid_id else None
-                tv = f"[{title}]({url})\nChannel: {channel}" if url else f"{title}\nChannel: {channel}"
-                embed.add_field(name="\u200b", value=tv, inline=False)
-            embed.set_footer(text="Note: YouTube Data API search endpoint is quota-expensive.")
-            await message.channel.send(embed=embed)
-        await message.channel.send("apakah sudah ada video yang sesuai?")
+        # Hasil, tombol halaman, dan pertanyaan dikirim sebagai satu pesan
+        pager = SearchPager(results, count)
+        pager.message = await self.outbox.send(message.channel, "apakah sudah ada video yang sesuai?",
+                                               embed=pager.render(), view=pager)
         # menunggu jawaban user
-        def check(m: discord.Message):
-            return m.author.id == user_id and m.channel.id == message.channel.id
-        # jika ya, selesai
-        try:
-            response = await self.bot.wait_for("message", check=check, timeout=30)
-            # gunakan regex jika response positif (ya, iya, yes, y, tentu, tentu saja, boleh, silakan, silahkan, dll)
-            if re.search(r"^(ya|iya|yes|y|tentu|tentu saja|boleh|silakan|silahkan)$", response.content.lower()):
-                await message.channel.send("Baik, jika ada yang lain silakan beri tahu...")
-            else:
-                await message.channel.send("Baik, silahkan perbaiki keyword pencarian.")
-        except TimeoutError:
-            await message.channel.send("Waktu habis, jika ada yang lain silakan beri tahu.")
+        self.dialogs.ask(message, self.feedback_step, message)
+
+    async def _on_feedback(self, response: discord.Message, text: str, message: discord.Message):
+        # gunakan regex jika response positif (ya, iya, yes, y, tentu, tentu saja, boleh, silakan, silahkan, dll)
+        if FEEDBACK_YES_REGEX.search(text.lower()):
+            self.outbox.post(message.channel, "Baik, jika ada yang lain silakan beri tahu...")
+        else:
+            self.outbox.post(message.channel, "Baik, silahkan perbaiki keyword pencarian.")
+
+    async def _on_feedback_timeout(self, message: discord.Message):
+        self.outbox.post(message.channel, "Waktu habis, jika ada yang lain silakan beri tahu.")
 
 async def setup(bot):
     await bot.add_cog(YtSearch(bot))
@@ -48,6 +48,10 @@ from dotenv import load_dotenv
 import discord
 from discord.ext import commands
 
+from utils.comment_store import close_comment_store
+from utils.poll_store import close_poll_store
+from utils.http import create_http_session, set_http_session
+
 # Load token
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
@@ -89,8 +93,18 @@ async def load_cogs():
                 logger.exception("❌ Failed to load extension %s: %s", ext, e)
 
 async def main():
-    await load_cogs()
-    await bot.start(DISCORD_TOKEN)
+    # Satu ClientSession ter-pool untuk seluruh bot; ditutup saat bot berhenti
+    async with create_http_session() as session:
+        bot.http_session = session
+        set_http_session(session)
+        try:
+            async with bot:
+                await load_cogs()
+                await bot.start(DISCORD_TOKEN)
+        finally:
+            set_http_session(None)
+            close_comment_store()
+            close_poll_store()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# utils.youtube_api menolak diimpor tanpa API key; test tidak pernah memanggil API
+os.environ.setdefault("YOUTUBE_API_KEY", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,71 @@
+import asyncio
+
+from utils.batching import MicroBatcher
+
+
+def test_lookups_in_one_window_share_one_batch():
+    batches = []
+
+    async def fetch_many(keys, priority):
+        batches.append((sorted(keys), priority))
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    async def scenario():
+        batcher = MicroBatcher(fetch_many, window=0.01)
+        results = await asyncio.gather(batcher.load("a", 1), batcher.load("b", 0), batcher.load("a", 2),
+                                       batcher.load("missing", 1))
+        return batcher, results
+
+    batcher, results = asyncio.run(scenario())
+    assert results == ["A", "B", "A", None]
+    # Satu request, dengan prioritas tertinggi di antara pemanggilnya
+    assert batches == [(["a", "b", "missing"], 0)]
+    assert batcher.stats == {"lookups": 4, "batches": 1}
+
+
+def test_full_batch_is_sent_without_waiting():
+    batches = []
+
+    async def fetch_many(keys, priority):
+        batches.append(len(keys))
+        return {key: key for key in keys}
+
+    async def scenario():
+        batcher = MicroBatcher(fetch_many, window=60, max_batch=3)
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.load(str(i)) for i in range(3))), timeout=1)
+
+    assert asyncio.run(scenario()) == ["0", "1", "2"]
+    assert batches == [3]
+
+
+def test_failed_batch_fails_every_lookup():
+    async def fetch_many(keys, priority):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        batcher = MicroBatcher(fetch_many, window=0.01)
+        return await asyncio.gather(batcher.load("a"), batcher.load("b"), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+
+
+def test_video_lookups_become_one_videos_request(monkeypatch):
+    from utils import youtube_api
+    from utils.cache import ResponseCache
+
+    requests = []
+
+    async def fake_request(endpoint, params, session=None, label=None):
+        requests.append((endpoint, params["id"]))
+        return {"items": [{"id": video_id} for video_id in params["id"].split(",") if video_id != "gone"]}, 100
+
+    monkeypatch.setattr(youtube_api, "_request_json", fake_request)
+    monkeypatch.setattr(youtube_api, "response_cache", ResponseCache())
+    monkeypatch.setattr(youtube_api, "_batchers", {})
+
+    async def scenario():
+        return await asyncio.gather(*(youtube_api.fetch_youtube_video_info(v) for v in ("v1", "v2", "gone")))
+
+    assert asyncio.run(scenario()) == [{"id": "v1"}, {"id": "v2"}, None]
+    assert requests == [("videos", "v1,v2,gone")]
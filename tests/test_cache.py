@@ -0,0 +1,69 @@
+import time
+import asyncio
+
+from utils import youtube_api
+from utils.cache import FRESH, STALE, ResponseCache
+
+
+def test_fresh_then_stale_then_expired(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = ResponseCache()
+    cache.store("k", {"items": [1]}, size=10, ttl=60, stale_ttl=30)
+
+    assert cache.lookup("k") == ({"items": [1]}, FRESH)
+    now[0] += 61
+    assert cache.lookup("k") == ({"items": [1]}, STALE)
+    now[0] += 30
+    assert cache.lookup("k") == (None, None)
+    assert len(cache) == 0
+
+
+def test_negative_entry_is_counted(monkeypatch):
+    cache = ResponseCache()
+    cache.store("missing", {"items": []}, size=1, ttl=60, negative=True)
+    assert cache.lookup("missing") == ({"items": []}, FRESH)
+    assert cache.stats["negative_hits"] == 1
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResponseCache(max_bytes=100, max_entries=2)
+    cache.store("a", "A", size=10, ttl=60)
+    cache.store("b", "B", size=10, ttl=60)
+    cache.lookup("a")               # "a" baru dipakai, "b" yang paling lama
+    cache.store("c", "C", size=10, ttl=60)
+    assert cache.lookup("b") == (None, None)
+    assert cache.lookup("a")[1] == FRESH
+
+    cache.store("big", "X", size=95, ttl=60)
+    assert len(cache) == 1 and cache.total_bytes == 95
+    cache.store("huge", "Y", size=500, ttl=60)
+    assert cache.lookup("huge") == (None, None)
+
+
+def test_get_json_serves_stale_while_revalidating(monkeypatch):
+    responses = iter([{"items": ["lama"]}, {"items": ["baru"]}])
+    calls = []
+
+    async def fake_request(endpoint, params, session=None, label=None):
+        calls.append(endpoint)
+        return next(responses), 10
+
+    monkeypatch.setattr(youtube_api, "_request_json", fake_request)
+    monkeypatch.setattr(youtube_api, "response_cache", ResponseCache())
+    params = {"part": "snippet", "playlistId": "PL1", "maxResults": 50}
+    key = youtube_api.make_cache_key("playlistItems", params)
+
+    async def scenario():
+        first = await youtube_api._get_json("playlistItems", params)
+        youtube_api.response_cache._entries[key].fresh_until = 0  # paksa jadi basi
+        stale = await youtube_api._get_json("playlistItems", params)
+        while youtube_api._revalidating:
+            await asyncio.sleep(0)
+        fresh = await youtube_api._get_json("playlistItems", params)
+        return first, stale, fresh
+
+    first, stale, fresh = asyncio.run(scenario())
+    assert first == stale == {"items": ["lama"]}
+    assert fresh == {"items": ["baru"]}
+    assert calls == ["playlistItems", "playlistItems"]
@@ -0,0 +1,36 @@
+from utils.comment_index import CommentIndex, bounded_edit_distance
+
+
+def thread(comment_id: str, text: str, likes: int = 0) -> dict:
+    return {"id": comment_id, "snippet": {"topLevelComment": {"snippet": {
+        "textDisplay": text, "authorDisplayName": "user", "likeCount": likes}}}}
+
+
+def make_index(*texts) -> CommentIndex:
+    index = CommentIndex("video")
+    index.add([thread(f"c{i}", text) for i, text in enumerate(texts)])
+    return index
+
+
+def test_short_token_without_shared_trigram_is_still_similar():
+    index = make_index("axcdxf")
+    assert bounded_edit_distance("abcdef", "axcdxf", 2) == 2
+    assert index.similar_tokens("abcdef") == {"axcdxf": 2}
+
+
+def test_similar_tokens_respects_edit_limit():
+    index = make_index("keren banget", "kerem", "kecewa")
+    assert index.similar_tokens("keren") == {"keren": 0, "kerem": 1}
+
+
+def test_similar_tokens_sees_tokens_added_later():
+    index = make_index("mantap")
+    index.similar_tokens("mantab")
+    index.add([thread("late", "mantul")])
+    assert "mantul" in index.similar_tokens("mantab")
+
+
+def test_fuzzy_search_finds_typo():
+    index = make_index("lagunya enak banget", "videonya lucu")
+    results = index.search("~engak", 5, fuzzy=True)
+    assert [doc["text"] for doc in results] == ["lagunya enak banget"]
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from utils import comment_store, youtube_api
+from utils.comment_store import CommentStore, iter_corpus_pages
+
+
+def thread(comment_id: str) -> dict:
+    return {"id": comment_id, "snippet": {"topLevelComment": {"snippet": {"textDisplay": comment_id}}}}
+
+
+class FakeApi:
+    """commentThreads palsu: halaman ke-n berisi `page_size` komentar, terbaru lebih dulu."""
+
+    def __init__(self, total: int, page_size: int = 100, delay: float = 0.01):
+        self.ids = [f"c{i}" for i in range(total)]
+        self.page_size = page_size
+        self.delay = delay
+        self.requests = []
+
+    async def __call__(self, endpoint, params, session=None, label=None):
+        self.requests.append(params.get("pageToken"))
+        await asyncio.sleep(self.delay)
+        start = int(params.get("pageToken") or 0)
+        end = start + self.page_size
+        data = {"items": [thread(i) for i in self.ids[start:end]]}
+        if end < len(self.ids):
+            data["nextPageToken"] = str(end)
+        return data, 1000
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(comment_store, "_store", CommentStore(":memory:"))
+    youtube_api.response_cache.clear()
+    fake = FakeApi(1000)
+    monkeypatch.setattr(youtube_api, "_request_json", fake)
+    return fake
+
+
+async def read(video_id: str, max_comments: int = 500, stop_after: int = None) -> list:
+    items = []
+    pages = iter_corpus_pages(video_id, max_pages=5, max_comments=max_comments)
+    try:
+        async for page in pages:
+            items.extend(page)
+            if stop_after is not None and len(items) >= stop_after:
+                break
+    finally:
+        await pages.aclose()
+    return items
+
+
+def test_concurrent_requests_share_one_crawl(api):
+    async def scenario():
+        return await asyncio.gather(read("v", 500), read("v", 300), read("v", 500))
+
+    results = asyncio.run(scenario())
+    assert [len(items) for items in results] == [500, 300, 500]
+    assert api.requests == [None, "100", "200", "300", "400"]
+    assert len(comment_store._crawl_locks) == 0
+
+
+def age_corpus(video_id: str, seconds: float):
+    store = comment_store.get_comment_store()
+    with store.db:
+        store.db.execute("UPDATE corpus SET fetched_at = fetched_at - ? WHERE video_id = ?", (seconds, video_id))
+    youtube_api.response_cache.clear()
+
+
+def test_head_refresh_merges_new_comments(api):
+    asyncio.run(read("v", 300))
+    api.ids[:0] = ["n1", "n2"]
+    age_corpus("v", comment_store.CORPUS_TTL + 1)
+    api.requests.clear()
+
+    items = asyncio.run(read("v", 300))
+    assert [item["id"] for item in items[:3]] == ["n1", "n2", "c0"]
+    assert len(items) == 300
+    assert api.requests == [None]
+
+
+def test_head_refresh_is_kept_when_consumer_stops_early(api):
+    asyncio.run(read("v", 300))
+    api.ids[:0] = [f"n{i}" for i in range(150)]
+    age_corpus("v", comment_store.CORPUS_TTL + 1)
+
+    asyncio.run(read("v", 300, stop_after=50))
+    youtube_api.response_cache.clear()
+    api.requests.clear()
+    items = asyncio.run(read("v", 100))
+    # Head yang sudah diambil tersimpan dan corpus dianggap segar: tidak ada request lagi
+    assert api.requests == []
+    assert items[0]["id"] == "n0"
+
+
+def test_head_refresh_without_overlap_replaces_corpus(api):
+    asyncio.run(read("v", 200))
+    api.ids[:0] = [f"n{i}" for i in range(600)]
+    age_corpus("v", comment_store.CORPUS_TTL + 1)
+
+    asyncio.run(read("v", 500))
+    store = comment_store.get_comment_store()
+    ids = [item["id"] for item in store.load("v")]
+    # Corpus lama (c0..c199) tidak disambung di belakang head yang belum bersambung
+    assert ids == [f"n{i}" for i in range(500)]
+    assert store.get_meta("v")[1] == "500"
@@ -0,0 +1,130 @@
+import asyncio
+from types import SimpleNamespace
+
+from cogs.chatbot import Chatbot
+from cogs.greetings import Greetings
+from utils.dialog import DialogManager, DialogStep
+from utils.state import ConversationStore
+
+
+class StubChannel:
+    def __init__(self, channel_id: int = 1):
+        self.id = channel_id
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(content)
+        return SimpleNamespace(id=len(self.sent), content=content)
+
+
+class StubBot:
+    def __init__(self):
+        self.user = SimpleNamespace(id=0, bot=True, mention="<@0>", mentioned_in=lambda message: False)
+        self.dispatched = []
+
+    def dispatch(self, event, *args, **kwargs):
+        self.dispatched.append(event)
+
+    def get_cog(self, name):
+        return None
+
+
+def make_message(content: str, channel: StubChannel, user_id: int = 42):
+    return SimpleNamespace(content=content, channel=channel, guild=None,
+                           author=SimpleNamespace(id=user_id, bot=False, mention=f"<@{user_id}>"))
+
+
+def test_open_question_does_not_swallow_new_request():
+    async def scenario():
+        bot = StubBot()
+        chatbot, greetings = Chatbot(bot), Greetings(bot)
+        channel = StubChannel()
+        chatbot.dialogs.ask(make_message("halo", channel), greetings.mood_step)
+        await chatbot.on_message(make_message("info video https://youtu.be/dQw4w9WgXcQ", channel))
+        return bot, chatbot
+
+    bot, chatbot = asyncio.run(scenario())
+    assert bot.dispatched == ["ytinfo_request"]
+    # Pertanyaan mood tetap menunggu jawaban yang sebenarnya
+    assert len(chatbot.conversations) == 1
+
+
+def test_open_question_takes_plain_answer():
+    answers = []
+
+    async def scenario():
+        bot = StubBot()
+        chatbot, greetings = Chatbot(bot), Greetings(bot)
+
+        async def on_mood(message, text, data):
+            answers.append(text)
+
+        greetings.mood_step.on_answer = on_mood
+        channel = StubChannel()
+        chatbot.dialogs.ask(make_message("halo", channel), greetings.mood_step)
+        await chatbot.on_message(make_message("baik banget", channel))
+        return bot, chatbot
+
+    bot, chatbot = asyncio.run(scenario())
+    assert answers == ["baik banget"]
+    assert bot.dispatched == []
+    assert len(chatbot.conversations) == 0
+
+
+def test_step_times_out_and_frees_the_conversation():
+    timeouts = []
+
+    async def on_answer(message, value, data):
+        raise AssertionError("tidak boleh dijawab")
+
+    async def on_timeout(data):
+        timeouts.append(data)
+
+    async def scenario():
+        store = ConversationStore()
+        dialogs = DialogManager(store, tick=0.01)
+        step = DialogStep("ask", on_answer, on_timeout=on_timeout, timeout=0.02)
+        dialogs.ask(make_message("pertanyaan", StubChannel()), step, "data")
+        await asyncio.sleep(0.1)
+        return store
+
+    store = asyncio.run(scenario())
+    assert timeouts == ["data"]
+    assert len(store) == 0
+
+
+def test_invalid_answer_without_fallthrough_is_swallowed():
+    answers = []
+
+    async def on_answer(message, value, data):
+        answers.append(value)
+
+    def parse_number(message):
+        return int(message.content) if message.content.isdigit() else None
+
+    async def scenario():
+        store = ConversationStore()
+        dialogs = DialogManager(store)
+        channel = StubChannel()
+        dialogs.ask(make_message("berapa?", channel), DialogStep("count", on_answer, parse=parse_number))
+        handled = await store.route(make_message("banyak", channel))
+        still_waiting = len(store)
+        await store.route(make_message("3", channel))
+        return handled, still_waiting, store
+
+    handled, still_waiting, store = asyncio.run(scenario())
+    assert handled and still_waiting == 1
+    assert answers == [3]
+    assert len(store) == 0
+
+
+def test_ytsearch_count_question_falls_through_to_new_request():
+    async def scenario():
+        bot = StubBot()
+        chatbot = Chatbot(bot)
+        channel = StubChannel()
+        chatbot.dialogs.ask(make_message("cari video kucing", channel), chatbot.ytsearch_count_step, (None, None))
+        await chatbot.on_message(make_message("info video https://youtu.be/dQw4w9WgXcQ", channel))
+        return bot
+
+    assert asyncio.run(scenario()).dispatched == ["ytinfo_request"]
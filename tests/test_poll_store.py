@@ -0,0 +1,63 @@
+import asyncio
+
+from utils.poll_store import PollStore
+from utils.poll_tally import PollTally
+
+
+def make_poll(message_id: int, ends_at: float, mode: str = "buttons") -> dict:
+    return {"message_id": message_id, "channel_id": 10, "title": "Makan apa?",
+            "options": ["Nasi goreng", "Soto"], "ends_at": ends_at, "mode": mode}
+
+
+def test_polls_and_votes_survive_restart(tmp_path):
+    path = str(tmp_path / "polls.sqlite3")
+    store = PollStore(path)
+    store.put(make_poll(2, 200.0))
+    store.put(make_poll(1, 100.0, mode="reactions"))
+    tally = PollTally(2)
+    tally.choose(7, 1)
+    tally.add(8, 0)
+    tally.add(8, 1)
+    for user_id in (7, 8):
+        store.put_vote(1, user_id, tally.state(user_id))
+    store.close()
+
+    store = PollStore(path)
+    polls = store.load_all()
+    assert [(p["message_id"], p["mode"]) for p in polls] == [(1, "reactions"), (2, "buttons")]
+    assert polls[0]["options"] == ["Nasi goreng", "Soto"]
+
+    restored = PollTally(2)
+    for user_id, mask, slot in polls[0]["votes"]:
+        restored.restore(user_id, mask, slot)
+    assert list(restored.counts) == list(tally.counts) == [0, 2]
+    # Reaksi lain milik user 8 ikut dipulihkan: mencabut reaksi terakhir memindahkan suaranya
+    assert restored.remove(8, 1)
+    assert list(restored.counts) == [1, 1]
+    store.close()
+
+
+def test_deleted_poll_takes_its_votes():
+    store = PollStore(":memory:")
+    store.put(make_poll(1, 100.0))
+    store.put_vote(1, 7, (1, 0))
+    store.flush()
+    store.delete(1)
+    store.put_vote(1, 8, (2, 1))  # suara yang datang bersamaan dengan penghapusan
+    store.put(make_poll(2, 200.0))
+    store.put_vote(2, 7, None)
+    assert [p["message_id"] for p in store.load_all()] == [2]
+    assert store.db.execute("SELECT COUNT(*) FROM votes").fetchone()[0] == 0
+
+
+def test_changes_are_flushed_in_one_batch():
+    async def scenario():
+        store = PollStore(":memory:", flush_interval=0.01)
+        store.put(make_poll(1, 100.0))
+        store.put(make_poll(2, 200.0))
+        written_before = store.db.execute("SELECT COUNT(*) FROM polls").fetchone()[0]
+        await asyncio.sleep(0.03)
+        written_after = store.db.execute("SELECT COUNT(*) FROM polls").fetchone()[0]
+        return written_before, written_after
+
+    assert asyncio.run(scenario()) == (0, 2)
@@ -0,0 +1,48 @@
+from utils.poll_tally import PollTally
+
+
+def test_one_vote_per_user_follows_latest_reaction():
+    tally = PollTally(3)
+    assert tally.add(1, 0)
+    assert tally.add(1, 2)
+    assert list(tally.counts) == [0, 0, 1]
+    assert len(tally) == 1
+    assert not tally.add(1, 2)
+
+
+def test_removing_counted_reaction_moves_vote_to_remaining_one():
+    tally = PollTally(3)
+    tally.add(1, 2)
+    tally.add(1, 0)
+    assert tally.remove(1, 0)
+    assert list(tally.counts) == [0, 0, 1]
+    assert tally.remove(1, 2)
+    assert list(tally.counts) == [0, 0, 0]
+    assert len(tally) == 0
+
+
+def test_removing_uncounted_reaction_changes_nothing():
+    tally = PollTally(2)
+    tally.add(1, 0)
+    tally.add(1, 1)
+    assert not tally.remove(1, 0)
+    assert list(tally.counts) == [0, 1]
+    assert tally.state(1) == (0b10, 1)
+
+
+def test_button_choice_toggles_and_moves():
+    tally = PollTally(2)
+    assert tally.choose(1, 0)
+    assert tally.choose(2, 0)
+    assert tally.choose(1, 1)
+    assert list(tally.counts) == [1, 1]
+    assert tally.choose(2, 0)  # menekan pilihan yang sama menarik suara
+    assert list(tally.counts) == [0, 1]
+    assert tally.state(2) is None
+
+
+def test_out_of_range_slot_is_ignored():
+    tally = PollTally(2)
+    assert not tally.add(1, 5)
+    assert not tally.choose(1, -1)
+    assert len(tally) == 0
@@ -0,0 +1,45 @@
+from utils.quota import BACKGROUND, INTERACTIVE, OPTIONAL, QuotaBudget, QuotaScheduler
+
+
+def make_scheduler(daily: int = 1000) -> QuotaScheduler:
+    # Bucket dibuat sebesar anggaran harian agar yang diuji hanya cadangan harian
+    return QuotaScheduler(daily_budget=daily, bucket_capacity=daily, refill_per_sec=0)
+
+
+def test_lower_priorities_are_shed_first():
+    scheduler = make_scheduler()
+    scheduler.spent = 450          # sisa 550: di atas cadangan OPTIONAL (50%) hanya 50 unit
+    assert scheduler.try_acquire("videos", OPTIONAL)
+    scheduler.spent = 500
+    scheduler.tokens = 500
+    assert not scheduler.try_acquire("videos", OPTIONAL)
+    assert scheduler.try_acquire("videos", BACKGROUND)
+    assert scheduler.denied["optional"] == 1
+
+    scheduler.spent = 800          # cadangan BACKGROUND (20%) tercapai
+    assert not scheduler.try_acquire("videos", BACKGROUND)
+    assert scheduler.try_acquire("videos", INTERACTIVE)
+
+
+def test_interactive_can_spend_to_zero_but_not_beyond():
+    scheduler = make_scheduler()
+    scheduler.spent = 900
+    assert scheduler.try_acquire("search", INTERACTIVE)   # 100 unit, sisa tepat 0
+    assert not scheduler.try_acquire("videos", INTERACTIVE)
+    assert scheduler.snapshot()["remaining"] == 0
+    assert scheduler.spent_by_endpoint == {"search": 100}
+
+
+def test_token_bucket_limits_bursts():
+    scheduler = QuotaScheduler(daily_budget=10000, bucket_capacity=150, refill_per_sec=0)
+    assert scheduler.try_acquire("search")
+    assert not scheduler.try_acquire("search")
+    assert scheduler.try_acquire("videos")
+
+
+def test_operation_budget():
+    budget = QuotaBudget(3)
+    assert budget.take("commentThreads", 2)
+    assert not budget.take("commentThreads", 2)
+    assert budget.take("comments")
+    assert budget.exhausted
@@ -0,0 +1,73 @@
+import asyncio
+
+from utils.scheduler import DeadlineScheduler
+
+
+def test_callbacks_fire_in_deadline_order():
+    fired = []
+
+    async def scenario():
+        scheduler = DeadlineScheduler(fired.append)
+        scheduler.schedule_in("late", 0.03)
+        scheduler.schedule_in("early", 0.01)
+        scheduler.schedule_in("middle", 0.02)
+        await asyncio.sleep(0.06)
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert fired == ["early", "middle", "late"]
+    assert len(scheduler) == 0
+
+
+def test_cancel_and_reschedule():
+    fired = []
+
+    async def scenario():
+        scheduler = DeadlineScheduler(fired.append)
+        scheduler.schedule_in("a", 0.01)
+        scheduler.schedule_in("b", 0.01)
+        assert scheduler.cancel("a")
+        assert not scheduler.cancel("a")
+        scheduler.schedule_in("b", 0.03)  # menggantikan jadwal lama
+        await asyncio.sleep(0.02)
+        early = list(fired)
+        await asyncio.sleep(0.03)
+        return early
+
+    early = asyncio.run(scenario())
+    assert early == []
+    assert fired == ["b"]
+
+
+def test_many_cancelled_entries_are_compacted():
+    async def scenario():
+        scheduler = DeadlineScheduler(lambda key: None)
+        for i in range(1000):
+            scheduler.schedule_in(i, 60)
+        for i in range(990):
+            scheduler.cancel(i)
+        heap_size = len(scheduler._heap)
+        scheduler.close()
+        return scheduler, heap_size
+
+    scheduler, heap_size = asyncio.run(scenario())
+    assert heap_size < 200
+    assert len(scheduler) == 0
+
+
+def test_failing_callback_does_not_stop_others():
+    fired = []
+
+    def callback(key):
+        if key == "bad":
+            raise RuntimeError("boom")
+        fired.append(key)
+
+    async def scenario():
+        scheduler = DeadlineScheduler(callback)
+        scheduler.schedule_in("bad", 0.01)
+        scheduler.schedule_in("good", 0.01)
+        await asyncio.sleep(0.03)
+
+    asyncio.run(scenario())
+    assert fired == ["good"]
@@ -0,0 +1,74 @@
+import asyncio
+
+from utils.singleflight import KeyedLock, SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "data"
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert results == ["data"] * 5
+    assert calls == [1]
+    assert flight.stats == {"started": 1, "shared": 4}
+    assert len(flight) == 0
+
+
+def test_cancelling_one_caller_keeps_others():
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return "data"
+
+    async def scenario():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("k", fetch))
+        second = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, first
+
+    result, first = asyncio.run(scenario())
+    assert result == "data"
+    assert first.cancelled()
+
+
+def test_errors_reach_every_caller():
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        flight = SingleFlight()
+        return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_keyed_lock_serializes_per_key_and_cleans_up():
+    order = []
+
+    async def worker(locks, key, name):
+        async with locks.hold(key):
+            order.append(f"{name}+")
+            await asyncio.sleep(0.01)
+            order.append(f"{name}-")
+
+    async def scenario():
+        locks = KeyedLock()
+        await asyncio.gather(worker(locks, "a", "x"), worker(locks, "a", "y"), worker(locks, "b", "z"))
+        return locks
+
+    locks = asyncio.run(scenario())
+    assert order.index("x-") < order.index("y+")
+    assert order.index("z+") < order.index("x-")
+    assert len(locks) == 0
@@ -0,0 +1,56 @@
+import pytest
+
+from utils.intents import IntentMatch
+from utils.slots import extract_slots
+
+
+def findcomment(text: str):
+    return extract_slots(IntentMatch("findcomment", []), text)
+
+
+@pytest.mark.parametrize("text, keyword", [
+    # Contoh dari tests.txt, tanpa tanda kutip
+    ("cari komentar love di video https://www.youtube.com/watch?v=dQw4w9WgXcQ", "love"),
+    ("temukan komen tentang bug dari video https://youtu.be/dQw4w9WgXcQ", "bug"),
+    ("cari komentar kocak di https://youtu.be/dQw4w9WgXcQ", "kocak"),
+    ("tampilkan komentar lagu enak dong https://youtu.be/dQw4w9WgXcQ", "lagu enak"),
+    ("lihat komen yang lucu atau kocak di https://youtu.be/dQw4w9WgXcQ ya", "lucu atau kocak"),
+    ("cari komentar wkwk https://youtu.be/dQw4w9WgXcQ deep scan", "wkwk"),
+])
+def test_unquoted_keyword_drops_trigger_words(text, keyword):
+    parsed = findcomment(text)
+    assert parsed.video_id == "dQw4w9WgXcQ"
+    assert parsed.keyword == keyword
+
+
+def test_quoted_keyword_kept_as_phrase():
+    parsed = findcomment('cari komentar "love" di video https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+    assert parsed.keyword == '"love"'
+
+
+def test_only_trigger_words_leaves_keyword_empty():
+    parsed = findcomment("cari komentar di video https://youtu.be/dQw4w9WgXcQ")
+    assert parsed.video_id == "dQw4w9WgXcQ"
+    assert parsed.keyword is None
+
+
+@pytest.mark.parametrize("text", [
+    "tampilkan komentar terbaru di kanal ini",
+    "cari komentar di channel itu dong",
+    "cari komentar lucu di channel kamu",
+])
+def test_channel_pronoun_is_not_a_channel(text):
+    parsed = findcomment(text)
+    assert parsed.query is None and parsed.channel_handle is None
+
+
+@pytest.mark.parametrize("text, handle, channel_id", [
+    ('cari komentar "giveaway" di channel @mrbeast', "mrbeast", None),
+    ('cari komentar "giveaway" @mrbeast', "mrbeast", None),
+    ('cari komentar "bug" di https://www.youtube.com/channel/UC1234567890', None, "UC1234567890"),
+])
+def test_channel_target(text, handle, channel_id):
+    parsed = findcomment(text)
+    assert parsed.channel_handle == handle
+    assert parsed.channel_id == channel_id
+    assert parsed.keyword is not None
@@ -0,0 +1,18 @@
+from utils.state import ConversationStore
+
+
+def test_get_refreshes_lru_position():
+    store = ConversationStore(max_size=2)
+    store.set("a", "owner", "step")
+    store.set("b", "owner", "step")
+    assert store.get("a") is not None
+    store.set("c", "owner", "step")
+    assert store.get("a") is not None
+    assert store.get("b") is None
+
+
+def test_expired_state_is_dropped():
+    store = ConversationStore(ttl=0)
+    store.set("a", "owner", "step")
+    assert store.get("a") is None
+    assert len(store) == 0
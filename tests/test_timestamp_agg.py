@@ -0,0 +1,35 @@
+from utils.timestamp_agg import TimestampAggregator
+
+
+def comment(text: str, likes: int = 0) -> dict:
+    return {"textDisplay": text, "likeCount": likes}
+
+
+def test_neighbouring_seconds_form_one_moment():
+    agg = TimestampAggregator(duration=600)
+    agg.add_page([comment("1:23 drop"), comment("1:24 drop!"), comment("1:25"), comment("5:00 ending")])
+    moments = agg.top(5)
+    assert [(m.start, m.end, m.mentions) for m in moments] == [(83, 85, 3), (300, 300, 1)]
+
+
+def test_snippet_comes_from_linked_second():
+    agg = TimestampAggregator(duration=600)
+    agg.add_page([comment("1:23 bagian ini"), comment("1:23 mantap"), comment("1:23 wow"),
+                  comment("1:25 tetangga", likes=1)])
+    moment = agg.top(1)[0]
+    assert (moment.second, moment.start, moment.end) == (83, 83, 85)
+    assert moment.snippet.startswith("1:23")
+
+
+def test_rejects_timestamps_past_duration():
+    agg = TimestampAggregator(duration=60)
+    agg.add_page([comment("0:30 dan 2:00")])
+    assert agg.rejected == 1
+    assert [m.second for m in agg.top(3)] == [30]
+
+
+def test_unknown_duration_grows_histogram():
+    agg = TimestampAggregator()
+    agg.add_page([comment("10:00")])
+    agg.add_page([comment("1:00:00")])
+    assert sorted(m.second for m in agg.top(3)) == [600, 3600]
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 0.015  # detik menunggu lookup lain sebelum batch dikirim
+DEFAULT_MAX_BATCH = 50  # batas ID per request videos.list / channels.list
+
+
+class MicroBatcher:
+    """
+    Kumpulkan lookup per-ID yang datang hampir bersamaan lalu kirim sebagai satu request.
+
+    `fetch_many(keys, priority)` adalah coroutine yang mengembalikan {key: value};
+    key yang tidak ada di hasil akan mendapat None. Batch dikirim setelah `window` detik
+    sejak lookup pertama, atau segera saat sudah berisi `max_batch` key.
+    """
+
+    def __init__(self, fetch_many, window: float = DEFAULT_WINDOW, max_batch: int = DEFAULT_MAX_BATCH):
+        self.fetch_many = fetch_many
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = {}  # {key: future}
+        self._priority = None
+        self._timer = None
+        self.stats = {"lookups": 0, "batches": 0}
+
+    async def load(self, key, priority: int = 0):
+        self.stats["lookups"] += 1
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            # Prioritas batch = prioritas tertinggi (angka terkecil) di antara pemanggilnya
+            self._priority = priority if self._priority is None else min(self._priority, priority)
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        priority, self._priority = self._priority, None
+        self.stats["batches"] += 1
+        asyncio.get_running_loop().create_task(self._run(batch, priority))
+
+    async def _run(self, batch: dict, priority):
+        try:
+            results = await self.fetch_many(list(batch), priority)
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key) if results else None)
@@ -0,0 +1,96 @@
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+FRESH = "fresh"
+STALE = "stale"
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class CacheEntry:
+    __slots__ = ("value", "size", "fresh_until", "stale_until", "negative")
+
+    def __init__(self, value, size: int, fresh_until: float, stale_until: float, negative: bool):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until  # sebelum ini: langsung dipakai
+        self.stale_until = stale_until  # sebelum ini: dipakai sambil di-refresh di background
+        self.negative = negative        # hasil "tidak ditemukan"
+
+
+class ResponseCache:
+    """
+    Cache respons TTL + LRU dengan batas memori (perkiraan ukuran = panjang body respons).
+
+    lookup() mengembalikan (value, FRESH | STALE | None). Entri STALE masih boleh dipakai
+    (stale-while-revalidate); pemanggil yang memutuskan kapan me-refresh.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self.stats = {"hits": 0, "stale_hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None, None
+        now = time.monotonic()
+        if now >= entry.stale_until:
+            self._remove(key)
+            self.stats["misses"] += 1
+            return None, None
+        self._entries.move_to_end(key)
+        if entry.negative:
+            self.stats["negative_hits"] += 1
+        if now < entry.fresh_until:
+            self.stats["hits"] += 1
+            return entry.value, FRESH
+        self.stats["stale_hits"] += 1
+        return entry.value, STALE
+
+    def store(self, key, value, size: int, ttl: float, stale_ttl: float = 0, negative: bool = False):
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            return
+        now = time.monotonic()
+        self._entries[key] = CacheEntry(value, size, now + ttl, now + ttl + stale_ttl, negative)
+        self.total_bytes += size
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, key):
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+
+    def snapshot(self) -> dict:
+        """Counter hit/miss plus ukuran cache saat ini."""
+        lookups = sum(self.stats[k] for k in ("hits", "stale_hits", "misses"))
+        served = self.stats["hits"] + self.stats["stale_hits"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hit_ratio": round(served / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,110 @@
+import os
+import heapq
+import asyncio
+import inspect
+import logging
+
+from utils.comment_index import get_comment_index
+from utils.comment_store import PAGE_SIZE
+from utils.quota import INTERACTIVE, QuotaBudget
+from utils.youtube_api import iter_playlist_videos, uploads_playlist_id
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_SEARCH_QUOTA = int(os.getenv("CHANNEL_SEARCH_QUOTA", "150"))
+CHANNEL_SEARCH_VIDEOS = 25           # video upload terbaru yang diperiksa
+CHANNEL_SEARCH_COMMENTS = 300        # komentar per video (3 halaman)
+CHANNEL_SEARCH_CONCURRENCY = 4
+# Berhenti lebih awal jika top-K sudah penuh dan hasil terlemahnya setara
+# satu kata cocok pada komentar dengan ~20 like (1 + log(1 + 20))
+STRONG_HIT_SCORE = 4.0
+
+
+async def search_channel_comments(channel: dict, query: str, k: int = 10, max_videos: int = CHANNEL_SEARCH_VIDEOS,
+                                  comments_per_video: int = CHANNEL_SEARCH_COMMENTS,
+                                  concurrency: int = CHANNEL_SEARCH_CONCURRENCY,
+                                  budget_units: int = CHANNEL_SEARCH_QUOTA, min_score: float = STRONG_HIT_SCORE,
+                                  progress=None, priority: int = INTERACTIVE) -> dict:
+    """
+    Cari komentar yang cocok dengan `query` di video-video upload terbaru `channel`.
+
+    Playlist uploads ditelusuri satu task, video-videonya dikerjakan `concurrency` worker
+    (index komentar per video, lihat get_comment_index) dan hasilnya digabung ke satu top-K.
+    Biaya per video dihitung di muka (jumlah halaman maksimal) terhadap `budget_units`.
+    `progress(status)` (fungsi biasa atau coroutine) dipanggil setiap satu video selesai.
+
+    Return dict status (videos_scanned, hits, units_spent, stopped_early, budget_exhausted)
+    ditambah results: [(skor, video_id, judul, doc)] urut dari skor tertinggi.
+    """
+    playlist_id = uploads_playlist_id(channel)
+    budget = QuotaBudget(budget_units)
+    pages_per_video = -(-comments_per_video // PAGE_SIZE)
+    videos = asyncio.Queue(maxsize=concurrency * 2)
+    top = []      # min-heap (skor, urutan, video_id, judul, doc)
+    status = {"videos_scanned": 0, "hits": 0, "units_spent": 0, "stopped_early": False, "budget_exhausted": False}
+    stop = asyncio.Event()
+    order = 0
+
+    def strong_enough() -> bool:
+        return len(top) >= k and top[0][0] >= min_score
+
+    async def walk_uploads():
+        if not playlist_id:
+            return
+        playlist = iter_playlist_videos(playlist_id, max_videos, priority=priority, budget=budget)
+        try:
+            async for video in playlist:
+                if stop.is_set():
+                    break
+                await videos.put(video)
+        finally:
+            await playlist.aclose()
+
+    async def search_videos():
+        nonlocal order
+        while True:
+            video = await videos.get()
+            if video is None:
+                return
+            if stop.is_set():
+                continue
+            if not budget.take("commentThreads", pages_per_video):
+                status["budget_exhausted"] = True
+                stop.set()
+                continue
+            video_id, title = video
+            try:
+                index = await get_comment_index(video_id, comments_per_video, priority)
+                for score, doc in index.search_scored(query, k):
+                    order += 1
+                    entry = (score, -order, video_id, title, doc)
+                    if len(top) < k:
+                        heapq.heappush(top, entry)
+                    elif entry > top[0]:
+                        heapq.heapreplace(top, entry)
+            except Exception:
+                logger.exception("Channel comment search failed on video %s", video_id)
+            status["videos_scanned"] += 1
+            status["hits"] = len(top)
+            status["units_spent"] = budget.spent
+            if strong_enough() and not stop.is_set():
+                status["stopped_early"] = True
+                stop.set()
+            if progress is not None:
+                result = progress(dict(status))
+                if inspect.isawaitable(result):
+                    await result
+
+    workers = [asyncio.ensure_future(search_videos()) for _ in range(concurrency)]
+    try:
+        await walk_uploads()
+        for _ in workers:
+            await videos.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+    status["units_spent"] = budget.spent
+    status["results"] = [(score, video_id, title, doc) for score, _, video_id, title, doc in sorted(top, reverse=True)]
+    return status
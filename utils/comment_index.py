@@ -0,0 +1,278 @@
+import re
+import math
+import time
+import heapq
+import logging
+import unicodedata
+from collections import OrderedDict
+
+from utils.comment_store import CORPUS_TTL, PAGE_SIZE, iter_corpus_pages
+from utils.quota import INTERACTIVE
+from utils.youtube_api import MAX_COMMENTS_TO_SCAN, comment_snippet, iter_deep_comments
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAX_COMMENTS = MAX_COMMENTS_TO_SCAN  # default per video; index lebih besar hanya lewat deep=True
+DEEP_INDEX_MAX_COMMENTS = 5000  # batas komentar + balasan dalam index deep scan
+MAX_INDEXED_VIDEOS = 32
+
+TOKEN_REGEX = re.compile(r"\w+")
+REPEAT_REGEX = re.compile(r"(\w)\1{2,}")          # "mantappp" -> "mantap", "kerennn" -> "keren"
+REPEAT_PAIR_REGEX = re.compile(r"(\w\w)\1{2,}")    # "wkwkwkwk" -> "wkwk", "hahaha" -> "haha"
+QUERY_TERM_REGEX = re.compile(r'(~?)(?:"([^"]+)"|(\|)|(\S+))')
+OR_WORDS = {"atau", "or"}
+MIN_STEM_LENGTH = 3
+FUZZY_MARK = "~"
+
+
+def normalize_token(token: str) -> str:
+    """Normalisasi token ID/EN: huruf kecil, tanpa aksen, huruf berulang dipadatkan, tanpa akhiran -nya."""
+    token = unicodedata.normalize("NFKD", token.lower())
+    token = "".join(ch for ch in token if not unicodedata.combining(ch))
+    token = REPEAT_PAIR_REGEX.sub(r"\1\1", token)
+    token = REPEAT_REGEX.sub(r"\1", token)
+    if token.endswith("nya") and len(token) - 3 >= MIN_STEM_LENGTH:
+        token = token[:-3]
+    return token
+
+def tokenize(text: str) -> list:
+    return [normalize_token(token) for token in TOKEN_REGEX.findall(text)]
+
+def parse_query(query: str) -> list:
+    """
+    Ubah query menjadi OR dari klausa AND. Kata dipisah spasi = AND, "atau" / "or" / "|" = OR,
+    teks dalam tanda kutip = frasa, awalan "~" = cocokkan juga kata yang mirip (typo).
+    Setiap term adalah (tuple token, fuzzy); tuple lebih dari satu token = frasa.
+    """
+    clauses = [[]]
+    for mark, phrase, bar, word in QUERY_TERM_REGEX.findall(query):
+        if bar or word.lower() in OR_WORDS:
+            clauses.append([])
+            continue
+        tokens = tuple(tokenize(phrase or word))
+        if tokens:
+            clauses[-1].append((tokens, mark == FUZZY_MARK))
+    return [clause for clause in clauses if clause]
+
+def max_edits(token: str) -> int:
+    """Jumlah typo yang ditoleransi: kata pendek harus persis."""
+    if len(token) <= 3:
+        return 0
+    return 1 if len(token) <= 5 else 2
+
+def trigrams(token: str) -> set:
+    padded = f"^{token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def bounded_edit_distance(a: str, b: str, limit: int):
+    """Jarak Levenshtein a-b, atau None jika lebih dari `limit` (hanya pita selebar limit yang dihitung)."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    inf = limit + 1
+    previous = [j if j <= limit else inf for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [inf] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost, inf)
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[len(b)] if previous[len(b)] <= limit else None
+
+
+class CommentIndex:
+    """
+    Inverted index komentar satu video: {token: {doc_id: [posisi, ...]}}.
+    Skor hasil = frekuensi term x (1 + log(1 + jumlah like)); top-K dipilih dengan heap.
+    Untuk pencarian fuzzy, kosakata index punya index trigram sendiri (dibangun saat pertama
+    dipakai): kandidat diambil dari trigram yang sama, lalu diverifikasi dengan edit distance.
+    """
+
+    def __init__(self, video_id: str, deep: bool = False, limit: int = None):
+        self.video_id = video_id
+        self.deep = deep     # dibangun dari deep scan (termasuk balasan)
+        self.limit = limit   # batas komentar saat dibangun (None = tanpa batas)
+        self.built_at = time.monotonic()
+        self.docs = []       # doc_id -> {"author", "likes", "text"}
+        self.postings = {}
+        self._comment_ids = set()
+        self._grams = None   # {trigram: set(token)} atas kosakata postings
+        self._lengths = None  # {panjang: set(token)}, dibangun bersama _grams
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, items: list):
+        """Indeks item commentThreads / comments (duplikat diabaikan)."""
+        for item in items:
+            comment_id = item.get("id")
+            if comment_id in self._comment_ids:
+                continue
+            top = comment_snippet(item)
+            if not top:
+                continue
+            self._comment_ids.add(comment_id)
+            doc_id = len(self.docs)
+            text = top.get("textDisplay", "")
+            self.docs.append({
+                "author": top.get("authorDisplayName", "Unknown"),
+                "likes": top.get("likeCount", 0) or 0,
+                "text": text,
+            })
+            for position, token in enumerate(tokenize(text)):
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = {}
+                    if self._grams is not None:
+                        self._add_grams(token)
+                postings.setdefault(doc_id, []).append(position)
+
+    def _add_grams(self, token: str):
+        for gram in trigrams(token):
+            self._grams.setdefault(gram, set()).add(token)
+        self._lengths.setdefault(len(token), set()).add(token)
+
+    def similar_tokens(self, token: str) -> dict:
+        """{token kosakata: jarak} untuk token dalam batas max_edits(token)."""
+        limit = max_edits(token)
+        if limit == 0:
+            return {token: 0} if token in self.postings else {}
+        if self._grams is None:
+            self._grams = {}
+            self._lengths = {}
+            for known in self.postings:
+                self._add_grams(known)
+        # Satu edit merusak paling banyak 3 trigram
+        query_grams = trigrams(token)
+        needed = len(query_grams) - 3 * limit
+        if needed > 0:
+            candidates = {}
+            for gram in query_grams:
+                for known in self._grams.get(gram, ()):
+                    candidates[known] = candidates.get(known, 0) + 1
+            candidates = [known for known, count in candidates.items() if count >= needed]
+        else:
+            # Token pendek: kandidat yang mirip bisa tidak berbagi trigram sama sekali,
+            # jadi periksa semua kosakata dengan panjang dalam ±limit
+            candidates = [known for length in range(len(token) - limit, len(token) + limit + 1)
+                          for known in self._lengths.get(length, ())]
+        similar = {}
+        for known in candidates:
+            distance = bounded_edit_distance(token, known, limit)
+            if distance is not None:
+                similar[known] = distance
+        return similar
+
+    def _token_docs(self, token: str, fuzzy: bool) -> dict:
+        if not fuzzy:
+            return {doc_id: len(positions) for doc_id, positions in self.postings.get(token, {}).items()}
+        # Kata yang mirip dihitung dengan bobot lebih kecil dari kecocokan persis
+        result = {}
+        for known, distance in self.similar_tokens(token).items():
+            weight = 1 / (1 + distance)
+            for doc_id, positions in self.postings[known].items():
+                result[doc_id] = max(result.get(doc_id, 0), len(positions) * weight)
+        return result
+
+    def _term_docs(self, term: tuple, fuzzy: bool = False) -> dict:
+        """{doc_id: frekuensi} untuk satu token atau frasa (frasa selalu dicocokkan persis)."""
+        if len(term) == 1:
+            return self._token_docs(term[0], fuzzy)
+        lists = [self.postings.get(token) for token in term]
+        if not all(lists):
+            return {}
+        # Mulai dari token paling jarang, lalu cek posisi berurutan
+        rarest = min(range(len(term)), key=lambda i: len(lists[i]))
+        result = {}
+        for doc_id in lists[rarest]:
+            if not all(doc_id in postings for postings in lists):
+                continue
+            following = [set(postings[doc_id]) for postings in lists[1:]]
+            count = sum(
+                1 for start in lists[0][doc_id]
+                if all(start + offset in positions for offset, positions in enumerate(following, 1))
+            )
+            if count:
+                result[doc_id] = count
+        return result
+
+    def search(self, query: str, k: int = 10, fuzzy: bool = False) -> list:
+        """Top-k komentar yang cocok dengan query (lihat parse_query); fuzzy=True untuk semua term."""
+        return [doc for _, doc in self.search_scored(query, k, fuzzy)]
+
+    def search_scored(self, query: str, k: int = 10, fuzzy: bool = False) -> list:
+        """Seperti search(), tapi return [(skor, doc)] agar hasil beberapa index bisa digabung."""
+        scores = {}
+        for clause in parse_query(query):
+            matched = None
+            # Term dengan posting paling sedikit dulu agar irisan cepat mengecil
+            clause = sorted(clause, key=lambda t: min(len(self.postings.get(token, ())) for token in t[0]))
+            for term, term_fuzzy in clause:
+                term_docs = self._term_docs(term, fuzzy or term_fuzzy)
+                if matched is None:
+                    matched = term_docs
+                else:
+                    matched = {doc_id: tf + term_docs[doc_id] for doc_id, tf in matched.items() if doc_id in term_docs}
+                if not matched:
+                    break
+            for doc_id, tf in (matched or {}).items():
+                score = tf * (1 + math.log1p(self.docs[doc_id]["likes"]))
+                if score > scores.get(doc_id, 0):
+                    scores[doc_id] = score
+        top = heapq.nlargest(k, scores.items(), key=lambda kv: (kv[1], -kv[0]))
+        return [(score, self.docs[doc_id]) for doc_id, score in top]
+
+    def covers(self, max_comments: int, deep: bool) -> bool:
+        """Apakah index ini cukup untuk permintaan dengan batas/mode tersebut."""
+        if deep:
+            return self.deep
+        return self.deep or self.limit is None or self.limit >= max_comments
+
+
+_indexes = OrderedDict()  # {video_id: CommentIndex}, LRU
+_builds = SingleFlight()
+
+async def get_comment_index(video_id: str, max_comments: int = INDEX_MAX_COMMENTS,
+                            priority: int = INTERACTIVE, deep: bool = False, on_page=None) -> CommentIndex:
+    """
+    Index komentar video; dibangun sekali dari corpus lalu dipakai ulang selama CORPUS_TTL.
+    deep=True membangun index dari deep scan (termasuk balasan, dibatasi DEEP_INDEX_MAX_COMMENTS).
+    `on_page(index)` dipanggil setiap satu halaman masuk saat index dibangun oleh panggilan ini.
+    """
+    index = _indexes.get(video_id)
+    if index is not None and time.monotonic() - index.built_at < CORPUS_TTL and index.covers(max_comments, deep):
+        _indexes.move_to_end(video_id)
+        return index
+    return await _builds.do(("comment-index", video_id, max_comments, deep),
+                            lambda: _build_index(video_id, max_comments, priority, deep, on_page))
+
+async def _build_index(video_id: str, max_comments: int, priority: int, deep: bool = False,
+                       on_page=None) -> CommentIndex:
+    limit = DEEP_INDEX_MAX_COMMENTS if deep else max_comments
+    index = CommentIndex(video_id, deep, limit)
+    if deep:
+        pages = iter_deep_comments(video_id)
+    else:
+        pages = iter_corpus_pages(video_id, max_pages=-(-max_comments // PAGE_SIZE), max_comments=max_comments,
+                                  priority=priority)
+    try:
+        async for page in pages:
+            index.add(page[:limit - len(index)])
+            if on_page is not None:
+                on_page(index)
+            if len(index) >= limit:
+                break
+    finally:
+        await pages.aclose()
+    if len(index):
+        _indexes[video_id] = index
+        _indexes.move_to_end(video_id)
+        while len(_indexes) > MAX_INDEXED_VIDEOS:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+
+import aiohttp
+
+from utils.quota import INTERACTIVE
+from utils.singleflight import KeyedLock
+from utils.youtube_api import MAX_COMMENT_PAGES, MAX_COMMENTS_TO_SCAN, iter_comment_responses
+
+logger = logging.getLogger(__name__)
+
+COMMENT_DB_PATH = os.getenv("COMMENT_DB_PATH", os.path.join("data", "comments.sqlite3"))
+CORPUS_TTL = 15 * 60        # corpus lebih muda dari ini dipakai langsung tanpa request API
+CORPUS_MAX_AGE = 6 * 3600   # lebih tua dari ini diambil ulang penuh (jumlah like ikut segar)
+MAX_STORED_VIDEOS = 500
+MAX_STORED_COMMENTS = 5000  # per video
+PAGE_SIZE = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS corpus (
+    video_id TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    next_page_token TEXT
+);
+CREATE TABLE IF NOT EXISTS comments (
+    video_id TEXT NOT NULL,
+    comment_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    PRIMARY KEY (video_id, comment_id)
+);
+CREATE INDEX IF NOT EXISTS comments_by_position ON comments (video_id, position);
+"""
+
+
+class CommentStore:
+    """
+    Corpus commentThreads per video di SQLite, urut dari yang terbaru (position kecil = baru).
+
+    next_page_token adalah cursor API setelah komentar tertua yang tersimpan, dipakai untuk
+    melanjutkan crawl jika corpus belum mencapai jumlah yang diminta.
+    """
+
+    def __init__(self, path: str = COMMENT_DB_PATH, max_videos: int = MAX_STORED_VIDEOS,
+                 max_comments: int = MAX_STORED_COMMENTS):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self.max_videos = max_videos
+        self.max_comments = max_comments
+
+    def close(self):
+        self.db.close()
+
+    def get_meta(self, video_id: str):
+        """Return (fetched_at, next_page_token) atau None jika video belum pernah disimpan."""
+        return self.db.execute(
+            "SELECT fetched_at, next_page_token FROM corpus WHERE video_id = ?", (video_id,)
+        ).fetchone()
+
+    def load(self, video_id: str, limit: int = None, offset: int = 0) -> list:
+        rows = self.db.execute(
+            "SELECT item FROM comments WHERE video_id = ? ORDER BY position LIMIT ? OFFSET ?",
+            (video_id, -1 if limit is None else limit, offset),
+        )
+        return [json.loads(item) for (item,) in rows]
+
+    def count(self, video_id: str) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM comments WHERE video_id = ?", (video_id,)).fetchone()[0]
+
+    def known_ids(self, video_id: str) -> set:
+        rows = self.db.execute("SELECT comment_id FROM comments WHERE video_id = ?", (video_id,))
+        return {comment_id for (comment_id,) in rows}
+
+    def replace(self, video_id: str, items: list, next_page_token: str = None):
+        """Ganti seluruh corpus video dengan hasil crawl baru."""
+        with self.db:
+            self.db.execute("DELETE FROM comments WHERE video_id = ?", (video_id,))
+            self._insert(video_id, items, 0)
+            self._set_meta(video_id, time.time(), next_page_token)
+        self._evict_videos()
+
+    def prepend(self, video_id: str, items: list):
+        """Tambahkan komentar yang lebih baru dari corpus (hasil refresh inkremental)."""
+        with self.db:
+            first = self.db.execute(
+                "SELECT MIN(position) FROM comments WHERE video_id = ?", (video_id,)
+            ).fetchone()[0] or 0
+            self._insert(video_id, items, first - len(items))
+            token = self.get_meta(video_id)[1]
+            if self.count(video_id) > self.max_comments:
+                self._trim(video_id)
+                token = None  # komentar tertua dibuang, cursor tidak lagi bersambung
+            self._set_meta(video_id, time.time(), token)
+
+    def append(self, video_id: str, items: list, next_page_token: str = None):
+        """Sambung komentar yang lebih lama (lanjutan crawl dari next_page_token)."""
+        with self.db:
+            last = self.db.execute(
+                "SELECT MAX(position) FROM comments WHERE video_id = ?", (video_id,)
+            ).fetchone()[0]
+            self._insert(video_id, items, 0 if last is None else last + 1)
+            if self.count(video_id) > self.max_comments:
+                self._trim(video_id)
+                next_page_token = None
+            self.db.execute("UPDATE corpus SET next_page_token = ? WHERE video_id = ?", (next_page_token, video_id))
+
+    def _insert(self, video_id: str, items: list, start: int):
+        self.db.executemany(
+            "INSERT OR IGNORE INTO comments (video_id, comment_id, position, item) VALUES (?, ?, ?, ?)",
+            [(video_id, item.get("id"), start + i, json.dumps(item, separators=(",", ":")))
+             for i, item in enumerate(items) if item.get("id")],
+        )
+
+    def _set_meta(self, video_id: str, fetched_at: float, next_page_token: str):
+        self.db.execute(
+            "INSERT OR REPLACE INTO corpus (video_id, fetched_at, next_page_token) VALUES (?, ?, ?)",
+            (video_id, fetched_at, next_page_token),
+        )
+
+    def _trim(self, video_id: str):
+        self.db.execute(
+            "DELETE FROM comments WHERE video_id = ? AND position >= ("
+            "SELECT position FROM comments WHERE video_id = ? ORDER BY position LIMIT 1 OFFSET ?)",
+            (video_id, video_id, self.max_comments),
+        )
+
+    def _evict_videos(self):
+        stale = self.db.execute(
+            "SELECT video_id FROM corpus ORDER BY fetched_at DESC LIMIT -1 OFFSET ?", (self.max_videos,)
+        ).fetchall()
+        if not stale:
+            return
+        with self.db:
+            self.db.executemany("DELETE FROM comments WHERE video_id = ?", stale)
+            self.db.executemany("DELETE FROM corpus WHERE video_id = ?", stale)
+
+
+_store = None
+# Satu crawl corpus per video sekaligus: permintaan bersamaan untuk video yang sama
+# menunggu, lalu dilayani dari corpus yang baru disimpan tanpa crawl ulang
+_crawl_locks = KeyedLock()
+
+def get_comment_store() -> CommentStore:
+    global _store
+    if _store is None:
+        _store = CommentStore()
+    return _store
+
+def close_comment_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+async def iter_corpus_pages(video_id: str, max_pages: int = MAX_COMMENT_PAGES,
+                            max_comments: int = MAX_COMMENTS_TO_SCAN, session: aiohttp.ClientSession = None,
+                            priority: int = INTERACTIVE):
+    """
+    Async generator: yield halaman commentThreads (list item), total paling banyak `max_comments`,
+    lewat corpus di disk:
+    - corpus segar (< CORPUS_TTL): dilayani dari SQLite tanpa request API;
+    - corpus basi (< CORPUS_MAX_AGE): hanya halaman terbaru yang diambil sampai bertemu
+      komentar yang sudah dikenal, sisanya dari SQLite;
+    - selain itu: crawl penuh, hasilnya disimpan (juga jika konsumen berhenti di tengah).
+    Pemanggil bersamaan untuk video yang sama dilayani bergantian (lihat _crawl_locks).
+    """
+    async with _crawl_locks.hold(video_id):
+        store = get_comment_store()
+        meta = store.get_meta(video_id)
+        age = time.time() - meta[0] if meta else None
+        if meta is None or age >= CORPUS_MAX_AGE:
+            source = _crawl(store, video_id, None, max_pages, max_comments, session, priority, replace=True)
+        elif age >= CORPUS_TTL:
+            source = _refresh_head(store, video_id, max_pages, max_comments, session, priority)
+        else:
+            source = _serve_stored(store, video_id, 0, max_pages, max_comments, session, priority)
+
+        yielded = 0
+        try:
+            async for page_items in source:
+                page_items = page_items[:max_comments - yielded]
+                yielded += len(page_items)
+                if page_items:
+                    yield page_items
+                if yielded >= max_comments:
+                    break
+        finally:
+            await source.aclose()
+
+async def _crawl(store: CommentStore, video_id: str, page_token, max_pages: int, max_comments: int,
+                 session, priority: int, replace: bool):
+    responses = iter_comment_responses(video_id, max_pages, max_comments, session, priority, page_token=page_token)
+    collected = []
+    next_token = page_token
+    received = False
+    try:
+        async for page_items, next_token in responses:
+            received = True
+            collected.extend(page_items)
+            yield page_items
+    finally:
+        await responses.aclose()
+        # Simpan yang sudah terkumpul beserta cursor-nya; request gagal tidak menimpa corpus lama
+        if received:
+            if replace:
+                store.replace(video_id, collected, next_token)
+            elif collected:
+                store.append(video_id, collected, next_token)
+
+async def _refresh_head(store: CommentStore, video_id: str, max_pages: int, max_comments: int,
+                        session, priority: int):
+    responses = iter_comment_responses(video_id, max_pages, max_comments, session, priority)
+    known = store.known_ids(video_id)
+    new_items = []
+    overlap = False
+    received = False
+    last_token = None
+    try:
+        async for page_items, last_token in responses:
+            received = True
+            fresh = []
+            for item in page_items:
+                if item.get("id") in known:
+                    overlap = True
+                    break
+                fresh.append(item)
+            new_items.extend(fresh)
+            if fresh:
+                yield fresh
+            if overlap:
+                break
+    finally:
+        await responses.aclose()
+        # Disimpan di sini (seperti _crawl) agar head tetap tersimpan jika konsumen berhenti di tengah
+        if received:
+            if overlap:
+                store.prepend(video_id, new_items)
+            else:
+                # Belum bertemu komentar lama (halaman habis / konsumen berhenti): di antara head
+                # dan corpus lama mungkin ada celah, jadi corpus diganti head + cursor-nya
+                store.replace(video_id, new_items, last_token)
+
+    # API tidak tersedia (mis. kuota habis): pakai corpus lama apa adanya
+    offset = len(new_items) if received else 0
+    if offset >= max_comments:
+        return
+    # Sisanya dari SQLite (overlap) atau lanjutan crawl dari cursor head (corpus diganti)
+    stored = _serve_stored(store, video_id, offset, max_pages, max_comments, session, priority)
+    try:
+        async for page_items in stored:
+            yield page_items
+    finally:
+        await stored.aclose()
+
+async def _serve_stored(store: CommentStore, video_id: str, offset: int, max_pages: int, max_comments: int,
+                        session, priority: int):
+    items = store.load(video_id, max_comments - offset, offset)
+    for start in range(0, len(items), PAGE_SIZE):
+        yield items[start:start + PAGE_SIZE]
+
+    stored = offset + len(items)
+    token = store.get_meta(video_id)[1]
+    pages_left = max_pages - -(-stored // PAGE_SIZE)
+    if token and stored < max_comments and pages_left > 0:
+        crawl = _crawl(store, video_id, token, pages_left, max_comments - stored, session, priority, replace=False)
+        try:
+            async for page_items in crawl:
+                yield page_items
+        finally:
+            await crawl.aclose()
@@ -0,0 +1,168 @@
+import asyncio
+import math
+import logging
+
+from utils.state import ConversationStore, get_conversation_store
+
+logger = logging.getLogger(__name__)
+
+DIALOG_OWNER = "dialog"
+DEFAULT_DIALOG_TIMEOUT = 30
+
+
+class DialogStep:
+    """
+    Satu pertanyaan lanjutan yang menunggu jawaban user (pengganti bot.wait_for).
+
+    - parse(message) -> nilai jawaban, atau None jika jawabannya tidak valid
+    - on_answer(message, value, data) dipanggil sekali saat jawaban valid datang
+    - on_timeout(data) dipanggil jika tidak ada jawaban sampai `timeout` detik
+    - fallthrough=True: jawaban tidak valid diteruskan ke deteksi intent biasa dan
+      pertanyaan tetap menunggu (sama seperti check() pada wait_for)
+    """
+
+    __slots__ = ("name", "parse", "on_answer", "on_timeout", "timeout", "fallthrough")
+
+    def __init__(self, name: str, on_answer, parse=None, on_timeout=None,
+                 timeout: float = DEFAULT_DIALOG_TIMEOUT, fallthrough: bool = False):
+        self.name = name
+        self.on_answer = on_answer
+        self.parse = parse or (lambda message: message.content)
+        self.on_timeout = on_timeout
+        self.timeout = timeout
+        self.fallthrough = fallthrough
+
+
+class TimerWheel:
+    """
+    Timer wheel sederhana: `size` slot dengan resolusi `tick` detik.
+    schedule/cancel O(1); satu task membangunkan diri sekali per tick hanya selama ada timer.
+    """
+
+    def __init__(self, callback, tick: float = 1.0, size: int = 64):
+        self.callback = callback
+        self.tick = tick
+        self.size = size
+        self._slots = [{} for _ in range(size)]  # per slot: {key: sisa putaran}
+        self._where = {}  # {key: indeks slot}
+        self._cursor = 0
+        self._task = None
+
+    def __len__(self):
+        return len(self._where)
+
+    def schedule(self, key, delay: float):
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        idx = (self._cursor + ticks) % self.size
+        self._slots[idx][key] = (ticks - 1) // self.size
+        self._where[key] = idx
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def cancel(self, key):
+        idx = self._where.pop(key, None)
+        if idx is not None:
+            self._slots[idx].pop(key, None)
+
+    def _advance(self) -> list:
+        self._cursor = (self._cursor + 1) % self.size
+        bucket = self._slots[self._cursor]
+        expired = []
+        for key, rounds in list(bucket.items()):
+            if rounds > 0:
+                bucket[key] = rounds - 1
+            else:
+                del bucket[key]
+                del self._where[key]
+                expired.append(key)
+        return expired
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick
+        while self._where:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            # Kejar tick yang terlewat jika event loop sempat sibuk
+            while next_tick <= loop.time() and self._where:
+                next_tick += self.tick
+                for key in self._advance():
+                    try:
+                        self.callback(key)
+                    except Exception:
+                        logger.exception("Timer callback failed for %s", key)
+
+
+class DialogManager:
+    """
+    Mesin state untuk pertanyaan lanjutan. Pertanyaan yang terbuka disimpan di
+    ConversationStore (owner "dialog"), jadi tiap pesan masuk cukup satu lookup dict;
+    kedaluwarsa ditangani TimerWheel, bukan coroutine yang menunggu.
+    """
+
+    def __init__(self, store: ConversationStore, tick: float = 1.0):
+        self.store = store
+        self.intent_engine = None  # diisi Chatbot; dipakai answer_text untuk mengenali intent lain
+        self.wheel = TimerWheel(self._expire, tick=tick)
+        store.register(DIALOG_OWNER, self._on_reply)
+
+    def ask(self, message, step: DialogStep, data=None):
+        """Mulai menunggu jawaban `step` dari penulis `message` di channel yang sama."""
+        key = ConversationStore.key_for(message)
+        # TTL store dibuat sedikit lebih lama agar timer wheel yang memanggil on_timeout
+        self.store.set(key, DIALOG_OWNER, step.name, (step, data), ttl=step.timeout + self.wheel.tick * 2)
+        self.wheel.schedule(key, step.timeout)
+
+    def answer_text(self, message):
+        """
+        parse untuk jawaban teks bebas: pesan yang dikenali sebagai intent lain ditolak,
+        jadi dengan fallthrough=True permintaan baru tetap diproses seperti biasa.
+        """
+        content = message.content
+        if self.intent_engine is not None and self.intent_engine.match(content.lower()) is not None:
+            return None
+        return content
+
+    def cancel(self, message):
+        key = ConversationStore.key_for(message)
+        state = self.store.get(key)
+        if state is not None and state.owner == DIALOG_OWNER:
+            self.store.pop(key)
+        self.wheel.cancel(key)
+
+    async def _on_reply(self, message, state):
+        step, data = state.data
+        value = step.parse(message)
+        if value is None:
+            # Jawaban tidak valid: biarkan router lanjut ke deteksi intent jika diizinkan
+            return not step.fallthrough
+        key = ConversationStore.key_for(message)
+        self.store.pop(key)
+        self.wheel.cancel(key)
+        await step.on_answer(message, value, data)
+        return True
+
+    def _expire(self, key):
+        state = self.store.get(key)
+        if state is None or state.owner != DIALOG_OWNER:
+            return  # Sudah dijawab atau diganti percakapan lain
+        self.store.pop(key)
+        step, data = state.data
+        if step.on_timeout is not None:
+            asyncio.get_running_loop().create_task(self._run_timeout(step, data))
+
+    @staticmethod
+    async def _run_timeout(step: DialogStep, data):
+        try:
+            await step.on_timeout(data)
+        except Exception:
+            logger.exception("Dialog timeout handler %s failed", step.name)
+
+
+def get_dialog_manager(bot) -> DialogManager:
+    """Ambil DialogManager milik bot, dibuat saat pertama kali dibutuhkan."""
+    manager = getattr(bot, "dialogs", None)
+    if manager is None:
+        manager = DialogManager(get_conversation_store(bot))
+        bot.dialogs = manager
+    return manager
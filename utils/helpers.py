@@ -25,6 +25,15 @@ def iso8601_duration_to_readable(duration: str):
     else:
         return f"{m_}:{s:02d}"
 
+def iso8601_duration_to_seconds(duration: str):
+    """Durasi ISO 8601 (contentDetails.duration) ke detik; None jika tidak dikenali atau 0 (live)."""
+    m = re.match(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$', duration or "")
+    if not m:
+        return None
+    days, hours, minutes, seconds = (int(part) if part else 0 for part in m.groups())
+    total = ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+    return total or None
+
 def parse_video_arg_and_keyword(arg: str):
     arg = arg.strip()
     m = re.match(r'(\S+)\s+"(.+)"$', arg)
@@ -54,3 +63,13 @@ def seconds_to_hms(sec: int) -> str:
         return f"{h}:{m:02d}:{s:02d}"
     else:
         return f"{m}:{s:02d}"
+
+def parse_duration(duration_str: str) -> int:
+    """Ubah string durasi (e.g., "5m", "1h") menjadi detik."""
+    if not duration_str:
+        return 0
+    match = re.match(r"(\d+)([smhd])", duration_str.lower())
+    if not match:
+        return 0
+    value, unit = match.groups()
+    return int(value) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[unit]
@@ -0,0 +1,39 @@
+import logging
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Batas koneksi: total dan per host (hampir semua request ke googleapis.com)
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 30
+DNS_CACHE_TTL = 300  # detik
+KEEPALIVE_TIMEOUT = 60  # detik koneksi idle tetap dibuka untuk dipakai ulang
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=20, connect=5, sock_read=15)
+
+_shared_session = None
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    """ClientSession dengan connector ter-pool (keep-alive, DNS cache, batas koneksi)."""
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=DEFAULT_TIMEOUT)
+
+
+def set_http_session(session):
+    """Pasang session milik bot (dibuat di main.py) sebagai session default helper fetch_*."""
+    global _shared_session
+    _shared_session = session
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Session bersama; dibuat otomatis jika belum dipasang (mis. saat dipakai dari skrip)."""
+    global _shared_session
+    if _shared_session is None or _shared_session.closed:
+        logger.info("Creating shared HTTP session")
+        _shared_session = create_http_session()
+    return _shared_session
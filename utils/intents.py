@@ -0,0 +1,97 @@
+import re
+
+# Pesan yang lebih panjang dari ini dicocokkan dengan mode terbatas (lihat IntentEngine.match)
+MAX_SCAN_LENGTH = 2000
+
+
+class IntentMatch:
+    """Hasil deteksi intent: nama intent dan span (start, end) bagian pesan yang cocok."""
+
+    __slots__ = ("intent", "spans")
+
+    def __init__(self, intent: str, spans):
+        self.intent = intent
+        self.spans = spans
+
+    def __repr__(self):
+        return f"IntentMatch(intent={self.intent!r}, spans={self.spans!r})"
+
+
+class IntentEngine:
+    """
+    Mesin deteksi intent yang dikompilasi sekali saat cog dimuat.
+
+    Setiap intent punya regex lengkap (urutan dict = prioritas) dan daftar grup kata kunci.
+    Pesan dipindai sekali dengan satu regex gabungan semua kata kunci; regex lengkap
+    (dengan lookahead-nya) hanya dijalankan untuk intent yang semua grup kata kuncinya muncul.
+    Kata kunci harus merupakan syarat perlu dari regex-nya, bukan syarat cukup.
+    """
+
+    def __init__(self, patterns: dict, keywords: dict, max_length: int = MAX_SCAN_LENGTH):
+        self.max_length = max_length
+        self.order = list(patterns)
+        self.compiled = {name: re.compile(p) for name, p in patterns.items()}
+
+        # {intent: [set kata kunci grup 1, set kata kunci grup 2, ...]}
+        self.groups = {}
+        literals = set()
+        for name in self.order:
+            groups = [set(kw.lower() for kw in group) for group in keywords.get(name, [])]
+            self.groups[name] = groups
+            for group in groups:
+                literals.update(group)
+
+        # Satu posisi hanya menghasilkan satu literal (yang terpanjang), jadi literal
+        # lain yang merupakan prefiksnya ikut dicatat agar tidak ada yang terlewat.
+        self._implied = {
+            lit: frozenset(other for other in literals if lit.startswith(other))
+            for lit in literals
+        }
+        alternation = "|".join(re.escape(lit) for lit in sorted(literals, key=len, reverse=True))
+        self._scanner = re.compile(f"(?=({alternation}))") if literals else None
+
+    def keyword_hits(self, text: str) -> set:
+        """Satu kali pindai: kumpulan kata kunci yang muncul di `text` (harus sudah lowercase)."""
+        hits = set()
+        if self._scanner is None:
+            return hits
+        implied = self._implied
+        for m in self._scanner.finditer(text):
+            lit = m.group(1)
+            if lit not in hits:
+                hits |= implied[lit]
+        return hits
+
+    def candidates(self, text: str, hits=None) -> list:
+        """Intent (urut prioritas) yang lolos prefilter kata kunci."""
+        if hits is None:
+            hits = self.keyword_hits(text)
+        result = []
+        for name in self.order:
+            groups = self.groups[name]
+            if all(not group.isdisjoint(hits) for group in groups):
+                result.append(name)
+        return result
+
+    def match(self, text: str):
+        """
+        Kembalikan IntentMatch pertama (menurut prioritas) atau None jika tidak ada.
+
+        Untuk pesan yang lebih panjang dari `max_length`, prefilter tetap memindai seluruh
+        pesan (linear), tapi regex lengkap hanya dijalankan pada `max_length` karakter
+        pertama, sehingga waktu match terbatas apa pun isi pesannya.
+        """
+        candidates = self.candidates(text)
+        if len(text) > self.max_length:
+            text = text[:self.max_length]
+        for name in candidates:
+            m = self.compiled[name].search(text)
+            if m:
+                return IntentMatch(name, _match_spans(m))
+        return None
+
+
+def _match_spans(m) -> list:
+    """Span grup yang terisi; untuk pola lookahead ini adalah posisi tiap kata kunci."""
+    spans = [span for span in m.regs[1:] if span[0] != -1]
+    return spans or [m.span()]
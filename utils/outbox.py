@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 0.1      # detik menunggu kiriman lain ke channel yang sama sebelum dikirim
+MAX_CONTENT_LENGTH = 2000  # batas karakter satu pesan Discord
+MAX_EMBEDS = 10            # batas embed per pesan Discord
+
+
+class _Outgoing:
+    __slots__ = ("content", "embeds", "kwargs", "future")
+
+    def __init__(self, content, embeds, kwargs, future):
+        self.content = content
+        self.embeds = embeds
+        self.kwargs = kwargs    # view, file, reference, ...: tidak bisa digabung
+        self.future = future
+
+    @property
+    def mergeable(self) -> bool:
+        return not self.kwargs
+
+
+class Outbox:
+    """
+    Antrean pesan keluar per channel. Kiriman ke channel yang sama dalam `window` detik
+    digabung jadi satu pesan (konten disambung per baris, embed dikumpulkan), dan hanya ada
+    satu kiriman berjalan per channel, jadi lebih sedikit slot rate limit yang terpakai.
+
+    post() tidak menunggu (return future berisi Message); send() menunggu Message-nya.
+    Kiriman yang ditunggu berurutan (await send lalu await send) tidak akan tergabung,
+    jadi pakai post() untuk pesan yang tidak perlu diedit lagi.
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW):
+        self.window = window
+        self._queues = {}   # {channel_id: deque[_Outgoing]}
+        self._drains = {}   # {channel_id: task}
+        self.stats = {"queued": 0, "sent": 0, "merged": 0, "failed": 0}
+
+    def post(self, channel, content: str = None, *, embed=None, embeds=None, **kwargs) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        # Kegagalan kiriman fire-and-forget sudah di-log di _drain
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        item_embeds = list(embeds or ([embed] if embed is not None else []))
+        self._queues.setdefault(channel.id, deque()).append(_Outgoing(content, item_embeds, kwargs, future))
+        self.stats["queued"] += 1
+        if channel.id not in self._drains:
+            self._drains[channel.id] = asyncio.ensure_future(self._drain(channel))
+        return future
+
+    async def send(self, channel, content: str = None, **kwargs):
+        return await self.post(channel, content, **kwargs)
+
+    def typing(self, channel):
+        """Indikator mengetik, pengganti pesan pengisi seperti "tunggu sebentar"."""
+        return channel.typing()
+
+    def queue_depth(self, channel=None) -> int:
+        """Jumlah pesan yang masih antre (untuk satu channel, atau semua)."""
+        if channel is not None:
+            return len(self._queues.get(channel.id, ()))
+        return sum(len(queue) for queue in self._queues.values())
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "channels": len(self._queues), "pending": self.queue_depth()}
+
+    def _take_batch(self, queue: deque) -> list:
+        batch = [queue.popleft()]
+        if not batch[0].mergeable:
+            return batch
+        length = len(batch[0].content or "")
+        embeds = len(batch[0].embeds)
+        while queue and queue[0].mergeable:
+            nxt = queue[0]
+            extra = len(nxt.content or "") + (1 if length and nxt.content else 0)
+            if length + extra > MAX_CONTENT_LENGTH or embeds + len(nxt.embeds) > MAX_EMBEDS:
+                break
+            batch.append(queue.popleft())
+            length += extra
+            embeds += len(nxt.embeds)
+        return batch
+
+    async def _drain(self, channel):
+        queue = self._queues[channel.id]
+        try:
+            await asyncio.sleep(self.window)
+            while queue:
+                batch = self._take_batch(queue)
+                first = batch[0]
+                if len(batch) == 1:
+                    kwargs = dict(first.kwargs)
+                    if first.content is not None:
+                        kwargs["content"] = first.content
+                    if first.embeds:
+                        kwargs["embeds"] = first.embeds
+                else:
+                    contents = [item.content for item in batch if item.content]
+                    kwargs = {"content": "\n".join(contents) if contents else None,
+                              "embeds": [embed for item in batch for embed in item.embeds]}
+                    self.stats["merged"] += len(batch) - 1
+                try:
+                    sent = await channel.send(**kwargs)
+                except Exception as e:
+                    logger.error("Outbox send to channel %s failed: %s", channel.id, e)
+                    self.stats["failed"] += len(batch)
+                    for item in batch:
+                        if not item.future.done():
+                            item.future.set_exception(e)
+                    continue
+                self.stats["sent"] += 1
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_result(sent)
+        finally:
+            del self._drains[channel.id]
+            if queue:
+                # Dibatalkan di tengah jalan: sisa antrean tidak akan terkirim
+                for item in queue:
+                    item.future.cancel()
+            del self._queues[channel.id]
+
+
+def get_outbox(bot) -> Outbox:
+    """Outbox milik bot (dibuat sekali, dipakai bersama oleh semua cog)."""
+    outbox = getattr(bot, "outbox", None)
+    if outbox is None:
+        outbox = bot.outbox = Outbox()
+    return outbox
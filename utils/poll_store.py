@@ -0,0 +1,153 @@
+import os
+import json
+import sqlite3
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+POLL_DB_PATH = os.getenv("POLL_DB_PATH", os.path.join("data", "polls.sqlite3"))
+FLUSH_INTERVAL = 1.0  # detik: perubahan polling dalam jendela ini ditulis dalam satu transaksi
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS polls (
+    message_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    options TEXT NOT NULL,
+    ends_at REAL NOT NULL,
+    mode TEXT NOT NULL DEFAULT 'reactions'
+);
+CREATE INDEX IF NOT EXISTS polls_by_end ON polls (ends_at);
+CREATE TABLE IF NOT EXISTS votes (
+    message_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    mask INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    PRIMARY KEY (message_id, user_id)
+);
+"""
+
+
+class PollStore:
+    """
+    Polling berbatas waktu di SQLite (WAL) agar tetap diumumkan setelah bot restart.
+
+    put()/delete() hanya mencatat perubahan di memori; semuanya ditulis sekaligus
+    FLUSH_INTERVAL detik kemudian (atau saat close()), jadi banyak polling yang dibuat/berakhir
+    bersamaan cukup satu transaksi. ends_at adalah jam dinding (epoch) karena jam monotonic
+    tidak berlaku lagi setelah proses diganti. Suara per user (lihat PollTally) ikut disimpan
+    dengan cara yang sama.
+    """
+
+    def __init__(self, path: str = POLL_DB_PATH, flush_interval: float = FLUSH_INTERVAL):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(polls)")}
+        if "mode" not in columns:
+            # Database dari versi sebelum polling tombol
+            self.db.execute("ALTER TABLE polls ADD COLUMN mode TEXT NOT NULL DEFAULT 'reactions'")
+        self.flush_interval = flush_interval
+        self._pending = {}  # {message_id: row, atau None untuk dihapus}
+        self._pending_votes = {}  # {(message_id, user_id): (mask, slot), atau None untuk dihapus}
+        self._timer = None
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def load_all(self) -> list:
+        """
+        Semua polling tersimpan sebagai dict, urut dari yang paling cepat berakhir.
+        "votes" berisi [(user_id, mask, slot)] untuk memulihkan PollTally.
+        """
+        self.flush()
+        votes = {}
+        for message_id, user_id, mask, slot in self.db.execute("SELECT message_id, user_id, mask, slot FROM votes"):
+            votes.setdefault(message_id, []).append((user_id, mask, slot))
+        rows = self.db.execute("SELECT message_id, channel_id, title, options, ends_at, mode FROM polls ORDER BY ends_at")
+        return [
+            {"message_id": message_id, "channel_id": channel_id, "title": title,
+             "options": json.loads(options), "ends_at": ends_at, "mode": mode, "votes": votes.get(message_id, [])}
+            for message_id, channel_id, title, options, ends_at, mode in rows
+        ]
+
+    def put(self, poll: dict):
+        self._pending[poll["message_id"]] = (
+            poll["message_id"], poll["channel_id"], poll["title"],
+            json.dumps(poll["options"], ensure_ascii=False), poll["ends_at"], poll.get("mode", "reactions"),
+        )
+        self._schedule_flush()
+
+    def delete(self, message_id: int):
+        self._pending[message_id] = None
+        self._schedule_flush()
+
+    def delete_many(self, message_ids):
+        for message_id in message_ids:
+            self._pending[message_id] = None
+        self._schedule_flush()
+
+    def put_vote(self, message_id: int, user_id: int, state):
+        """Simpan (mask, slot) suara user, atau hapus jika state None."""
+        self._pending_votes[(message_id, user_id)] = state
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()  # di luar event loop: tulis langsung
+                return
+            self._timer = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending and not self._pending_votes:
+            return
+        pending, self._pending = self._pending, {}
+        pending_votes, self._pending_votes = self._pending_votes, {}
+        rows = [row for row in pending.values() if row is not None]
+        deleted = [(message_id,) for message_id, row in pending.items() if row is None]
+        # Suara untuk polling yang ikut dihapus tetap aman: DELETE votes dijalankan terakhir
+        votes = [(message_id, user_id, *state) for (message_id, user_id), state in pending_votes.items()
+                 if state is not None]
+        unvoted = [key for key, state in pending_votes.items() if state is None]
+        try:
+            with self.db:
+                if rows:
+                    self.db.executemany("INSERT OR REPLACE INTO polls VALUES (?, ?, ?, ?, ?, ?)", rows)
+                if unvoted:
+                    self.db.executemany("DELETE FROM votes WHERE message_id = ? AND user_id = ?", unvoted)
+                if votes:
+                    # Suara untuk polling yang sudah dihapus di flush sebelumnya tidak disimpan
+                    self.db.executemany(
+                        "INSERT OR REPLACE INTO votes SELECT ?1, ?2, ?3, ?4 WHERE EXISTS "
+                        "(SELECT 1 FROM polls WHERE message_id = ?1)", votes)
+                if deleted:
+                    self.db.executemany("DELETE FROM polls WHERE message_id = ?", deleted)
+                    self.db.executemany("DELETE FROM votes WHERE message_id = ?", deleted)
+        except sqlite3.Error as e:
+            logger.error("Poll store flush failed: %s", e)
+
+
+_store = None
+
+def get_poll_store() -> PollStore:
+    global _store
+    if _store is None:
+        _store = PollStore()
+    return _store
+
+def close_poll_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
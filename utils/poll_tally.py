@@ -0,0 +1,80 @@
+from array import array
+
+
+class PollTally:
+    """
+    Hitungan suara satu polling, diperbarui langsung dari event reaksi (tanpa fetch pesan).
+
+    counts[slot] = jumlah suara pilihan ke-slot. Satu user satu suara: `reacted` menyimpan
+    bitmask slot yang sedang direaksi user, `votes` slot yang dihitung untuknya. Suara
+    mengikuti reaksi terakhir; jika reaksi itu dicabut, suara pindah ke reaksi lain yang
+    masih ada (slot terkecil) atau hilang.
+    """
+
+    __slots__ = ("counts", "reacted", "votes")
+
+    def __init__(self, size: int):
+        self.counts = array("I", bytes(4 * size))
+        self.reacted = {}  # {user_id: bitmask slot}
+        self.votes = {}    # {user_id: slot}
+
+    def __len__(self):
+        """Jumlah pemilih."""
+        return len(self.votes)
+
+    def add(self, user_id: int, slot: int) -> bool:
+        """Reaksi ditambahkan. Return True jika hitungan berubah."""
+        if not 0 <= slot < len(self.counts):
+            return False
+        self.reacted[user_id] = self.reacted.get(user_id, 0) | (1 << slot)
+        return self._vote(user_id, slot)
+
+    def remove(self, user_id: int, slot: int) -> bool:
+        """Reaksi dicabut. Return True jika hitungan berubah."""
+        mask = self.reacted.get(user_id, 0) & ~(1 << slot)
+        if mask:
+            self.reacted[user_id] = mask
+        else:
+            self.reacted.pop(user_id, None)
+        if self.votes.get(user_id) != slot:
+            return False
+        if mask:
+            return self._vote(user_id, (mask & -mask).bit_length() - 1)
+        del self.votes[user_id]
+        self.counts[slot] -= 1
+        return True
+
+    def choose(self, user_id: int, slot: int) -> bool:
+        """
+        Pilihan lewat tombol: pindahkan suara ke `slot`, atau tarik suara jika user menekan
+        pilihan yang sama lagi. Return True jika hitungan berubah.
+        """
+        if not 0 <= slot < len(self.counts):
+            return False
+        if self.votes.get(user_id) == slot:
+            del self.votes[user_id]
+            self.reacted.pop(user_id, None)
+            self.counts[slot] -= 1
+            return True
+        self.reacted[user_id] = 1 << slot
+        return self._vote(user_id, slot)
+
+    def restore(self, user_id: int, mask: int, slot: int):
+        """Pulihkan state satu user dari penyimpanan."""
+        self.reacted[user_id] = mask
+        self._vote(user_id, slot)
+
+    def state(self, user_id: int):
+        """(bitmask, slot) milik user untuk disimpan, atau None jika user tidak memilih."""
+        slot = self.votes.get(user_id)
+        return None if slot is None else (self.reacted.get(user_id, 1 << slot), slot)
+
+    def _vote(self, user_id: int, slot: int) -> bool:
+        previous = self.votes.get(user_id)
+        if previous == slot:
+            return False
+        if previous is not None:
+            self.counts[previous] -= 1
+        self.votes[user_id] = slot
+        self.counts[slot] += 1
+        return True
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+EDIT_INTERVAL = 1.5  # detik minimal antar edit; Discord membatasi edit per pesan/channel
+
+
+class ProgressMessage:
+    """
+    Satu pesan yang langsung dikirim lalu diedit di tempat saat hasil bertambah.
+
+    update(render) tidak menunggu apa pun: edit dijadwalkan paling cepat EDIT_INTERVAL
+    setelah edit sebelumnya, dan `render()` (return kwargs untuk Message.edit) baru
+    dipanggil saat edit benar-benar dikirim, jadi update beruntun hanya menghasilkan satu edit.
+    """
+
+    def __init__(self, channel, interval: float = EDIT_INTERVAL):
+        self.channel = channel
+        self.interval = interval
+        self.message = None
+        self._render = None
+        self._task = None
+        self._last_edit = 0.0
+
+    async def start(self, **kwargs) -> discord.Message:
+        self.message = await self.channel.send(**kwargs)
+        self._last_edit = asyncio.get_running_loop().time()
+        return self.message
+
+    def update(self, render):
+        self._render = render
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        delay = self._last_edit + self.interval - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        render, self._render = self._render, None
+        if render is None or self.message is None:
+            return
+        try:
+            await self.message.edit(**render())
+        except discord.HTTPException as e:
+            logger.warning("Progress edit failed: %s", e)
+        self._last_edit = asyncio.get_running_loop().time()
+
+    async def finish(self, **kwargs):
+        """Edit terakhir (langsung, tanpa debounce); update yang masih tertunda dibuang."""
+        if self._task is not None:
+            self._task.cancel()
+        self._render = None
+        if self.message is None:
+            await self.start(**kwargs)
+        else:
+            await self.message.edit(**kwargs)
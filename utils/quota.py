@@ -0,0 +1,136 @@
+import os
+import time
+import logging
+import datetime
+
+logger = logging.getLogger(__name__)
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")  # kuota YouTube reset tengah malam waktu Pasifik
+except Exception:
+    QUOTA_TIMEZONE = datetime.timezone(datetime.timedelta(hours=-8))
+
+DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+
+# Biaya unit per endpoint (https://developers.google.com/youtube/v3/determine_quota_cost)
+UNIT_COSTS = {
+    "videos": 1,
+    "channels": 1,
+    "commentThreads": 1,
+    "comments": 1,
+    "playlistItems": 1,
+    "search": 100,
+}
+
+# Kelas prioritas: makin besar angkanya makin cepat dikorbankan saat kuota menipis
+INTERACTIVE = 0  # permintaan langsung dari user (ytinfo, ytsearch, channelstats, ...)
+BACKGROUND = 1   # refresh cache, scan tambahan
+OPTIONAL = 2     # bonus yang boleh dilewati (mis. rekomendasi video di greetings)
+
+# Fraksi kuota harian dan token bucket yang harus tetap tersisa setelah request
+# dari kelas ini dikenakan; kelas yang lebih rendah berhenti lebih dulu.
+PRIORITY_RESERVE = {
+    INTERACTIVE: 0.0,
+    BACKGROUND: 0.2,
+    OPTIONAL: 0.5,
+}
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background", OPTIONAL: "optional"}
+
+
+class QuotaScheduler:
+    """
+    Menagih setiap panggilan API sesuai biaya unitnya terhadap anggaran harian dan
+    token bucket (membatasi laju pemakaian agar kuota tidak habis sebelum siang).
+    try_acquire() tidak pernah menunggu: request yang tidak kebagian langsung ditolak.
+    """
+
+    def __init__(self, daily_budget: int = DAILY_QUOTA, bucket_capacity: float = None,
+                 refill_per_sec: float = None):
+        self.daily_budget = daily_budget
+        # Default: boleh burst 10% kuota harian, laju rata-rata 2x (daily_budget / 24 jam)
+        self.bucket_capacity = bucket_capacity if bucket_capacity is not None else daily_budget * 0.1
+        self.refill_per_sec = refill_per_sec if refill_per_sec is not None else daily_budget * 2 / 86400
+        self.tokens = self.bucket_capacity
+        self._last_refill = time.monotonic()
+        self._day = self._today()
+        self.spent = 0
+        self.spent_by_endpoint = {}
+        self.denied = {name: 0 for name in PRIORITY_NAMES.values()}
+
+    @staticmethod
+    def _today():
+        return datetime.datetime.now(QUOTA_TIMEZONE).date()
+
+    def _refresh(self):
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self.spent = 0
+            self.spent_by_endpoint.clear()
+        now = time.monotonic()
+        self.tokens = min(self.bucket_capacity, self.tokens + (now - self._last_refill) * self.refill_per_sec)
+        self._last_refill = now
+
+    def remaining(self) -> int:
+        """Sisa unit kuota hari ini."""
+        self._refresh()
+        return max(0, self.daily_budget - self.spent)
+
+    def can_spend(self, endpoint: str, priority: int = INTERACTIVE, count: int = 1) -> bool:
+        self._refresh()
+        cost = UNIT_COSTS.get(endpoint, 1) * count
+        reserve = PRIORITY_RESERVE.get(priority, 0.0)
+        if self.daily_budget - self.spent - cost < self.daily_budget * reserve:
+            return False
+        if self.tokens - cost < self.bucket_capacity * reserve:
+            return False
+        return True
+
+    def try_acquire(self, endpoint: str, priority: int = INTERACTIVE) -> bool:
+        """Tagih biaya `endpoint` jika anggaran cukup untuk kelas `priority`."""
+        if not self.can_spend(endpoint, priority):
+            self.denied[PRIORITY_NAMES.get(priority, str(priority))] += 1
+            logger.warning("Quota: %s request (%s) shed, %s units left today",
+                           endpoint, PRIORITY_NAMES.get(priority, priority), self.daily_budget - self.spent)
+            return False
+        cost = UNIT_COSTS.get(endpoint, 1)
+        self.spent += cost
+        self.tokens -= cost
+        self.spent_by_endpoint[endpoint] = self.spent_by_endpoint.get(endpoint, 0) + cost
+        return True
+
+    def snapshot(self) -> dict:
+        self._refresh()
+        return {
+            "day": self._day.isoformat(),
+            "daily_budget": self.daily_budget,
+            "spent": self.spent,
+            "remaining": max(0, self.daily_budget - self.spent),
+            "bucket_tokens": round(self.tokens, 1),
+            "spent_by_endpoint": dict(self.spent_by_endpoint),
+            "denied": dict(self.denied),
+        }
+
+
+class QuotaBudget:
+    """Batas unit untuk satu operasi panjang (mis. deep scan), di luar anggaran harian."""
+
+    def __init__(self, units: int):
+        self.units = units
+        self.spent = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.spent >= self.units
+
+    def take(self, endpoint: str, count: int = 1) -> bool:
+        """Catat biaya `count` request `endpoint`; False jika melebihi budget."""
+        cost = UNIT_COSTS.get(endpoint, 1) * count
+        if self.spent + cost > self.units:
+            return False
+        self.spent += cost
+        return True
+
+
+scheduler = QuotaScheduler()
@@ -0,0 +1,95 @@
+import heapq
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """
+    Penjadwal berbasis deadline: min-heap (deadline, urutan, key) ditambah satu timer
+    loop.call_at untuk deadline terdekat, jadi event loop hanya bangun saat ada yang jatuh tempo.
+
+    Deadline memakai jam monotonic event loop (loop.time()). schedule() O(log n);
+    cancel() O(1) (entri di heap ditandai batal dan dibuang saat muncul di puncak heap).
+    `callback(key)` dipanggil sinkron di event loop, jadi pekerjaan async harus dijadwalkan sendiri.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self._heap = []      # [deadline, urutan, key] (key None = dibatalkan)
+        self._entries = {}   # {key: entri di heap}
+        self._counter = 0
+        self._timer = None   # TimerHandle untuk puncak heap
+        self._timer_at = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def deadline(self, key):
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def schedule(self, key, deadline: float):
+        """Jadwalkan `key` pada waktu loop.time() `deadline` (menggantikan jadwal lama)."""
+        self.cancel(key)
+        self._counter += 1
+        entry = [deadline, self._counter, key]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        self._arm()
+
+    def schedule_in(self, key, delay: float):
+        self.schedule(key, asyncio.get_running_loop().time() + delay)
+
+    def cancel(self, key) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[2] = None
+        # Buang entri batal jika sudah lebih banyak dari entri aktif
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [item for item in self._heap if item[2] is not None]
+            heapq.heapify(self._heap)
+        return True
+
+    def close(self):
+        """Hentikan timer dan lupakan semua jadwal."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._timer_at = None
+        self._heap.clear()
+        self._entries.clear()
+
+    def _arm(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = self._timer_at = None
+            return
+        deadline = self._heap[0][0]
+        if self._timer is not None and self._timer_at == deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_at(deadline, self._fire)
+        self._timer_at = deadline
+
+    def _fire(self):
+        self._timer = self._timer_at = None
+        now = asyncio.get_running_loop().time()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key = heapq.heappop(self._heap)
+            if key is None:
+                continue
+            del self._entries[key]
+            try:
+                self.callback(key)
+            except Exception:
+                logger.exception("Scheduler callback failed for %s", key)
+        self._arm()
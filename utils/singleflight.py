@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import contextlib
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Gabungkan pemanggilan yang identik dan sedang berjalan: pemanggil dengan kunci yang sama
+    menunggu satu task bersama. Setiap pemanggil menunggu lewat asyncio.shield, jadi
+    membatalkan satu pemanggil tidak membatalkan task (dan pemanggil lain).
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.stats = {"started": 0, "shared": 0}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, factory):
+        """Jalankan `factory()` (coroutine function) sekali per kunci yang sedang berjalan."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+            self.stats["started"] += 1
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Tandai exception sudah diambil meski semua pemanggil sudah batal menunggu
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("Single-flight task %s failed: %r", key, task.exception())
+
+
+class KeyedLock:
+    """
+    Satu asyncio.Lock per kunci, dibuang lagi begitu tidak ada yang memegang atau menunggu.
+    Untuk pekerjaan streaming yang tidak bisa dibagi lewat SingleFlight.do (mis. crawl corpus
+    komentar): pemanggil berikutnya menunggu, lalu memakai hasil yang sudah disimpan.
+    """
+
+    def __init__(self):
+        self._locks = {}  # {key: [lock, jumlah pemegang + penunggu]}
+
+    def __len__(self):
+        return len(self._locks)
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key):
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
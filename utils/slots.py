@@ -0,0 +1,213 @@
+import re
+
+from utils.helpers import parse_duration
+from utils.youtube_api import (
+    YOUTUBE_VIDEO_REGEX, CHANNEL_ID_REGEX, CHANNEL_USER_REGEX, CHANNEL_CUSTOM_REGEX
+)
+
+# Semua regex ekstraksi dikompilasi sekali di sini, bukan di dalam handler.
+YOUTUBE_LINK_REGEX = re.compile(r"(https?://)?(www\.)?(youtube\.com|youtu\.be)/")
+CHANNELSTATS_CLEAN_REGEX = re.compile(r"(?i)\b(statistik|stats|info|jumlah subscriber|cek|channel|kanal|untuk|dari|dong|ya)\b")
+TIMESTAMPS_CLEAN_REGEX = re.compile(r"(?i)\b(timestamps?|penanda waktu|cari|kumpulin|dari|di|video|dong|ya)\b")
+FINDCOMMENT_CLEAN_REGEX = re.compile(
+    r"(?i)\b(cari(?:kan)?|temukan|lihat|tampilkan|search|find|komentar|komen|comments?|"
+    r"tentang|soal|yang|mengandung|kata kunci|keyword|di|dari|video|tolong|coba|dong|ya)\b"
+)
+POLL_CLEAN_REGEX = re.compile(r"(?i)\b(poll|vote|voting|polling|jajak pendapat|bikin vote|buat polling)\b")
+QUOTED_REGEX = re.compile(r'"(.*?)"')
+KEYWORD_QUOTED_REGEX = re.compile(r'"(.+?)"|(?<!\w)\'(.+?)\'(?!\w)')
+CHANNEL_TARGET_REGEX = re.compile(
+    r"(?i)\b(?:di|dari)\s+(?:channel|kanal)\s+(.+)|(?<!\S)@([\w.-]+)"
+    r"|((?:https?://)?(?:www\.)?youtube\.com/(?:channel/|user/|c/|@)[^\s/?&]+)"
+)
+CHANNEL_PRONOUN_REGEX = re.compile(r"(?i)^(?:ini|itu|tersebut|tadi|sini|kamu|dia|mereka|yang|dong|ya)\b")
+POLL_DURATION_TAIL_REGEX = re.compile(r'\s+(\d+[smhd])$')
+POLL_DURATION_LINE_REGEX = re.compile(r"(\d+[smhd])")
+POLL_REACTION_MODE_REGEX = re.compile(r"(?i)\b(?:pakai|dengan|mode|via)\s+(?:reaksi|reaction|emoji)\b")
+DEEP_SCAN_REGEX = re.compile(r"(?i)\b(?:deep(?: scan)?|mendalam|(?:termasuk|sampai|dengan|plus) (?:balasan|replies|reply))\b")
+SEARCH_COUNT_REGEX = re.compile(r"(?i)\b(\d{1,2})\s*(?:hasil|video|buah)\b")
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+class ParsedIntent:
+    """Intent beserta slot yang sudah diekstrak dari pesan, dikirim ke cog lewat dispatch."""
+
+    __slots__ = (
+        "intent", "spans", "text", "video_id", "has_link",
+        "channel_id", "channel_username", "channel_handle",
+        "query", "keyword", "count", "title", "options", "duration", "deep", "reactions",
+    )
+
+    def __init__(self, intent: str, spans=None, text: str = ""):
+        self.intent = intent
+        self.spans = spans or []
+        self.text = text            # argumen setelah kata pemicu dibuang
+        self.video_id = None        # ID video dari link YouTube
+        self.has_link = False       # ada link youtube.com / youtu.be (valid atau tidak)
+        self.channel_id = None      # dari youtube.com/channel/<id>
+        self.channel_username = None  # dari youtube.com/user/<name>
+        self.channel_handle = None  # dari youtube.com/c/<name>, youtube.com/@<name> atau "@name"
+        self.query = None           # kata kunci pencarian video / nama channel
+        self.keyword = None         # kata kunci komentar
+        self.count = None           # jumlah hasil yang diminta
+        self.title = None           # judul polling
+        self.options = None         # pilihan polling (None jika format tidak dikenali)
+        self.duration = 0           # durasi polling dalam detik
+        self.deep = False           # minta deep scan komentar (lewati batas halaman, ikut balasan)
+        self.reactions = False      # polling memakai reaksi emoji, bukan tombol
+
+    def __repr__(self):
+        filled = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__
+                           if getattr(self, name) not in (None, False, 0, "", []))
+        return f"ParsedIntent({filled})"
+
+
+def _fill_video(parsed: ParsedIntent, text: str):
+    if YOUTUBE_LINK_REGEX.search(text):
+        parsed.has_link = True
+    m = YOUTUBE_VIDEO_REGEX.search(text)
+    if m:
+        parsed.video_id = m.group(1)
+    return m
+
+
+def parse_video(text: str, intent: str = "ytinfo", spans=None) -> ParsedIntent:
+    """Ekstrak link / ID video YouTube dari teks."""
+    parsed = ParsedIntent(intent, spans, text.strip())
+    _fill_video(parsed, text)
+    return parsed
+
+
+def parse_channel(text: str, intent: str = "channelstats", spans=None) -> ParsedIntent:
+    """Ekstrak slot channel (ID, username, handle, atau nama bebas) dari teks."""
+    query = WHITESPACE_REGEX.sub(" ", CHANNELSTATS_CLEAN_REGEX.sub("", text)).strip()
+    parsed = ParsedIntent(intent, spans, query)
+    parsed.query = query
+    # URL dicocokkan pada teks asli: pembersihan di atas ikut membuang "/channel/" dari URL
+    m = CHANNEL_ID_REGEX.search(text)
+    if m:
+        parsed.channel_id = m.group(1)
+        return parsed
+    m = CHANNEL_USER_REGEX.search(text)
+    if m:
+        parsed.channel_username = m.group(1)
+        return parsed
+    m = CHANNEL_CUSTOM_REGEX.search(text)
+    if m:
+        parsed.channel_handle = m.group(1)
+    elif query.startswith("@"):
+        parsed.channel_handle = query[1:]
+    return parsed
+
+
+def parse_poll(text: str, intent: str = "poll", spans=None) -> ParsedIntent:
+    """
+    Ekstrak judul, pilihan, dan durasi polling. Format:
+    1. "Judul" "Pilihan 1" "Pilihan 2" ... [Durasi]
+    2. Judul\\nPilihan 1\\nPilihan 2\\n...[Durasi]
+    Tambahkan "pakai reaksi" untuk polling dengan reaksi emoji.
+    """
+    reactions = POLL_REACTION_MODE_REGEX.search(text)
+    if reactions:
+        text = text[:reactions.start()] + text[reactions.end():]
+    content = POLL_CLEAN_REGEX.sub("", text).strip()
+    parsed = ParsedIntent(intent, spans, content)
+    parsed.reactions = bool(reactions)
+    args = None
+    duration_str = None
+    if '"' in content:
+        args = QUOTED_REGEX.findall(content)
+        m = POLL_DURATION_TAIL_REGEX.search(content)
+        duration_str = m.group(1) if m else None
+    elif "\n" in content:
+        lines = [line.strip() for line in content.split("\n") if line.strip()]
+        m = POLL_DURATION_LINE_REGEX.fullmatch(lines[-1].lower())
+        if m:
+            duration_str = m.group(1)
+            lines = lines[:-1]
+        args = lines
+    if args is not None:
+        parsed.title = args[0] if args else None
+        parsed.options = args[1:]
+        parsed.duration = parse_duration(duration_str) if duration_str else 0
+    return parsed
+
+
+def _extract_ytsearch(parsed: ParsedIntent, text: str):
+    lowered = text.lower().strip()
+    parsed.query = lowered
+    m = SEARCH_COUNT_REGEX.search(lowered)
+    if m and 1 <= int(m.group(1)) <= 10:
+        parsed.count = int(m.group(1))
+
+
+def _extract_timestamps(parsed: ParsedIntent, text: str):
+    parsed.deep = bool(DEEP_SCAN_REGEX.search(text))
+    parsed.text = TIMESTAMPS_CLEAN_REGEX.sub("", DEEP_SCAN_REGEX.sub("", text)).strip()
+    _fill_video(parsed, parsed.text)
+
+
+def _fill_channel_target(parsed: ParsedIntent, text: str):
+    """Slot channel untuk "... di channel <nama|@handle|URL>", "@handle", atau URL channel."""
+    m = CHANNEL_TARGET_REGEX.search(text)
+    if not m:
+        return None
+    if m.group(1):
+        # Nama channel = sisa kalimat tanpa kata kunci dalam kutip dan kata "deep"
+        target = DEEP_SCAN_REGEX.sub("", KEYWORD_QUOTED_REGEX.sub("", m.group(1)))
+        target = WHITESPACE_REGEX.sub(" ", target).strip()
+        # "di kanal ini", "di channel kamu": bukan nama channel
+        if not target or CHANNEL_PRONOUN_REGEX.match(target):
+            return None
+    elif m.group(2):
+        target = "@" + m.group(2)
+    else:
+        target = m.group(3)
+    channel = parse_channel(target)
+    parsed.channel_id = channel.channel_id
+    parsed.channel_username = channel.channel_username
+    parsed.channel_handle = channel.channel_handle
+    parsed.query = channel.query
+    return m
+
+
+def _extract_findcomment(parsed: ParsedIntent, text: str):
+    parsed.deep = bool(DEEP_SCAN_REGEX.search(text))
+    m = _fill_video(parsed, text)
+    if not m:
+        # Tanpa link video: mungkin pencarian di seluruh upload satu channel
+        if _fill_channel_target(parsed, text):
+            quoted = KEYWORD_QUOTED_REGEX.search(text)
+            if quoted:
+                parsed.keyword = f'"{quoted.group(1) or quoted.group(2)}"'
+        return
+    rest = DEEP_SCAN_REGEX.sub("", text.replace(m.group(0), ""))
+    quoted = QUOTED_REGEX.search(rest)
+    if quoted:
+        # Tanda kutip dipertahankan: teks dalam kutip dicari sebagai frasa
+        parsed.keyword = quoted.group(0).strip() or None
+        return
+    # Tanpa kutip: buang kata pemicu & pengisi agar tidak ikut jadi term AND di parse_query
+    rest = WHITESPACE_REGEX.sub(" ", FINDCOMMENT_CLEAN_REGEX.sub("", rest)).strip()
+    parsed.keyword = rest or None
+
+
+_EXTRACTORS = {
+    "ytinfo": _fill_video,
+    "ytsearch": _extract_ytsearch,
+    "timestamps": _extract_timestamps,
+    "findcomment": _extract_findcomment,
+}
+
+
+def extract_slots(match, text: str) -> ParsedIntent:
+    """Ubah IntentMatch + pesan asli menjadi ParsedIntent dalam satu kali jalan."""
+    if match.intent == "channelstats":
+        return parse_channel(text, spans=match.spans)
+    if match.intent == "poll":
+        return parse_poll(text, spans=match.spans)
+    parsed = ParsedIntent(match.intent, match.spans, text.strip())
+    extractor = _EXTRACTORS.get(match.intent)
+    if extractor:
+        extractor(parsed, text)
+    return parsed
@@ -0,0 +1,117 @@
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_TTL = 300  # detik sebelum percakapan yang ditinggal dianggap basi
+MAX_CONVERSATIONS = 10000
+
+
+class ConversationState:
+    """Satu percakapan yang sedang menunggu jawaban user."""
+
+    __slots__ = ("owner", "step", "data", "expires_at")
+
+    def __init__(self, owner: str, step: str, data, expires_at: float):
+        self.owner = owner          # nama handler yang memegang percakapan ini
+        self.step = step            # langkah yang sedang ditunggu, e.g. "waiting_for_video"
+        self.data = data            # data tambahan milik handler (boleh None)
+        self.expires_at = expires_at
+
+    def __repr__(self):
+        return f"ConversationState(owner={self.owner!r}, step={self.step!r}, data={self.data!r})"
+
+
+class ConversationStore:
+    """
+    Penyimpanan state percakapan terpusat, dikunci per (guild, channel, user).
+
+    Entri kedaluwarsa setelah TTL, dan yang paling lama tidak disentuh dibuang saat
+    jumlahnya melewati `max_size`. Setiap state punya `owner`; `route` mengirim pesan
+    hanya ke handler milik owner tersebut, jadi cog tidak perlu listener on_message sendiri.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_STATE_TTL, max_size: int = MAX_CONVERSATIONS):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._states = OrderedDict()
+        self._handlers = {}
+
+    @staticmethod
+    def key_for(message) -> tuple:
+        guild_id = message.guild.id if message.guild else 0
+        return (guild_id, message.channel.id, message.author.id)
+
+    def __len__(self):
+        return len(self._states)
+
+    # --- handler ---
+
+    def register(self, owner: str, handler):
+        """
+        Daftarkan coroutine `handler(message, state)` untuk state milik `owner`.
+        Handler boleh return False agar pesan diteruskan ke deteksi intent biasa.
+        """
+        self._handlers[owner] = handler
+
+    def unregister(self, owner: str):
+        self._handlers.pop(owner, None)
+        for key in [k for k, st in self._states.items() if st.owner == owner]:
+            del self._states[key]
+
+    async def route(self, message) -> bool:
+        """Kirim pesan ke handler pemilik state. Return False jika pesan tidak ditangani."""
+        key = self.key_for(message)
+        state = self.get(key)
+        if state is None:
+            return False
+        handler = self._handlers.get(state.owner)
+        if handler is None:
+            logger.warning("No handler registered for conversation owner %s", state.owner)
+            self.pop(key)
+            return False
+        return await handler(message, state) is not False
+
+    # --- state ---
+
+    def get(self, key):
+        state = self._states.get(key)
+        if state is None:
+            return None
+        if state.expires_at <= time.monotonic():
+            del self._states[key]
+            return None
+        # Percakapan yang masih aktif dipindah ke belakang agar tidak terbuang lebih dulu (LRU)
+        self._states.move_to_end(key)
+        return state
+
+    def set(self, key, owner: str, step: str, data=None, ttl: float = None) -> ConversationState:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        state = ConversationState(owner, step, data, expires_at)
+        self._states[key] = state
+        self._states.move_to_end(key)
+        self._evict()
+        return state
+
+    def pop(self, key):
+        return self._states.pop(key, None)
+
+    def _evict(self):
+        # Buang entri kedaluwarsa dari yang paling lama tidak disentuh, lalu potong ke max_size
+        now = time.monotonic()
+        states = self._states
+        while states:
+            state = next(iter(states.values()))
+            if state.expires_at > now and len(states) <= self.max_size:
+                break
+            states.popitem(last=False)
+
+
+def get_conversation_store(bot) -> ConversationStore:
+    """Ambil store milik bot, dibuat saat pertama kali dibutuhkan."""
+    store = getattr(bot, "conversations", None)
+    if store is None:
+        store = ConversationStore()
+        bot.conversations = store
+    return store
@@ -0,0 +1,149 @@
+import math
+import heapq
+import logging
+
+import numpy as np
+
+from utils.helpers import parse_timestamp_to_seconds
+from utils.youtube_api import TIMESTAMP_REGEX
+
+logger = logging.getLogger(__name__)
+
+CLUSTER_WINDOW = 5              # detik: 1:23, 1:24, 1:25 dihitung sebagai satu momen
+MAX_UNKNOWN_DURATION = 24 * 3600  # batas detik jika durasi video tidak diketahui
+SNIPPET_LENGTH = 150
+
+
+class Moment:
+    """Satu kluster timestamp hasil agregasi."""
+
+    __slots__ = ("second", "start", "end", "mentions", "score", "snippet")
+
+    def __init__(self, second: int, start: int, end: int, mentions: int, score: float, snippet: str):
+        self.second = second      # detik yang paling sering disebut di kluster (untuk link)
+        self.start = start
+        self.end = end
+        self.mentions = mentions  # jumlah penyebutan di kluster
+        self.score = score        # penyebutan berbobot like
+        self.snippet = snippet    # komentar dengan like terbanyak yang menyebut `second`
+
+
+class TimestampAggregator:
+    """
+    Kumpulkan timestamp dari komentar per halaman, lalu kelompokkan jadi momen.
+
+    Yang disimpan hanya histogram per detik (jumlah dan bobot) plus satu cuplikan komentar
+    per detik, jadi memori dibatasi durasi video, bukan jumlah komentar. Bobot satu penyebutan
+    = 1 + log(1 + like). Histogram berupa array NumPy yang diperbarui per halaman lewat bincount.
+    """
+
+    def __init__(self, duration: int = None, window: int = CLUSTER_WINDOW):
+        self.max_second = duration if duration else MAX_UNKNOWN_DURATION
+        self.window = window
+        self.comments = 0
+        self.rejected = 0           # timestamp melewati durasi video
+        self._snippets = {}         # {detik: (like, cuplikan)}
+        # Tanpa durasi, histogram dimulai kosong dan diperbesar sesuai detik terbesar yang muncul
+        self._counts = np.zeros(self.max_second + 1 if duration else 0, dtype=np.int32)
+        self._weights = np.zeros(len(self._counts), dtype=np.float64)
+
+    def add_page(self, snippets: list):
+        """Tambahkan satu halaman snippet komentar (dict dengan textDisplay dan likeCount)."""
+        seconds = []
+        weights = []
+        for snippet in snippets:
+            text = snippet.get("textDisplay", "")
+            self.comments += 1
+            found = set()
+            for m_ts in TIMESTAMP_REGEX.finditer(text):
+                try:
+                    second = parse_timestamp_to_seconds(m_ts.group(0))
+                except ValueError:
+                    continue
+                if second > self.max_second:
+                    self.rejected += 1
+                    continue
+                found.add(second)
+            if not found:
+                continue
+            # Satu komentar hanya dihitung sekali per detik
+            likes = snippet.get("likeCount", 0) or 0
+            weight = 1 + math.log1p(likes)
+            for second in found:
+                seconds.append(second)
+                weights.append(weight)
+                best = self._snippets.get(second)
+                if best is None or likes > best[0]:
+                    self._snippets[second] = (likes, text.strip()[:SNIPPET_LENGTH + 1])
+        if seconds:
+            self._accumulate(seconds, weights)
+
+    def _accumulate(self, seconds: list, weights: list):
+        seconds = np.asarray(seconds, dtype=np.int64)
+        size = int(seconds.max()) + 1
+        if size > len(self._counts):
+            self._counts = np.pad(self._counts, (0, size - len(self._counts)))
+            self._weights = np.pad(self._weights, (0, size - len(self._weights)))
+        size = len(self._counts)
+        self._counts += np.bincount(seconds, minlength=size).astype(np.int32)
+        self._weights += np.bincount(seconds, weights=np.asarray(weights, dtype=np.float64), minlength=size)
+
+    def __len__(self):
+        """Jumlah detik berbeda yang disebut."""
+        return len(self._snippets)
+
+    def _histogram(self):
+        """Return (detik terurut, jumlah, bobot, bobot berjendela ±window) sebagai list paralel."""
+        w = self.window
+        seconds = np.flatnonzero(self._counts)
+        counts = self._counts[seconds]
+        weights = self._weights[seconds]
+        # Jumlah bobot dalam jendela [s - w, s + w] lewat prefix sum atas histogram penuh
+        prefix = np.concatenate(([0.0], np.cumsum(self._weights)))
+        lo = np.clip(seconds - w, 0, len(self._weights))
+        hi = np.clip(seconds + w + 1, 0, len(self._weights))
+        windowed = prefix[hi] - prefix[lo]
+        return seconds.tolist(), counts.tolist(), weights.tolist(), windowed.tolist()
+
+    def top(self, n: int) -> list:
+        """
+        n momen teratas. Detik dengan bobot berjendela terbesar dipilih lebih dulu (heap);
+        detik lain dalam jarak ±window dari momen terpilih masuk ke kluster itu.
+        """
+        seconds, counts, weights, windowed = self._histogram()
+        if not seconds:
+            return []
+        heap = [(-score, i) for i, score in enumerate(windowed)]
+        heapq.heapify(heap)
+        taken = [False] * len(seconds)
+        moments = []
+        w = self.window
+        while heap and len(moments) < n:
+            _, i = heapq.heappop(heap)
+            if taken[i]:
+                continue
+            # Kluster = detik yang belum terpakai dalam [s - w, s + w]
+            members = [i]
+            j = i - 1
+            while j >= 0 and seconds[i] - seconds[j] <= w:
+                members.append(j)
+                j -= 1
+            j = i + 1
+            while j < len(seconds) and seconds[j] - seconds[i] <= w:
+                members.append(j)
+                j += 1
+            members = [j for j in members if not taken[j]]
+            for j in members:
+                taken[j] = True
+            peak = max(members, key=lambda j: (weights[j], -seconds[j]))
+            # Cuplikan diambil dari detik yang ditautkan, bukan dari detik tetangga di kluster
+            moments.append(Moment(
+                second=seconds[peak],
+                start=min(seconds[j] for j in members),
+                end=max(seconds[j] for j in members),
+                mentions=sum(counts[j] for j in members),
+                score=sum(weights[j] for j in members),
+                snippet=self._snippets[seconds[peak]][1],
+            ))
+        moments.sort(key=lambda moment: moment.score, reverse=True)
+        return moments
@@ -1,8 +1,17 @@
 import os
 import re
+import json
+import asyncio
 import logging
 import aiohttp
 
+from utils.batching import MicroBatcher
+from utils.cache import FRESH, STALE, ResponseCache
+from utils.http import get_http_session
+from utils.singleflight import SingleFlight
+from utils import quota
+from utils.quota import INTERACTIVE, BACKGROUND, QuotaBudget
+
 logger = logging.getLogger(__name__)
 
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
@@ -13,7 +22,7 @@ YOUTUBE_API_BASE = "https://www.googleapis.com/youtube/v3"
 
 YOUTUBE_VIDEO_REGEX = re.compile(
     r'(?:https?://)?(?:www\.)?(?:'
-    r'youtube\.com/watch\?v=|youtube\.com/watch\?.*?&v=|youtu\.be/|youtube\.com/shorts/)'
+    r'youtube\.com/watch\?v=|youtube\.com/watch\?\S*?&v=|youtu\.be/|youtube\.com/shorts/)'
     r'([A-Za-z0-9_-]{11})'
 )
 
@@ -25,87 +34,409 @@ TIMESTAMP_REGEX = re.compile(r'\b(?:\d{1,2}:\d{2}:\d{2}|\d{1,2}:\d{2})\b')
 
 MAX_COMMENT_PAGES = 5
 MAX_COMMENTS_TO_SCAN = 500
+# Deep scan (opt-in): lewati batas di atas, termasuk balasan, selama budget unit masih ada
+DEEP_SCAN_QUOTA = int(os.getenv("DEEP_SCAN_QUOTA", "200"))
+DEEP_SCAN_CONCURRENCY = 4
+DEEP_SCAN_QUEUE_SIZE = 200
+# search.list berbiaya 100 unit berapa pun maxResults-nya, jadi selalu ambil maksimal (50)
+SEARCH_PAGE_SIZE = 50
 
-async def fetch_youtube_video_info(session: aiohttp.ClientSession, video_id: str):
-    url = f"{YOUTUBE_API_BASE}/videos"
-    params = {"part": "snippet,statistics,contentDetails", "id": video_id, "key": YOUTUBE_API_KEY}
-    async with session.get(url, params=params) as resp:
-        if resp.status != 200:
-            logger.error("videos API error %s: %s", resp.status, await resp.text())
-            return None
-        data = await resp.json()
-        items = data.get("items", [])
-        return items[0] if items else None
-
-async def fetch_channel_by_id(session: aiohttp.ClientSession, channel_id: str):
-    url = f"{YOUTUBE_API_BASE}/channels"
-    params = {"part": "snippet,statistics", "id": channel_id, "key": YOUTUBE_API_KEY}
-    async with session.get(url, params=params) as resp:
-        if resp.status != 200:
-            logger.error("channels API returned status %s", resp.status)
-            return None
-        data = await resp.json()
-        items = data.get("items", [])
-        return items[0] if items else None
-
-async def fetch_channel_by_username(session: aiohttp.ClientSession, username: str):
-    url = f"{YOUTUBE_API_BASE}/channels"
-    params = {"part": "snippet,statistics", "forUsername": username, "key": YOUTUBE_API_KEY}
-    async with session.get(url, params=params) as resp:
+# Timeout per endpoint: lookup ID cepat, search dan commentThreads boleh lebih lama
+ENDPOINT_TIMEOUTS = {
+    "videos": aiohttp.ClientTimeout(total=10, connect=3),
+    "channels": aiohttp.ClientTimeout(total=10, connect=3),
+    "search": aiohttp.ClientTimeout(total=15, connect=3),
+    "commentThreads": aiohttp.ClientTimeout(total=20, connect=3),
+    "comments": aiohttp.ClientTimeout(total=20, connect=3),
+    "playlistItems": aiohttp.ClientTimeout(total=10, connect=3),
+}
+
+# TTL cache per endpoint (detik): statistik video cepat berubah, hasil search jarang
+CACHE_TTLS = {
+    "videos": 300,
+    "channels": 600,
+    "search": 3600,
+    "commentThreads": 300,
+    "comments": 300,
+    "playlistItems": 600,
+}
+STALE_TTL = 600  # setelah TTL habis, data lama masih dipakai selama ini sambil di-refresh
+NEGATIVE_TTL = 120  # hasil kosong / tidak ditemukan di-cache lebih singkat
+_CASE_INSENSITIVE_PARAMS = {"q", "forUsername"}
+
+response_cache = ResponseCache()
+_revalidating = set()
+# Request identik yang sedang berjalan (kunci = kunci cache) hanya dikirim sekali ke API
+inflight = SingleFlight()
+# Endpoint yang menerima hingga 50 ID dipisah koma dengan biaya 1 unit
+BATCHABLE_ENDPOINTS = {"videos", "channels"}
+_batchers = {}  # {(endpoint, part): MicroBatcher}
+
+def make_cache_key(endpoint: str, params: dict) -> tuple:
+    """Kunci cache: endpoint + parameter yang dinormalisasi (urut, tanpa API key)."""
+    normalized = []
+    for name, value in sorted(params.items()):
+        if name == "key":
+            continue
+        value = " ".join(str(value).split())
+        if name in _CASE_INSENSITIVE_PARAMS:
+            value = value.lower()
+        normalized.append((name, value))
+    return (endpoint, tuple(normalized))
+
+def cache_stats() -> dict:
+    """Counter hit/miss cache respons YouTube API."""
+    return response_cache.snapshot()
+
+def quota_status() -> dict:
+    """Pemakaian dan sisa kuota harian YouTube API."""
+    return quota.scheduler.snapshot()
+
+async def _request_json(endpoint: str, params: dict, session: aiohttp.ClientSession = None, label: str = None):
+    """GET ke endpoint YouTube Data API; return (JSON, ukuran body), atau (None, 0) jika status bukan 200."""
+    session = session or get_http_session()
+    url = f"{YOUTUBE_API_BASE}/{endpoint}"
+    params = {**params, "key": YOUTUBE_API_KEY}
+    async with session.get(url, params=params, timeout=ENDPOINT_TIMEOUTS.get(endpoint)) as resp:
         if resp.status != 200:
-            logger.error("channels(forUsername) API returned status %s", resp.status)
-            return None
-        data = await resp.json()
-        items = data.get("items", [])
-        return items[0] if items else None
+            logger.error("%s API returned status %s: %s", label or endpoint, resp.status, await resp.text())
+            return None, 0
+        body = await resp.read()
+    return json.loads(body), len(body)
+
+def _store_response(key, endpoint: str, data: dict, size: int):
+    negative = not data.get("items") and not data.get("nextPageToken")
+    ttl = min(CACHE_TTLS.get(endpoint, 0), NEGATIVE_TTL) if negative else CACHE_TTLS.get(endpoint, 0)
+    if ttl > 0:
+        response_cache.store(key, data, size, ttl, 0 if negative else STALE_TTL, negative)
+
+async def _fetch_batch(endpoint: str, part: str, ids: list, priority: int):
+    """
+    Satu request videos/channels untuk banyak ID (biaya tetap 1 unit). Hasil per ID
+    disimpan ke cache dengan kunci yang sama seperti lookup satu ID.
+    Return {id: {"items": [...]}} atau None jika request gagal / kuota ditolak.
+    """
+    if not quota.scheduler.try_acquire(endpoint, priority):
+        return None
+    data, size = await _request_json(endpoint, {"part": part, "id": ",".join(ids)})
+    if data is None:
+        return None
+    found = {item.get("id"): item for item in data.get("items", [])}
+    per_item_size = size // max(1, len(ids))
+    results = {}
+    for item_id in ids:
+        item = found.get(item_id)
+        payload = {"items": [item] if item else []}
+        _store_response(make_cache_key(endpoint, {"part": part, "id": item_id}), endpoint, payload, per_item_size)
+        results[item_id] = payload
+    return results
+
+def _batcher(endpoint: str, part: str) -> MicroBatcher:
+    batcher = _batchers.get((endpoint, part))
+    if batcher is None:
+        async def fetch_many(ids, priority):
+            return await _fetch_batch(endpoint, part, ids, priority)
+        batcher = _batchers[(endpoint, part)] = MicroBatcher(fetch_many)
+    return batcher
+
+async def _fetch_and_store(key, endpoint: str, params: dict, session=None, label: str = None,
+                           priority: int = INTERACTIVE, budget: QuotaBudget = None):
+    # Lookup satu ID videos/channels digabung dengan lookup lain yang datang bersamaan
+    if endpoint in BATCHABLE_ENDPOINTS and set(params) == {"part", "id"}:
+        return await _batcher(endpoint, params["part"]).load(params["id"], priority)
+    # Setiap request sungguhan (bukan cache hit) ditagih biaya unitnya, juga ke budget operasinya
+    if budget is not None and not budget.take(endpoint):
+        return None
+    if not quota.scheduler.try_acquire(endpoint, priority):
+        return None
+    data, size = await _request_json(endpoint, params, session, label)
+    if data is not None:
+        _store_response(key, endpoint, data, size)
+    return data
+
+async def _revalidate(key, endpoint: str, params: dict, label: str = None):
+    try:
+        await inflight.do(key, lambda: _fetch_and_store(key, endpoint, params, label=label, priority=BACKGROUND))
+    except Exception:
+        logger.exception("Background refresh of %s failed", endpoint)
+    finally:
+        _revalidating.discard(key)
+
+async def _get_json(endpoint: str, params: dict, session: aiohttp.ClientSession = None, label: str = None,
+                    priority: int = INTERACTIVE, budget: QuotaBudget = None):
+    """
+    GET ke endpoint YouTube Data API lewat cache: data segar langsung dikembalikan,
+    data basi dikembalikan sambil di-refresh di background, sisanya diambil dari API
+    (jika kuota untuk kelas `priority` masih cukup; jika tidak, return None).
+    `budget` hanya ditagih saat request benar-benar dikirim, bukan saat cache hit.
+    """
+    key = make_cache_key(endpoint, params)
+    value, status = response_cache.lookup(key)
+    if status == FRESH:
+        return value
+    if status == STALE:
+        if key not in _revalidating:
+            _revalidating.add(key)
+            asyncio.get_running_loop().create_task(_revalidate(key, endpoint, params, label))
+        return value
+    return await inflight.do(key, lambda: _fetch_and_store(key, endpoint, params, session, label, priority, budget))
+
+def _first_item(data):
+    if not data:
+        return None
+    items = data.get("items", [])
+    return items[0] if items else None
+
+async def fetch_youtube_video_info(video_id: str, session: aiohttp.ClientSession = None, priority: int = INTERACTIVE):
+    params = {"part": "snippet,statistics,contentDetails", "id": video_id}
+    return _first_item(await _get_json("videos", params, session, priority=priority))
+
+# contentDetails (berisi playlist uploads) ikut diminta: biaya channels.list tetap 1 unit
+async def fetch_channel_by_id(channel_id: str, session: aiohttp.ClientSession = None, priority: int = INTERACTIVE):
+    params = {"part": "snippet,statistics,contentDetails", "id": channel_id}
+    return _first_item(await _get_json("channels", params, session, priority=priority))
+
+async def fetch_channel_by_username(username: str, session: aiohttp.ClientSession = None, priority: int = INTERACTIVE):
+    params = {"part": "snippet,statistics,contentDetails", "forUsername": username}
+    return _first_item(await _get_json("channels", params, session, "channels(forUsername)", priority))
     
-async def search_channel(session: aiohttp.ClientSession, query: str):
-    url = f"{YOUTUBE_API_BASE}/search"
-    params = {"part": "snippet", "q": query, "type": "channel", "maxResults": 1, "key": YOUTUBE_API_KEY}
-    async with session.get(url, params=params) as resp:
-        if resp.status != 200:
-            logger.error("search channel API returned status %s", resp.status)
-            return None
-        data = await resp.json()
-        items = data.get("items", [])
-        return items[0] if items else None
-
-async def fetch_search_videos(session: aiohttp.ClientSession, query: str, max_results: int = 5):
-    url = f"{YOUTUBE_API_BASE}/search"
-    params = {"part": "snippet", "q": query, "type": "video", "maxResults": max_results, "key": YOUTUBE_API_KEY}
-    async with session.get(url, params=params) as resp:
-        if resp.status != 200:
-            logger.error("search videos API returned status %s", resp.status)
-            return None
-        data = await resp.json()
-        return data.get("items", [])
-
-async def fetch_comment_threads(session: aiohttp.ClientSession, video_id: str, max_pages: int = MAX_COMMENT_PAGES):
-    items = []
-    url = f"{YOUTUBE_API_BASE}/commentThreads"
-    params = {
+async def search_channel(query: str, session: aiohttp.ClientSession = None, priority: int = INTERACTIVE):
+    params = {"part": "snippet", "q": query, "type": "channel", "maxResults": 1}
+    return _first_item(await _get_json("search", params, session, "search channel", priority))
+
+async def resolve_channel(channel_id: str = None, username: str = None, query: str = None,
+                          session: aiohttp.ClientSession = None, priority: int = INTERACTIVE):
+    """Cari resource channel dari ID, username (URL /user/), atau handle / nama bebas."""
+    # 1. Input adalah URL dengan Channel ID
+    if channel_id:
+        return await fetch_channel_by_id(channel_id, session, priority)
+
+    # 2. Input adalah URL dengan username
+    if username:
+        return await fetch_channel_by_username(username, session, priority)
+
+    # 3. Handle (@) / URL custom / nama bebas: lakukan pencarian umum
+    if not query:
+        return None
+    search_res = await search_channel(query, session, priority)
+    if not search_res:
+        return None
+
+    found_id = search_res.get("id", {}).get("channelId")
+    if not found_id:
+        return None
+
+    return await fetch_channel_by_id(found_id, session, priority)
+
+def uploads_playlist_id(channel: dict):
+    return channel.get("contentDetails", {}).get("relatedPlaylists", {}).get("uploads")
+
+async def iter_playlist_videos(playlist_id: str, max_videos: int = 50, session: aiohttp.ClientSession = None,
+                               priority: int = INTERACTIVE, budget: QuotaBudget = None):
+    """Async generator: yield (video_id, judul) dari playlist (uploads: terbaru dulu)."""
+    params = {"part": "snippet", "playlistId": playlist_id, "maxResults": min(50, max_videos)}
+    yielded = 0
+    while yielded < max_videos:
+        data = await _get_json("playlistItems", params, session, priority=priority, budget=budget)
+        if data is None:
+            return
+        for item in data.get("items", []):
+            snippet = item.get("snippet", {})
+            video_id = snippet.get("resourceId", {}).get("videoId")
+            if not video_id:
+                continue
+            yield video_id, snippet.get("title", "")
+            yielded += 1
+            if yielded >= max_videos:
+                return
+        token = data.get("nextPageToken")
+        if not token:
+            return
+        params = dict(params, pageToken=token)
+
+class SearchResults:
+    """
+    Hasil search.list (type=video) untuk satu query. Setiap request mengambil SEARCH_PAGE_SIZE
+    item dan di-cache per query yang dinormalisasi, jadi jumlah hasil berapa pun (dan halaman
+    berikutnya) dilayani dari cache; nextPageToken baru dipakai saat item yang ada kurang.
+    """
+
+    __slots__ = ("query", "items", "next_page_token", "priority", "_video_ids")
+
+    def __init__(self, query: str, priority: int = INTERACTIVE):
+        self.query = query
+        self.items = []
+        self.next_page_token = None
+        self.priority = priority
+        self._video_ids = set()
+
+    @property
+    def exhausted(self) -> bool:
+        return self.next_page_token is None
+
+    def _add(self, data: dict):
+        for item in data.get("items", []):
+            video_id = item.get("id", {}).get("videoId")
+            # Halaman search bisa tumpang tindih; video yang sama cukup sekali
+            if video_id in self._video_ids:
+                continue
+            self._video_ids.add(video_id)
+            self.items.append(item)
+        self.next_page_token = data.get("nextPageToken")
+
+    async def ensure(self, count: int, session: aiohttp.ClientSession = None) -> bool:
+        """Ambil halaman API berikutnya sampai ada `count` item; return False jika request gagal."""
+        while len(self.items) < count and self.next_page_token:
+            params = {"part": "snippet", "q": self.query, "type": "video", "maxResults": SEARCH_PAGE_SIZE,
+                      "pageToken": self.next_page_token}
+            data = await _get_json("search", params, session, "search videos", self.priority)
+            if data is None:
+                return False
+            self._add(data)
+        return True
+
+async def search_videos(query: str, session: aiohttp.ClientSession = None, priority: int = INTERACTIVE):
+    """Halaman pertama hasil search (SearchResults), atau None jika request gagal."""
+    params = {"part": "snippet", "q": query, "type": "video", "maxResults": SEARCH_PAGE_SIZE}
+    data = await _get_json("search", params, session, "search videos", priority)
+    if data is None:
+        return None
+    results = SearchResults(query, priority)
+    results._add(data)
+    return results
+
+async def fetch_search_videos(query: str, max_results: int = 5, session: aiohttp.ClientSession = None,
+                              priority: int = INTERACTIVE):
+    results = await search_videos(query, session, priority)
+    if results is None:
+        return None
+    return results.items[:max_results]
+
+async def iter_comment_responses(video_id: str, max_pages: int = MAX_COMMENT_PAGES,
+                                 max_comments: int = MAX_COMMENTS_TO_SCAN, session: aiohttp.ClientSession = None,
+                                 priority: int = INTERACTIVE, page_token: str = None):
+    """
+    Async generator: yield (items, nextPageToken) untuk setiap respons commentThreads yang
+    berhasil, mulai dari `page_token` (None = komentar terbaru). Halaman berikutnya sudah
+    diminta (prefetch) selagi konsumen memproses halaman ini; berhenti setelah `max_pages`
+    halaman atau setelah `max_comments` item terkumpul (halaman terakhir tidak dipotong).
+    Konsumen boleh berhenti kapan saja; panggil aclose() agar prefetch dibatalkan.
+    """
+    base_params = {
         "part": "snippet",
         "videoId": video_id,
         "maxResults": 100,
         "textFormat": "plainText",
-        "key": YOUTUBE_API_KEY
     }
-    next_token = None
+
+    def request_page(token):
+        params = dict(base_params, pageToken=token) if token else base_params
+        return asyncio.ensure_future(_get_json("commentThreads", params, session, priority=priority))
+
+    pending = request_page(page_token)
     pages = 0
-    while pages < max_pages:
-        if next_token:
-            params["pageToken"] = next_token
-        async with session.get(url, params=params) as resp:
-            if resp.status != 200:
-                logger.error("commentThreads API returned %s: %s", resp.status, await resp.text())
+    received = 0
+    try:
+        while pending is not None:
+            data = await pending
+            pending = None
+            if data is None:
+                break
+            pages += 1
+            page_items = data.get("items", [])
+            received += len(page_items)
+            next_token = data.get("nextPageToken")
+            if next_token and pages < max_pages and (max_comments is None or received < max_comments):
+                pending = request_page(next_token)
+            yield page_items, next_token
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+def comment_snippet(item: dict) -> dict:
+    """Snippet komentar dari item commentThreads (komentar teratas) maupun comments (balasan)."""
+    snippet = item.get("snippet", {})
+    top = snippet.get("topLevelComment")
+    return top.get("snippet", {}) if top is not None else snippet
+
+async def iter_deep_comments(video_id: str, budget_units: int = DEEP_SCAN_QUOTA,
+                             concurrency: int = DEEP_SCAN_CONCURRENCY, session: aiohttp.ClientSession = None,
+                             priority: int = INTERACTIVE):
+    """
+    Async generator deep scan: yield list item (thread dan balasan, baca lewat comment_snippet)
+    sampai semua halaman habis atau `budget_units` terpakai.
+
+    Satu task menelusuri commentThreads (part=snippet,replies: sampai 5 balasan ikut gratis);
+    thread dengan balasan lebih banyak diantrikan ke `concurrency` worker comments.list?parentId=
+    yang berjalan paralel. Antrean dibatasi, jadi penelusuran menunggu jika konsumen tertinggal.
+    Halaman yang masih ada di cache tidak memotong budget.
+    """
+    budget = QuotaBudget(budget_units)
+    results = asyncio.Queue(maxsize=concurrency * 2)
+    parents = asyncio.Queue(maxsize=DEEP_SCAN_QUEUE_SIZE)
+    finished = object()
+
+    async def walk_threads():
+        params = {
+            "part": "snippet,replies",
+            "videoId": video_id,
+            "maxResults": 100,
+            "textFormat": "plainText",
+        }
+        try:
+            while True:
+                data = await _get_json("commentThreads", params, session, priority=priority, budget=budget)
+                if data is None:
+                    break
+                page = []
+                for item in data.get("items", []):
+                    page.append(item)
+                    inline = item.get("replies", {}).get("comments", [])
+                    if item.get("snippet", {}).get("totalReplyCount", 0) > len(inline):
+                        await parents.put(item.get("id"))
+                    else:
+                        page.extend(inline)
+                await results.put(page)
+                token = data.get("nextPageToken")
+                if not token:
+                    break
+                params = dict(params, pageToken=token)
+        except Exception:
+            logger.exception("Deep scan of %s stopped", video_id)
+        for _ in range(concurrency):
+            await parents.put(None)
+
+    async def fetch_replies():
+        while True:
+            parent_id = await parents.get()
+            if parent_id is None:
+                return
+            params = {"part": "snippet", "parentId": parent_id, "maxResults": 100, "textFormat": "plainText"}
+            try:
+                while True:
+                    data = await _get_json("comments", params, session, priority=priority, budget=budget)
+                    if data is None:
+                        break
+                    await results.put(data.get("items", []))
+                    token = data.get("nextPageToken")
+                    if not token:
+                        break
+                    params = dict(params, pageToken=token)
+            except Exception:
+                logger.exception("Fetching replies of %s failed", parent_id)
+
+    async def run():
+        await asyncio.gather(walk_threads(), *(fetch_replies() for _ in range(concurrency)))
+        await results.put(finished)
+
+    runner = asyncio.ensure_future(run())
+    try:
+        while True:
+            batch = await results.get()
+            if batch is finished:
                 break
-            data = await resp.json()
-        page_items = data.get("items", [])
-        items.extend(page_items)
-        pages += 1
-        next_token = data.get("nextPageToken")
-        if not next_token:
-            break
-        if len(items) >= MAX_COMMENTS_TO_SCAN:
-            break
-    return items[:MAX_COMMENTS_TO_SCAN]
+            if batch:
+                yield batch
+    finally:
+        runner.cancel()
+        logger.info("Deep scan of %s used %s/%s units", video_id, budget.spent, budget.units)